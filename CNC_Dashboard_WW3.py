@@ -14,9 +14,7 @@ import random
 # 인증 모듈
 from google.oauth2 import service_account 
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import (
-    DateRange, Dimension, Metric, RunReportRequest, OrderBy
-)
+from cnc_ga4 import run_report, run_batch_reports
 
 # ----------------- 1. 페이지 설정 -----------------
 st.set_page_config(
@@ -231,28 +229,11 @@ def get_sunday_to_saturday_ranges(count=12):
 WEEK_MAP = get_sunday_to_saturday_ranges()
 
 def run_ga4_report(start_date, end_date, dimensions, metrics, order_by_metric=None, limit=None):
-    client = get_ga4_client()
-    if not client: return pd.DataFrame()
-    order_bys = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=order_by_metric), desc=True)] if order_by_metric else []
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        dimensions=[Dimension(name=d) for d in dimensions],
-        metrics=[Metric(name=m) for m in metrics],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-        order_bys=order_bys,
-        limit=limit if limit else 10000
-    )
-    try:
-        response = client.run_report(request)
-        data = []
-        for row in response.rows:
-            row_dict = {dimensions[i]: row.dimension_values[i].value for i in range(len(dimensions))}
-            for i, met in enumerate(metrics):
-                val = row.metric_values[i].value
-                row_dict[met] = float(val) if '.' in val else int(val)
-            data.append(row_dict)
-        return pd.DataFrame(data)
-    except: return pd.DataFrame(columns=dimensions + metrics)
+    return run_report(get_ga4_client(), PROPERTY_ID, start_date, end_date, dimensions, metrics, order_by_metric, limit)
+
+# 여러 리포트를 batchRunReports 로 5개씩 묶어 한 번에 요청
+def run_ga4_batch(specs):
+    return run_batch_reports(get_ga4_client(), PROPERTY_ID, specs)
 
 def create_donut_chart_with_val(df, names, values, color_map=None):
     if df.empty: return go.Figure()
@@ -275,8 +256,33 @@ def load_all_dashboard_data(selected_week):
     ls_dt = (datetime.strptime(s_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
     le_dt = (datetime.strptime(e_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
 
+    # 0. GA4 리포트 일괄 요청 (batchRunReports, 5개씩 묶음)
+    def week_dates(date_str):
+        w_parts = date_str.split(' ~ ')
+        return w_parts[0].replace('.', '-'), w_parts[1].replace('.', '-')
+
+    trend_weeks = list(WEEK_MAP.items())[:12]
+    specs = {
+        'summary': dict(start_date=s_dt, end_date=e_dt, dimensions=[], metrics=["activeUsers", "screenPageViews", "newUsers"]),
+        'daily': dict(start_date=s_dt, end_date=e_dt, dimensions=["date"], metrics=["activeUsers", "screenPageViews"]),
+        'pages_count': dict(start_date=s_dt, end_date=e_dt, dimensions=["pagePath"], metrics=["screenPageViews"], limit=10000),
+        'traffic_curr': dict(start_date=s_dt, end_date=e_dt, dimensions=["sessionSource"], metrics=["screenPageViews"]),
+        'traffic_last': dict(start_date=ls_dt, end_date=le_dt, dimensions=["sessionSource"], metrics=["screenPageViews"]),
+        'region_curr': dict(start_date=s_dt, end_date=e_dt, dimensions=["region"], metrics=["activeUsers"], order_by_metric="activeUsers", limit=50),
+        'region_last': dict(start_date=ls_dt, end_date=le_dt, dimensions=["region"], metrics=["activeUsers"], order_by_metric="activeUsers", limit=50),
+        'age_curr': dict(start_date=s_dt, end_date=e_dt, dimensions=["userAgeBracket"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+        'age_last': dict(start_date=ls_dt, end_date=le_dt, dimensions=["userAgeBracket"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+        'gender_curr': dict(start_date=s_dt, end_date=e_dt, dimensions=["userGender"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+        'gender_last': dict(start_date=ls_dt, end_date=le_dt, dimensions=["userGender"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+        'top': dict(start_date=s_dt, end_date=e_dt, dimensions=["pageTitle", "pagePath"], metrics=["screenPageViews", "activeUsers", "userEngagementDuration", "bounceRate"], order_by_metric="screenPageViews", limit=100),
+    }
+    for wl, dstr in trend_weeks:
+        ws, we = week_dates(dstr)
+        specs[f'week_{wl}'] = dict(start_date=ws, end_date=we, dimensions=[], metrics=["activeUsers", "screenPageViews"])
+    reports = run_ga4_batch(specs)
+
     # 1. KPI
-    summary = run_ga4_report(s_dt, e_dt, [], ["activeUsers", "screenPageViews", "newUsers"])
+    summary = reports['summary']
     if not summary.empty:
         sel_uv = int(summary['activeUsers'].iloc[0])
         sel_pv = int(summary['screenPageViews'].iloc[0])
@@ -285,26 +291,21 @@ def load_all_dashboard_data(selected_week):
     new_visitor_ratio = round((sel_new / sel_uv * 100), 1) if sel_uv > 0 else 0
 
     # 2. 일별 데이터
-    df_daily = run_ga4_report(s_dt, e_dt, ["date"], ["activeUsers", "screenPageViews"])
+    df_daily = reports['daily']
     if not df_daily.empty:
         df_daily = df_daily.rename(columns={'date':'날짜', 'activeUsers':'UV', 'screenPageViews':'PV'})
         df_daily['날짜'] = pd.to_datetime(df_daily['날짜']).dt.strftime('%m-%d')
     
     # 3. 3개월 추이
-    def fetch_week_data(week_label, date_str):
-        ws, we = date_str.split(' ~ ')[0].replace('.', '-'), date_str.split(' ~ ')[1].replace('.', '-')
-        res = run_ga4_report(ws, we, [], ["activeUsers", "screenPageViews"])
+    results = []
+    for wl, _ in trend_weeks:
+        res = reports[f'week_{wl}']
         if not res.empty:
-            return {
-                '주차': week_label, 
+            results.append({
+                '주차': wl, 
                 'UV': int(res['activeUsers'][0]), 
                 'PV': int(res['screenPageViews'][0])
-            }
-        return None
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(fetch_week_data, wl, dstr) for wl, dstr in list(WEEK_MAP.items())[:12]]
-        results = [f.result() for f in concurrent.futures.as_completed(futures) if f.result()]
+            })
     
     df_weekly = pd.DataFrame(results)
     if not df_weekly.empty:
@@ -312,7 +313,7 @@ def load_all_dashboard_data(selected_week):
         df_weekly = df_weekly.sort_values('week_num')
     
     # 활성 기사 수
-    df_pages_count = run_ga4_report(s_dt, e_dt, ["pagePath"], ["screenPageViews"], limit=10000)
+    df_pages_count = reports['pages_count']
     if not df_pages_count.empty:
         mask_article = df_pages_count['pagePath'].str.contains(r'article|news|view|story', case=False, regex=True, na=False)
         active_article_count = df_pages_count[mask_article].shape[0]
@@ -330,7 +331,7 @@ def load_all_dashboard_data(selected_week):
         if '(direct)' in s: return '직접'
         if 'google' in s: return '구글'
         return '기타'
-    df_t_raw = run_ga4_report(s_dt, e_dt, ["sessionSource"], ["screenPageViews"])
+    df_t_raw = reports['traffic_curr']
     df_t_raw['유입경로'] = df_t_raw['sessionSource'].apply(map_source)
     df_traffic_curr = df_t_raw.groupby('유입경로')['screenPageViews'].sum().reset_index().rename(columns={'screenPageViews':'조회수'})
     
@@ -339,7 +340,7 @@ def load_all_dashboard_data(selected_week):
     total_pv_traffic = df_traffic_curr['조회수'].sum()
     search_inflow_ratio = round((search_pv / total_pv_traffic * 100), 1) if total_pv_traffic > 0 else 0
     
-    df_tl_raw = run_ga4_report(ls_dt, le_dt, ["sessionSource"], ["screenPageViews"])
+    df_tl_raw = reports['traffic_last']
     df_tl_raw['유입경로'] = df_tl_raw['sessionSource'].apply(map_source)
     df_traffic_last = df_tl_raw.groupby('유입경로')['screenPageViews'].sum().reset_index().rename(columns={'screenPageViews':'조회수'})
 
@@ -351,39 +352,31 @@ def load_all_dashboard_data(selected_week):
 
     region_map = {'Seoul':'서울','Gyeonggi-do':'경기','Incheon':'인천','Busan':'부산','Daegu':'대구','Gyeongsangnam-do':'경남','Gyeongsangbuk-do':'경북','Chungcheongnam-do':'충남','Chungcheongbuk-do':'충북','Jeollanam-do':'전남','Jeollabuk-do':'전북','Gangwon-do':'강원','Daejeon':'대전','Gwangju':'광주','Ulsan':'울산','Jeju-do':'제주','Sejong-si':'세종'}
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-        f_reg_c = executor.submit(run_ga4_report, s_dt, e_dt, ["region"], ["activeUsers"], "activeUsers", 50)
-        f_reg_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["region"], ["activeUsers"], "activeUsers", 50)
-        f_age_c = executor.submit(run_ga4_report, s_dt, e_dt, ["userAgeBracket"], ["activeUsers"], "activeUsers")
-        f_age_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["userAgeBracket"], ["activeUsers"], "activeUsers")
-        f_gen_c = executor.submit(run_ga4_report, s_dt, e_dt, ["userGender"], ["activeUsers"], "activeUsers")
-        f_gen_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["userGender"], ["activeUsers"], "activeUsers")
-
-        d_rc, d_rl = f_reg_c.result(), f_reg_l.result()
-        if not d_rc.empty: d_rc['region_mapped'] = d_rc['region'].map(region_map).fillna('기타')
-        if not d_rl.empty: d_rl['region_mapped'] = d_rl['region'].map(region_map).fillna('기타')
-        df_region_curr = clean_and_group(d_rc, 'region_mapped')
-        df_region_last = clean_and_group(d_rl, 'region_mapped')
-
-        d_ac, d_al = f_age_c.result(), f_age_l.result()
-        for df in [d_ac, d_al]:
-            if not df.empty:
-                df['temp_age'] = df['userAgeBracket'].replace({'unknown': '기타', '(not set)': '기타'})
-                df['구분'] = df['temp_age'].apply(lambda x: x + '세' if x != '기타' else x)
-        df_age_curr = d_ac[d_ac['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_ac.empty else pd.DataFrame()
-        df_age_last = d_al[d_al['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_al.empty else pd.DataFrame()
-
-        d_gc, d_gl = f_gen_c.result(), f_gen_l.result()
-        gender_map = {'male': '남성', 'female': '여성'}
-        for df in [d_gc, d_gl]:
-            if not df.empty:
-                df['mapped'] = df['userGender'].map(gender_map)
-                df['구분'] = df['mapped']
-        df_gender_curr = d_gc.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gc.empty else pd.DataFrame()
-        df_gender_last = d_gl.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gl.empty else pd.DataFrame()
+    d_rc, d_rl = reports['region_curr'], reports['region_last']
+    if not d_rc.empty: d_rc['region_mapped'] = d_rc['region'].map(region_map).fillna('기타')
+    if not d_rl.empty: d_rl['region_mapped'] = d_rl['region'].map(region_map).fillna('기타')
+    df_region_curr = clean_and_group(d_rc, 'region_mapped')
+    df_region_last = clean_and_group(d_rl, 'region_mapped')
+
+    d_ac, d_al = reports['age_curr'], reports['age_last']
+    for df in [d_ac, d_al]:
+        if not df.empty:
+            df['temp_age'] = df['userAgeBracket'].astype(str).replace({'unknown': '기타', '(not set)': '기타'})
+            df['구분'] = df['temp_age'].apply(lambda x: x + '세' if x != '기타' else x)
+    df_age_curr = d_ac[d_ac['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_ac.empty else pd.DataFrame()
+    df_age_last = d_al[d_al['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_al.empty else pd.DataFrame()
+
+    d_gc, d_gl = reports['gender_curr'], reports['gender_last']
+    gender_map = {'male': '남성', 'female': '여성'}
+    for df in [d_gc, d_gl]:
+        if not df.empty:
+            df['mapped'] = df['userGender'].map(gender_map)
+            df['구분'] = df['mapped']
+    df_gender_curr = d_gc.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gc.empty else pd.DataFrame()
+    df_gender_last = d_gl.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gl.empty else pd.DataFrame()
 
     # 6. TOP 10 및 크롤링
-    df_raw_top = run_ga4_report(s_dt, e_dt, ["pageTitle", "pagePath"], ["screenPageViews", "activeUsers", "userEngagementDuration", "bounceRate"], "screenPageViews", limit=100)
+    df_raw_top = reports['top']
     
     if not df_raw_top.empty:
         paths = df_raw_top['pagePath'].tolist()
@@ -4,18 +4,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import requests
 import re
-import concurrent.futures
-from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import random
 
 from google.oauth2 import service_account 
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import (
-    DateRange, Dimension, Metric, RunReportRequest, OrderBy
-)
+from cnc_ga4 import PAGE_SIZE, build_report_request, call_run_report, iter_report_pages, response_to_df, report_dimensions, split_date_ranges
+from cnc_article_store import ArticleStore
+from cnc_crawler import ArticleCrawler
+from cnc_extract import ArticleExtractor
 
 # ----------------- 1. 페이지 설정 -----------------
 st.set_page_config(
@@ -111,28 +109,45 @@ def map_traffic_source(s):
     if 'kakao' in s: return '카카오'
     return '기타'
 
-def crawl_article_meta(url_path):
-    full_url = f"http://www.cooknchefnews.com{url_path}"
-    try:
-        res = requests.get(full_url, timeout=2)
-        soup = BeautifulSoup(res.text, 'html.parser')
-        author = "관리자"
-        a_tag = soup.select_one('.user-name') or soup.select_one('.writer')
-        if a_tag: author = a_tag.text.strip().replace('기자', '')
-        
-        date_str = ""
-        d_tag = soup.select_one('.date') or soup.select_one('.regdate')
-        if d_tag: 
-            # 날짜 형식 정규화
-            found_date = re.search(r'\d{4}-\d{2}-\d{2}', d_tag.text.strip())
-            if found_date: date_str = found_date.group()
-        
-        cat = "뉴스"
-        bread = soup.select('.location a')
-        if len(bread) >= 2: cat = bread[1].text.strip()
-        
-        return {"작성자": author, "카테고리": cat, "발행일": date_str}
-    except: return {"작성자": "관리자", "카테고리": "뉴스", "발행일": ""}
+# WW4 는 작성자/발행일을 ww5 와 다른 형식('YYYY-MM-DD')으로 저장하므로 기사 저장소의 테이블을 따로 쓴다
+# build_article_meta 의 저장 형식이 바뀌면 ARTICLE_META_VERSION 을 올린다 (예전 형식의 행은 다시 크롤링)
+ARTICLE_TABLE = "articles_ww4"
+ARTICLE_META_VERSION = 1
+
+@st.cache_resource
+def get_article_store():
+    return ArticleStore(table=ARTICLE_TABLE, meta_version=ARTICLE_META_VERSION)
+
+@st.cache_resource
+def get_article_crawler():
+    return ArticleCrawler(per_host_limit=10, timeout=2)
+
+# 작성자/발행일/카테고리 노드만 부분 추출 (cnc_extract)
+def make_meta_extractor():
+    return ArticleExtractor(stop_when=("user-name", "date", "location"), scan_author=False)
+
+def build_article_meta(fields):
+    t = fields['texts']
+    author = "관리자"
+    a_txt = t.get('user-name') or t.get('writer')
+    if a_txt: author = a_txt.replace('기자', '')
+    
+    date_str = ""
+    d_txt = t.get('date') or t.get('regdate')
+    if d_txt: 
+        # 날짜 형식 정규화
+        found_date = re.search(r'\d{4}-\d{2}-\d{2}', d_txt)
+        if found_date: date_str = found_date.group()
+    
+    cat = "뉴스"
+    bread = fields['crumbs']['location']
+    if len(bread) >= 2: cat = bread[1]
+    
+    return {"author": author, "category": cat, "pub_date": date_str}
+
+# 실패한 경로는 None (기사 저장소에서 네거티브 캐시)
+def crawl_article_meta(paths):
+    return get_article_crawler().crawl_extract(paths, make_meta_extractor, build_article_meta)
 
 def get_weeks():
     w = {}
@@ -146,23 +161,18 @@ def get_weeks():
     return w
 WEEK_MAP = get_weeks()
 
-def run_ga4(sd, ed, dims, mets, limit=10000):
+# date_ranges=[(시작, 종료, 이름), ...] 이면 여러 기간을 한 요청으로 조회 (dateRange 열 포함)
+def run_ga4(sd, ed, dims, mets, limit=10000, date_ranges=None):
     client = get_ga4_client()
     if not client: return pd.DataFrame()
-    req = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        dimensions=[Dimension(name=d) for d in dims],
-        metrics=[Metric(name=m) for m in mets],
-        date_ranges=[DateRange(start_date=sd, end_date=ed)],
-        limit=limit
-    )
-    res = client.run_report(req)
-    data = []
-    for row in res.rows:
-        rd = {dims[i]: row.dimension_values[i].value for i in range(len(dims))}
-        for i, m in enumerate(mets): rd[m] = float(row.metric_values[i].value) if '.' in row.metric_values[i].value else int(row.metric_values[i].value)
-        data.append(rd)
-    return pd.DataFrame(data)
+    res = call_run_report(client, PROPERTY_ID, build_report_request(PROPERTY_ID, sd, ed, dims, mets, limit=limit, date_ranges=date_ranges))
+    return response_to_df(res, report_dimensions(dims, date_ranges), mets)
+
+# 행 수가 많은 리포트는 페이지 단위로 받아 DataFrame 조각을 yield (row_count 확인 후 나머지 페이지는 동시 조회)
+def iter_ga4(sd, ed, dims, mets):
+    client = get_ga4_client()
+    if not client: return
+    yield from iter_report_pages(client, PROPERTY_ID, sd, ed, dims, mets, page_size=PAGE_SIZE)
 
 # ----------------- 4. 데이터 엔진 (이원화 분석) -----------------
 @st.cache_data(ttl=3600)
@@ -183,18 +193,28 @@ def load_full_data(selected_week):
         df_daily = df_daily.sort_values('날짜')
 
     # 기사별 상세 데이터 및 유입경로
-    df_raw = run_ga4(s_dt, e_dt, ["pageTitle", "pagePath", "sessionSource"], ["screenPageViews", "activeUsers"])
-    unique_paths = df_raw[df_raw['pagePath'].str.contains(r'article|news', na=False)]['pagePath'].unique()[:40]
+    # 페이지 단위로 받으면서 처음 나온 기사 40개의 행만 (경로, 매체) 단위로 누적 집계
+    unique_paths, titles, parts = [], {}, []
+    for chunk in iter_ga4(s_dt, e_dt, ["pageTitle", "pagePath", "sessionSource"], ["screenPageViews", "activeUsers"]):
+        if chunk.empty: continue
+        arts = chunk[chunk['pagePath'].str.contains(r'article|news', na=False)].drop_duplicates('pagePath')
+        for p, t in arts[['pagePath', 'pageTitle']].itertuples(index=False):
+            if len(unique_paths) >= 40: break
+            if p not in titles: unique_paths.append(p); titles[p] = t
+        sel = chunk[chunk['pagePath'].isin(titles)].copy()
+        # map_traffic_source 호출
+        sel['매체'] = sel['sessionSource'].apply(map_traffic_source)
+        parts.append(sel.groupby(['pagePath', '매체'], as_index=False)[['screenPageViews', 'activeUsers']].sum())
+    df_src = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=['pagePath', '매체', 'screenPageViews', 'activeUsers'])
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as ex:
-        meta_map = {p: ex.submit(crawl_article_meta, p) for p in unique_paths}
+    # 저장소에 없거나 만료된 기사만 크롤링 (좋아요/댓글은 사용하지 않음)
+    meta_map = get_article_store().get_or_crawl(unique_paths, crawl_article_meta, static_fields=("author", "category", "pub_date"), need_dynamic=False)
     
     art_list = []
     for p in unique_paths:
-        m = meta_map[p].result()
-        p_data = df_raw[df_raw['pagePath'] == p].copy()
-        # map_traffic_source 호출
-        p_data['매체'] = p_data['sessionSource'].apply(map_traffic_source)
+        meta = meta_map.get(p, {})
+        m = {"작성자": meta.get("author", "관리자"), "카테고리": meta.get("category", "뉴스"), "발행일": meta.get("pub_date", "")}
+        p_data = df_src[df_src['pagePath'] == p]
         
         source_dist = p_data.groupby('매체')['screenPageViews'].sum().to_dict()
         total_p_pv = sum(source_dist.values())
@@ -203,7 +223,7 @@ def load_full_data(selected_week):
         dist_str = " | ".join([f"{k}: {int(v/total_p_pv*100)}%" for k, v in source_dist.items() if (v/total_p_pv) > 0.05])
         
         art_list.append({
-            "제목": p_data['pageTitle'].iloc[0], "경로": p, "작성자": m["작성자"], 
+            "제목": titles[p], "경로": p, "작성자": m["작성자"], 
             "카테고리": m["카테고리"], "발행일": m["발행일"], "조회수": total_p_pv, 
             "방문자수": total_p_uv, "매체비중": dist_str
         })
@@ -213,8 +233,10 @@ def load_full_data(selected_week):
     df_pub = df_art[df_art['발행일'].between(s_dt, e_dt)].sort_values('조회수', ascending=False).head(10)
 
     df_cat = df_art.groupby('카테고리')['조회수'].sum().reset_index()
-    df_reg_c = run_ga4(s_dt, e_dt, ["region"], ["activeUsers"])
-    df_reg_l = run_ga4(ls_dt, le_dt, ["region"], ["activeUsers"])
+    # 이번주/지난주 지역 데이터를 한 요청으로 조회
+    df_reg = run_ga4(None, None, ["region"], ["activeUsers"], date_ranges=[(s_dt, e_dt, 'curr'), (ls_dt, le_dt, 'last')])
+    regs = split_date_ranges(df_reg, ['curr', 'last'])
+    df_reg_c, df_reg_l = regs['curr'], regs['last']
 
     return uv, pv, nu, df_daily, df_act, df_pub, df_cat, df_reg_c, df_reg_l
 
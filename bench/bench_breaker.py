@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ga4 import FakeGA4Client
+from stub_server import StubArticleServer
+from cnc_article_store import ArticleStore
+from cnc_crawler import ArticleCrawler, CircuitBreaker
+from cnc_report import build_weekly_report, get_sunday_to_saturday_ranges
+
+# ----------------- 기사 사이트 장애 시 콜드 로드: 서킷 브레이커 없음 vs 있음 -----------------
+# 스텁 서버가 크롤러 읽기 타임아웃(2초)보다 늦게 응답하게 해 사이트 장애를 흉내 내고,
+# 빈 기사 저장소에서 TOP 기사 + 전체 기사 색인을 집계할 때 걸린 시간/HTTP 요청 수/건너뛴 기사 수를 비교한다.
+# - off:     브레이커가 열리지 않음 (모든 기사가 타임아웃 x 재시도만큼 기다림)
+# - breaker: 연속 --failures 번 실패하면 열고, 나머지 기사는 요청하지 않음
+# 그 다음 사이트를 복구하고 --cooldown 초 뒤 다시 집계해, 시험 요청(half-open) 뒤 브레이커가 닫히고 빠진 기사가 채워지는지 본다.
+# 사용법: python bench/bench_breaker.py --rows 40 --down-latency 2.5
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=40, help="GA4 가 돌려줄 기사 경로 수")
+    ap.add_argument("--latency", type=float, default=0.05, help="정상일 때 응답 지연(초)")
+    ap.add_argument("--down-latency", type=float, default=2.5, help="장애일 때 응답 지연(초, 크롤러 타임아웃보다 길게)")
+    ap.add_argument("--failures", type=int, default=8, help="브레이커를 여는 연속 실패 수")
+    ap.add_argument("--cooldown", type=float, default=1.0, help="브레이커가 열려 있는 시간(초)")
+    args = ap.parse_args()
+
+    client = FakeGA4Client(rows=args.rows)
+    week_map = get_sunday_to_saturday_ranges()
+    week = list(week_map)[0]
+    sections = ['top', 'articles']
+
+    print(f"{'mode':<9}{'sec':>7}{'http':>6}{'skipped':>9}{'state':>11}{'recover sec':>13}{'recover http':>14}{'recover skipped':>17}{'state':>8}")
+    for mode, failures in (("off", float('inf')), ("breaker", args.failures)):
+        with StubArticleServer(latency=args.down_latency) as srv:
+            breaker = CircuitBreaker(failures=failures, cooldown=args.cooldown)
+            store, crawler = ArticleStore(":memory:"), ArticleCrawler(base_url=srv.base_url, breaker=breaker)
+            try:
+                t = time.perf_counter()
+                report = build_weekly_report(client, "bench", week_map, week, store, crawler, sections=sections, crawl_budget=None)
+                sec, http, state = time.perf_counter() - t, srv.stats['requests'], breaker.state
+                # 사이트 복구 후 브레이커가 열려 있는 시간이 지나면 다시 집계
+                srv.latency = args.latency
+                time.sleep(args.cooldown)
+                srv.reset_stats()
+                t = time.perf_counter()
+                again = build_weekly_report(client, "bench", week_map, week, store, crawler, sections=sections, crawl_budget=None)
+                rsec = time.perf_counter() - t
+                print(f"{mode:<9}{sec:>7.2f}{http:>6}{report['crawl_degraded']:>9}{state:>11}"
+                      f"{rsec:>13.2f}{srv.stats['requests']:>14}{again['crawl_degraded']:>17}{breaker.state:>8}")
+            finally:
+                crawler.close()
+                store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_crawler import ArticleCrawler
+from stub_server import StubArticleServer
+
+# ----------------- 크롤러 벤치마크: 스레드 풀 + requests.get vs 비동기 커넥션 풀 -----------------
+# 사용법: python bench/bench_crawler.py --paths 100 --latency 0.05 --rounds 3
+def parse_len(html):
+    return {"size": len(html)}
+
+def crawl_threadpool(base_url, paths, workers):
+    def one(p):
+        try:
+            return parse_len(requests.get(f"{base_url}{p}", timeout=2).text)
+        except Exception:
+            return None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(paths, executor.map(one, paths)))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--paths", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.05, help="스텁 서버 응답 지연(초)")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=20)
+    args = ap.parse_args()
+    paths = [f"/news/articleView.html?idxno={1000 + i}" for i in range(args.paths)]
+
+    with StubArticleServer(latency=args.latency) as srv:
+        rows = []
+        for r in range(args.rounds):
+            srv.reset_stats()
+            t = time.perf_counter(); res = crawl_threadpool(srv.base_url, paths, args.workers)
+            rows.append(("threadpool+requests", r, time.perf_counter() - t, srv.stats, sum(v is not None for v in res.values())))
+
+        crawler = ArticleCrawler(base_url=srv.base_url, per_host_limit=args.workers)
+        try:
+            for r in range(args.rounds):
+                srv.reset_stats()
+                t = time.perf_counter(); res = crawler.crawl(paths, parse_len)
+                rows.append(("async pooled", r, time.perf_counter() - t, srv.stats, sum(v is not None for v in res.values())))
+        finally:
+            crawler.close()
+
+    print(f"{'engine':<22}{'round':>6}{'sec':>9}{'conns':>7}{'reqs':>6}{'ok':>5}")
+    for name, r, sec, st, ok in rows:
+        print(f"{name:<22}{r:>6}{sec:>9.3f}{st['connections']:>7}{st['requests']:>6}{ok:>5}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ga4 import FakeGA4Client
+from stub_server import StubArticleServer
+from cnc_article_store import ArticleStore
+from cnc_crawler import ArticleCrawler
+from cnc_report import build_weekly_report, get_sunday_to_saturday_ranges
+
+# ----------------- 느린 기사가 섞인 콜드 로드: 크롤링 마감 시간 없음 vs 있음 -----------------
+# 빈 기사 저장소에서 TOP 기사 + 전체 기사 색인을 집계한다. TOP 기사 중 --slow 개는 응답이 --slow-latency 초 걸린다.
+# - wait:   crawl_budget=None (모든 기사를 기다림. 가장 느린 기사가 로드 시간을 정함)
+# - budget: crawl_budget=--budget (마감까지 가져온 정보로 집계, 나머지는 백그라운드에서 저장소로)
+# 마감 뒤 백그라운드 크롤링이 끝나면, 다시 집계할 때 크롤링 없이 빠진 기사가 채워지는지도 본다.
+# 사용법: python bench/bench_deadline.py --slow 3 --slow-latency 1.9 --budget 1.5
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100, help="GA4 가 돌려줄 기사 경로 수")
+    ap.add_argument("--latency", type=float, default=0.05, help="보통 기사 응답 지연(초)")
+    ap.add_argument("--slow", type=int, default=3, help="느린 기사 수 (조회수 하위 TOP 기사부터)")
+    # 크롤러 읽기 타임아웃(2초)보다 짧게: 느리지만 결국 응답하는 기사
+    ap.add_argument("--slow-latency", type=float, default=1.9, help="느린 기사 응답 지연(초)")
+    ap.add_argument("--budget", type=float, default=1.5, help="크롤링 마감 시간(초)")
+    args = ap.parse_args()
+
+    client = FakeGA4Client(rows=args.rows)
+    week_map = get_sunday_to_saturday_ranges()
+    week = list(week_map)[0]
+    # 느리게 만들 TOP 기사 경로를 알아내기 위해 한 번 집계해 본다
+    with StubArticleServer(latency=args.latency) as probe:
+        crawler = ArticleCrawler(base_url=probe.base_url)
+        report = build_weekly_report(client, "bench", week_map, week, ArticleStore(":memory:"), crawler, sections=['top'], crawl_budget=None)
+        crawler.close()
+    slow = {p: args.slow_latency for p in report['df_raw_all']['pagePath'].astype(str).tolist()[-args.slow:]} if args.slow else {}
+
+    print(f"{'mode':<8}{'sec':>7}{'pending':>9}{'articles':>10}{'rebuild sec':>13}{'rebuild http':>14}{'rebuild pending':>17}")
+    for mode, budget in (("wait", None), ("budget", args.budget)):
+        with StubArticleServer(latency=args.latency, slow=slow) as srv:
+            store, crawler = ArticleStore(":memory:"), ArticleCrawler(base_url=srv.base_url)
+            try:
+                t = time.perf_counter()
+                report = build_weekly_report(client, "bench", week_map, week, store, crawler, sections=['top', 'articles'], crawl_budget=budget)
+                sec = time.perf_counter() - t
+                # 백그라운드 크롤링이 끝날 때까지 기다렸다가 다시 집계
+                time.sleep(args.slow_latency + 1 if budget is not None else 0)
+                srv.reset_stats()
+                t = time.perf_counter()
+                again = build_weekly_report(client, "bench", week_map, week, store, crawler, sections=['top', 'articles'], crawl_budget=budget)
+                rsec = time.perf_counter() - t
+                print(f"{mode:<8}{sec:>7.2f}{report['crawl_pending']:>9}{len(report['df_articles']):>10}{rsec:>13.2f}{srv.stats['requests']:>14}{again['crawl_pending']:>17}")
+            finally:
+                crawler.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_extract import extract_article_fields
+
+# ----------------- 기사 메타데이터 추출 벤치마크 -----------------
+# 저장된 기사 HTML(bench/fixtures/articles)을 대상으로
+# 기존 BeautifulSoup(html.parser) 전체 파싱과 cnc_extract 부분 추출을 비교한다.
+# 사용법: python bench/bench_extract.py --repeat 50
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+
+def clean_author_name(name):
+    if not name: return "미상"
+    name = name.replace('#', '').replace('기자', '')
+    return ' '.join(name.split())
+
+# 기존 crawl_single_article 의 파싱 경로 (비교 기준)
+def parse_bs4(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    author = "관리자"
+    author_tag = soup.select_one('.user-name') or soup.select_one('.writer') or soup.select_one('.byline')
+    if author_tag: author = author_tag.text.strip()
+    else:
+        for tag in soup.select('span, div, li'):
+            txt = tag.text.strip()
+            if '기자' in txt and len(txt) < 10:
+                author = txt; break
+    author = clean_author_name(author)
+    likes = int(soup.select_one('.sns-like-count').text.replace(',', '')) if soup.select_one('.sns-like-count') else 0
+    comments = int(soup.select_one('.comment-count').text.replace(',', '')) if soup.select_one('.comment-count') else 0
+    cat, subcat = "뉴스", "이슈"
+    breadcrumbs = soup.select('.location a') or soup.select('.breadcrumb a') or soup.select('.path a')
+    if breadcrumbs:
+        if len(breadcrumbs) >= 2: cat = breadcrumbs[1].text.strip()
+        if len(breadcrumbs) >= 3: subcat = breadcrumbs[2].text.strip()
+    else:
+        meta_sec = soup.select_one('meta[property="article:section"]')
+        if meta_sec: cat = meta_sec.get('content')
+    return (author, likes, comments, cat, subcat)
+
+# cncnews_ww5.parse_article_html 과 같은 변환
+def parse_fast(html):
+    f = extract_article_fields(html)
+    t = f["texts"]
+    author = clean_author_name(t.get('user-name') or t.get('writer') or t.get('byline') or f["scanned_author"] or "관리자")
+    likes = int(t['sns-like-count'].replace(',', '')) if 'sns-like-count' in t else 0
+    comments = int(t['comment-count'].replace(',', '')) if 'comment-count' in t else 0
+    cat, subcat = "뉴스", "이슈"
+    crumbs = f["breadcrumbs"]
+    if crumbs:
+        if len(crumbs) >= 2: cat = crumbs[1]
+        if len(crumbs) >= 3: subcat = crumbs[2]
+    elif f["section"]: cat = f["section"]
+    return (author, likes, comments, cat, subcat)
+
+def bench(fn, html, repeat):
+    t = time.perf_counter()
+    for _ in range(repeat): fn(html)
+    return (time.perf_counter() - t) / repeat * 1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=30)
+    args = ap.parse_args()
+    print(f"{'fixture':<28}{'KB':>6}{'bs4 ms':>9}{'fast ms':>9}{'speedup':>9}  match")
+    tot_old = tot_new = 0
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        html = open(path, encoding="utf-8").read()
+        old, new = bench(parse_bs4, html, args.repeat), bench(parse_fast, html, args.repeat)
+        tot_old += old; tot_new += new
+        match = parse_bs4(html) == parse_fast(html)
+        print(f"{os.path.basename(path):<28}{len(html.encode()) // 1024:>6}{old:>9.2f}{new:>9.2f}{old / new:>8.1f}x  {match}")
+    print(f"{'total':<34}{tot_old:>9.2f}{tot_new:>9.2f}{tot_old / tot_new:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from fake_ga4 import FakeGA4Client
+from stub_server import StubArticleServer
+from cnc_article_store import ArticleStore
+from cnc_crawler import ArticleCrawler
+from cnc_feed import FeedExtractor, FeedIndex
+from cnc_report import INDEX_FIELDS, build_weekly_report, get_sunday_to_saturday_ranges
+
+# ----------------- 전체 기사 색인: 기사 페이지 크롤링 vs 사이트맵/RSS 일괄 수집 -----------------
+# 저장된 목록(bench/fixtures/feeds)을 로컬 스텁 서버에서 /rss/allArticle.xml, /sitemap.xml 로 내보내고
+# 빈 기사 저장소에서 전체 기사 색인(articles 섹션)을 만들 때의 HTTP 요청 수/시간을 비교한다.
+# - crawl: 기사마다 페이지를 받는다 (feeds=None)
+# - feed:  목록에 작성자/카테고리/세부카테고리가 다 있는 기사는 목록 값으로 채우고 나머지만 크롤링
+# 목록으로 채운 값이 기사 페이지에서 읽은 값과 같은지도 확인한다.
+# 사용법: python bench/bench_feed.py --latency 0.05
+FEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "feeds")
+FEED_URLS = {"allArticle.xml": "/rss/allArticle.xml", "sitemap.xml": "/sitemap.xml"}
+COMPARE_FIELDS = INDEX_FIELDS + ("pub_date",)
+
+def build_index(srv, client, feeds):
+    store = ArticleStore(":memory:")
+    crawler = ArticleCrawler(base_url=srv.base_url)
+    week_map = get_sunday_to_saturday_ranges()
+    try:
+        srv.reset_stats()
+        t = time.perf_counter()
+        report = build_weekly_report(client, "bench", week_map, list(week_map)[0], store, crawler, sections=['articles'], index_crawl_limit=None,
+                                     feeds=FeedIndex(crawler) if feeds else None)
+        sec = time.perf_counter() - t
+        records, _ = store.lookup(report['df_articles']['pagePath'].tolist(), need_dynamic=False)
+        return sec, srv.stats['requests'], len(report['df_articles']), records
+    finally:
+        crawler.close()
+        store.close()
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=60, help="GA4 가 돌려줄 기사 경로 수")
+    ap.add_argument("--latency", type=float, default=0.05, help="스텁 서버 응답 지연(초)")
+    ap.add_argument("--repeat", type=int, default=200, help="목록 파싱 반복 횟수")
+    args = ap.parse_args()
+
+    pages = {}
+    for path in glob.glob(os.path.join(FEED_DIR, "*.xml")):
+        with open(path, encoding="utf-8") as f: pages[FEED_URLS[os.path.basename(path)]] = f.read()
+
+    # 목록 파싱 (8KB 조각 단위, 크롤러가 넘기는 방식)
+    for url, text in pages.items():
+        t = time.perf_counter()
+        for _ in range(args.repeat):
+            ex = FeedExtractor()
+            for i in range(0, len(text), 8192): ex.feed(text[i:i + 8192])
+            ex.close()
+        ms = (time.perf_counter() - t) / args.repeat * 1000
+        print(f"parse {url:<22}{len(ex.result()):>5} items {ms:>8.2f} ms")
+
+    with StubArticleServer(latency=args.latency, pages=pages) as srv:
+        client = FakeGA4Client(rows=args.rows)
+        rows = {mode: build_index(srv, client, mode == "feed") for mode in ("crawl", "feed")}
+
+    print(f"{'mode':<7}{'articles':>9}{'requests':>10}{'sec':>8}")
+    for mode, (sec, requests, n, _) in rows.items(): print(f"{mode:<7}{n:>9}{requests:>10}{sec:>8.2f}")
+    crawled, fed = rows["crawl"][3], rows["feed"][3]
+    diff = [p for p in crawled if any(crawled[p].get(f) != fed.get(p, {}).get(f) for f in COMPARE_FIELDS)]
+    print(f"목록 값과 페이지 값이 다른 기사: {len(diff)}" + (f" (예: {diff[0]})" if diff else ""))
+
+if __name__ == "__main__":
+    main()
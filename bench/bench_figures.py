@@ -0,0 +1,79 @@
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import StubArticleServer
+
+# ----------------- 재실행 지연 벤치마크: Plotly 차트 캐시 켜기/끄기 -----------------
+# cncnews_ww5 를 streamlit AppTest 로 인쇄 모드(차트 15개)에서 띄우고, 데이터는 캐시에 있는 상태로
+# 같은 화면을 --reruns 번 다시 실행해 st 스크립트 한 번 실행 시간을 잰다. 모드마다 새 프로세스(spawn)에서 돈다.
+# - off: CNC_FIGURE_CACHE=off (매번 px.* 로 새로 만듦, 기존 동작)
+# - on:  첫 실행은 다른 프로세스가 디스크 캐시에 남긴 figure JSON 을 읽고 (레플리카/재시작 후),
+#        재실행부터는 프로세스 안 Figure 캐시를 쓴다 (같은 세션의 재실행/다른 세션)
+# 사용법: python bench/bench_figures.py --reruns 20
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cncnews_ww5.py")
+
+def app_worker(mode, cache_dir, base_url, reruns, out):
+    os.environ['CNC_NEWS_BASE_URL'] = base_url
+    os.environ['CNC_CACHE_URL'] = f"disk://{cache_dir}"
+    os.environ['CNC_ARTICLE_DB'] = os.path.join(cache_dir, "articles.sqlite3")
+    os.environ['CNC_SNAPSHOT_DIR'] = os.path.join(cache_dir, "snapshots")
+    os.environ['CNC_FIGURE_CACHE'] = mode
+    os.environ['STREAMLIT_LOGGER_LEVEL'] = "error"
+    import google.analytics.data_v1beta as ga
+    from google.oauth2 import service_account
+    from fake_ga4 import FakeGA4Client
+    from streamlit.testing.v1 import AppTest
+
+    client = FakeGA4Client(rows=30)
+    ga.BetaAnalyticsDataClient = lambda credentials=None: client
+    service_account.Credentials.from_service_account_info = staticmethod(lambda info: object())
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets['ga4_credentials'] = {'x': 1}
+    at.session_state['password_correct'] = True
+    at.session_state['print_mode'] = True
+    times = []
+    for _ in range(reruns + 1):
+        t = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t)
+    if at.exception: raise RuntimeError(at.exception[0].value)
+    # 첫 실행(프로세스 시작 직후)은 재실행과 따로 본다
+    out.put({"mode": mode, "first": times[0], "times": times[1:], "charts": len(at.get("plotly_chart")),
+             "ga4_reports": client.report_count})
+
+def run(mode, cache_dir, base_url, reruns):
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    p = ctx.Process(target=app_worker, args=(mode, cache_dir, base_url, reruns, out))
+    p.start()
+    r = out.get()
+    p.join()
+    return r
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reruns", type=int, default=20, help="재실행 횟수")
+    args = ap.parse_args()
+
+    rows = []
+    with StubArticleServer() as srv, tempfile.TemporaryDirectory(prefix="cnc-fig-") as tmp:
+        # 모드마다 같은 데이터 캐시에서 시작하도록 먼저 한 번 채운다 (이때 차트 JSON 도 디스크 캐시에 들어감)
+        run("on", tmp, srv.base_url, 0)
+        for mode in ("off", "on"):
+            rows.append(run(mode, tmp, srv.base_url, args.reruns))
+
+    print(f"{'mode':<6}{'charts':>8}{'ga4':>6}{'first ms':>10}{'reruns':>8}{'p50 ms':>9}{'mean ms':>9}{'max ms':>9}")
+    for r in rows:
+        ms = [t * 1000 for t in r["times"]]
+        print(f"{r['mode']:<6}{r['charts']:>8}{r['ga4_reports']:>6}{r['first'] * 1000:>10.1f}{len(ms):>8}"
+              f"{statistics.median(ms):>9.1f}{statistics.mean(ms):>9.1f}{max(ms):>9.1f}")
+
+if __name__ == "__main__":
+    main()
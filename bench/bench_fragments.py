@@ -0,0 +1,102 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import StubArticleServer
+
+# ----------------- 상호작용별 스크립트 실행 시간: 전체 재실행 vs fragment 재실행 -----------------
+# cncnews_ww5 를 streamlit AppTest 로 띄우고 (데이터 캐시는 미리 채움) 화면 조작마다
+# - full:     스크립트 전체를 위에서부터 다시 실행 (fragment 도입 전 동작. 상호작용마다 이만큼 걸렸다)
+# - fragment: 그 조작이 다시 실행하는 fragment 만 실행 (브라우저에서 위젯을 눌렀을 때와 같은 요청)
+# 의 실행 시간을 잰다. AppTest.run 은 항상 전체를 실행하므로 fragment 실행은 RerunData 에 fragment_id_queue 를 넣어 흉내 낸다.
+# 사용법: python bench/bench_fragments.py --repeat 5
+#         python bench/bench_fragments.py --app /tmp/cncnews_ww5_old.py   # fragment 가 없는 이전 버전 (full 만)
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cncnews_ww5.py")
+
+# 조작 이름 -> (조작 전 상태, 조작 후 상태, 다시 실행되는 fragment key)
+def interactions(weeks):
+    normal = {'print_mode': False, 'week_select': weeks[0], 'report_tab': "1.성과요약"}
+    return {
+        "탭 전환 (1 -> 4)": (normal, dict(normal, report_tab="4.Top10상세"), "report_tabs"),
+        "주차 변경": (normal, dict(normal, week_select=weeks[1]), "dashboard"),
+        "인쇄 미리보기": (normal, dict(normal, print_mode=True), "dashboard"),
+        "대시보드로 복귀": (dict(normal, print_mode=True), normal, "dashboard"),
+        "인쇄 실행": (dict(normal, print_mode=True), dict(normal, print_mode=True), "print_button"),
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5, help="조작마다 반복 횟수")
+    ap.add_argument("--app", default=APP, help="잴 스크립트 경로")
+    args = ap.parse_args()
+
+    with StubArticleServer() as srv, tempfile.TemporaryDirectory(prefix="cnc-frag-") as tmp:
+        os.environ['CNC_NEWS_BASE_URL'] = srv.base_url
+        os.environ['CNC_CACHE_URL'] = f"disk://{tmp}"
+        os.environ['CNC_ARTICLE_DB'] = os.path.join(tmp, "articles.sqlite3")
+        os.environ['CNC_SNAPSHOT_DIR'] = os.path.join(tmp, "snapshots")
+        os.environ['STREAMLIT_LOGGER_LEVEL'] = "error"
+        import google.analytics.data_v1beta as ga
+        from google.oauth2 import service_account
+        from fake_ga4 import FakeGA4Client
+        from streamlit.errors import StreamlitAPIException
+        from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+        from streamlit.testing.v1 import AppTest
+        import streamlit.testing.v1.local_script_runner as local_script_runner
+        from cnc_report import get_sunday_to_saturday_ranges
+
+        client = FakeGA4Client(rows=30)
+        ga.BetaAnalyticsDataClient = lambda credentials=None: client
+        service_account.Credentials.from_service_account_info = staticmethod(lambda info: object())
+        # fragment_ids 가 있으면 그 fragment 만 다시 실행하는 요청으로 바꾼다
+        fragment_ids = []
+        def rerun_data(**kw):
+            if fragment_ids: kw.update(fragment_id_queue=list(fragment_ids), is_fragment_scoped_rerun=True)
+            return RerunData(**kw)
+        local_script_runner.RerunData = rerun_data
+
+        at = AppTest.from_file(os.path.abspath(args.app), default_timeout=120)
+        at.secrets['ga4_credentials'] = {'x': 1}
+        at.session_state['password_correct'] = True
+
+        def run(state, fragment=None):
+            for k, v in state.items(): at.session_state[k] = v
+            fragment_ids[:] = at._fragment_storage.resolve_target(fragment) if fragment else []
+            t = time.perf_counter()
+            at.run()
+            sec = time.perf_counter() - t
+            fragment_ids.clear()
+            if at.exception: raise RuntimeError(at.exception[0].value)
+            return sec
+
+        todo = interactions(list(get_sunday_to_saturday_ranges()))
+        # 데이터/차트 캐시 채우기
+        for before, after, _ in todo.values():
+            run(before)
+            run(after)
+
+        print(f"{'조작':<14}{'fragment':>14}{'full ms':>10}{'fragment ms':>13}{'x':>7}")
+        for name, (before, after, fragment) in todo.items():
+            full, frag = [], []
+            for _ in range(args.repeat):
+                run(before)
+                full.append(run(after))
+                run(before)
+                # 이전 버전처럼 fragment 가 없으면 full 만
+                try: at._fragment_storage.resolve_target(fragment)
+                except StreamlitAPIException: continue
+                frag.append(run(after, fragment))
+            f = statistics.median(full) * 1000
+            if not frag:
+                print(f"{name:<14}{'-':>14}{f:>10.1f}{'-':>13}{'-':>7}")
+                continue
+            g = statistics.median(frag) * 1000
+            print(f"{name:<14}{fragment:>14}{f:>10.1f}{g:>13.1f}{f / g:>7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import StubArticleServer
+
+# ----------------- 동시 접속 부하 테스트: 같은 주차 콜드 로드의 single-flight -----------------
+# 월요일 아침처럼 여러 세션이 동시에 같은 주차를 처음 여는 상황을 흉내 낸다.
+# --procs 개의 프로세스(레플리카)가 각각 --sessions 개의 스레드(세션)를 띄우고,
+# 모두 같은 시각에 cncnews_ww5 와 같은 경로(cache.get_or_set -> build_weekly_report)로 데이터를 요청한다.
+# - naive:     세션마다 직접 집계 (coalescing 없음, 기존 동작)
+# - coalesced: DiskCache.get_or_set (프로세스 안은 SingleFlight, 프로세스 사이는 잠금 파일)
+# 사용법: python bench/bench_singleflight.py --procs 4 --sessions 25 --latency 0.3
+def session_worker(mode, cache_dir, base_url, sessions, latency, start_at, out):
+    os.environ['CNC_NEWS_BASE_URL'] = base_url
+    from fake_ga4 import FakeGA4Client
+    from cnc_article_store import ArticleStore
+    from cnc_cache import DiskCache, make_key
+    from cnc_crawler import ArticleCrawler
+    from cnc_report import build_weekly_report, get_sunday_to_saturday_ranges
+
+    client = FakeGA4Client(rows=30, latency=latency)
+    store, crawler = ArticleStore(":memory:"), ArticleCrawler(base_url=base_url)
+    cache = DiskCache(cache_dir)
+    week_map = get_sunday_to_saturday_ranges()
+    week = list(week_map)[0]
+    key = make_key("weekly_report", "bench", week_map[week], week_map)
+    waits, progress_updates = [], [0]
+    lock = threading.Lock()
+
+    def one():
+        def on_progress(frac, msg, waiting):
+            with lock: progress_updates[0] += 1
+        time.sleep(max(0.0, start_at - time.time()))
+        t = time.perf_counter()
+        if mode == "naive":
+            build_weekly_report(client, "bench", week_map, week, store, crawler)
+        else:
+            cache.get_or_set(key, lambda progress: build_weekly_report(client, "bench", week_map, week, store, crawler, None, progress),
+                             on_progress=on_progress)
+        with lock: waits.append(time.perf_counter() - t)
+
+    threads = [threading.Thread(target=one) for _ in range(sessions)]
+    for th in threads: th.start()
+    for th in threads: th.join()
+    crawler.close()
+    out.put({"waits": waits, "ga4_reports": client.report_count, "progress_updates": progress_updates[0]})
+
+def run(mode, procs, sessions, latency, srv):
+    cache_dir = tempfile.mkdtemp(prefix="cnc-sf-")
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    srv.reset_stats()
+    start_at = time.time() + 3.0
+    workers = [ctx.Process(target=session_worker, args=(mode, cache_dir, srv.base_url, sessions, latency, start_at, out)) for _ in range(procs)]
+    for w in workers: w.start()
+    results = [out.get() for _ in workers]
+    for w in workers: w.join()
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    waits = sorted(x for r in results for x in r["waits"])
+    return {
+        "mode": mode, "sessions": len(waits), "ga4_reports": sum(r["ga4_reports"] for r in results),
+        "http_requests": srv.stats["requests"], "progress_updates": sum(r["progress_updates"] for r in results),
+        "p50": statistics.median(waits), "p95": waits[int(len(waits) * 0.95) - 1], "max": waits[-1],
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--procs", type=int, default=4, help="프로세스(레플리카) 수")
+    ap.add_argument("--sessions", type=int, default=25, help="프로세스당 동시 세션 수")
+    ap.add_argument("--latency", type=float, default=0.3, help="GA4 요청당 지연(초)")
+    ap.add_argument("--http-latency", type=float, default=0.05, help="기사 페이지 응답 지연(초)")
+    ap.add_argument("--modes", default="naive,coalesced")
+    args = ap.parse_args()
+
+    rows = []
+    with StubArticleServer(latency=args.http_latency) as srv:
+        for mode in args.modes.split(','):
+            rows.append(run(mode, args.procs, args.sessions, args.latency, srv))
+
+    print(f"{'mode':<11}{'sessions':>9}{'ga4 reps':>9}{'http':>7}{'progress':>9}{'p50 s':>8}{'p95 s':>8}{'max s':>8}")
+    for r in rows:
+        print(f"{r['mode']:<11}{r['sessions']:>9}{r['ga4_reports']:>9}{r['http_requests']:>7}{r['progress_updates']:>9}"
+              f"{r['p50']:>8.2f}{r['p95']:>8.2f}{r['max']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from importlib import metadata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stub_server import StubArticleServer
+
+# ----------------- 성능 회귀 확인용 벤치마크 모음 -----------------
+# 실제 GA4/기사 사이트 없이 매번 같은 조건으로 잴 수 있게
+# - GA4: fake_ga4.FakeGA4Client (seed 로 값이 정해지는 가짜 BetaAnalyticsDataClient, --rows 로 리포트 크기)
+# - 기사 사이트: stub_server.StubArticleServer (기사 페이지 + bench/fixtures/feeds 의 RSS/사이트맵)
+# 을 쓰고, 리포트 크기(--rows)마다 새 프로세스(spawn)에서 아래를 --repeat 번씩 잰다.
+# - ww5.load_all_dashboard_data: cold (공유 캐시/기사 저장소/차트 캐시를 비운 뒤 직접 집계), shared_cache (공유 캐시 적중), session (세션 보관본)
+# - ww5.render_*: 인쇄 모드에 놓이는 화면 조각마다 (차트 캐시를 비운 상태)
+# - ww4.load_full_data: cold / cached (st.cache_data)
+# - ww4.render_*
+# - 스크립트 전체 실행 (AppTest.run): ww5 탭 화면 / 인쇄 미리보기, ww4 — first (캐시를 비운 새 세션), rerun (같은 세션을 두 번 더 실행했을 때 두 번째)
+# 함수는 AppTest 스크립트 안에서 한 번 실행에 한 번씩 불러 st.* 가 실제 실행처럼 화면 요소를 만든다 (차트 key 가 겹치지 않게).
+# 결과는 --out JSON (커밋/환경/설정, 크기별 GA4 리포트/HTTP 요청 수, 항목별 실행 시간 목록과 min/median/mean/max) 으로 남기고,
+# --compare 로 이전 결과 파일과 중앙값을 비교해 --threshold 이상 느려진 항목을 표시한다.
+# 사용법: python bench/bench_suite.py --rows 10000 100000 --repeat 3
+#         python bench/bench_suite.py --rows 10000 --compare bench/results/abc1234.json
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = {"ww5": os.path.join(ROOT, "cncnews_ww5.py"), "ww4": os.path.join(ROOT, "CNC_Dashboard_WW4.py")}
+FEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "feeds")
+FEED_URLS = {"allArticle.xml": "/rss/allArticle.xml", "sitemap.xml": "/sitemap.xml"}
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SUITE_VERSION = 1
+# 중앙값 차이가 이보다 작으면 비율이 커도 느려진 것으로 보지 않는다 (초. 1ms 안팎 항목의 잡음)
+NOISE_FLOOR = 0.005
+PACKAGES = ("pandas", "numpy", "plotly", "streamlit", "google-analytics-data", "aiohttp")
+
+# AppTest.from_function 으로 띄우는 스크립트: 실행할 때마다 job['fn']() 을 부른다
+def in_script(job):
+    job['fn']()
+
+def git_version():
+    def git(*args):
+        try: return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError): return ""
+    return {"rev": git("rev-parse", "HEAD") or None, "subject": git("log", "-1", "--format=%s") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def environment():
+    packages = {}
+    for name in PACKAGES:
+        try: packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError: packages[name] = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(), "packages": packages}
+
+def summarize(times):
+    return {"min": min(times), "median": statistics.median(times), "mean": statistics.mean(times), "max": max(times), "runs": times}
+
+def size_worker(rows, base_url, repeat, ga4_latency, out):
+    tmp = tempfile.mkdtemp(prefix="cnc-suite-")
+    cache_dir, db_path = os.path.join(tmp, "cache"), os.path.join(tmp, "articles.sqlite3")
+    os.environ['CNC_NEWS_BASE_URL'] = base_url
+    os.environ['CNC_CACHE_URL'] = f"disk://{cache_dir}"
+    os.environ['CNC_ARTICLE_DB'] = db_path
+    os.environ['CNC_SNAPSHOT_DIR'] = os.path.join(tmp, "snapshots")
+    import runpy
+    import google.analytics.data_v1beta as ga
+    import streamlit as st
+    import streamlit.logger
+    from streamlit import config
+    from google.oauth2 import service_account
+    from fake_ga4 import FakeGA4Client
+    from streamlit.testing.v1 import AppTest
+
+    # 폐기 예정 인자 경고 등이 결과를 덮지 않게. 설정을 처음 읽을 때 로그 수준을 다시 정하므로 읽은 뒤에 바꾼다
+    # (STREAMLIT_LOGGER_LEVEL 환경 변수는 streamlit run 으로 띄울 때만 읽는다)
+    config.get_config_options()
+    streamlit.logger.set_log_level("error")
+    client = FakeGA4Client(rows=rows, latency=ga4_latency)
+    ga.BetaAnalyticsDataClient = lambda credentials=None: client
+    service_account.Credentials.from_service_account_info = staticmethod(lambda info: object())
+    results, ns = {}, {}
+
+    def new_app(at, **state):
+        at.secrets['ga4_credentials'] = {'x': 1}
+        at.session_state['password_correct'] = True
+        for k, v in state.items(): at.session_state[k] = v
+        return at
+
+    def run(at):
+        t = time.perf_counter()
+        at.run()
+        sec = time.perf_counter() - t
+        if at.exception: raise RuntimeError(at.exception[0].value)
+        return sec
+
+    # cold: 공유 캐시(디스크), 기사 저장소, st.cache_data, 프로세스 안 차트 캐시를 비운다 (스냅샷은 처음부터 없다)
+    # cache_resource 는 앱 스크립트와 같은 객체를 돌려주므로 앞서 읽어 둔 ww5 네임스페이스로 찾는다
+    def reset():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.makedirs(cache_dir)
+        with contextlib.closing(sqlite3.connect(db_path)) as conn, conn: conn.execute("DELETE FROM articles")
+        st.cache_data.clear()
+        clear_figures()
+
+    def clear_figures():
+        figures = ns['ww5']['get_figure_cache']()
+        if figures is not None: figures.clear()
+
+    # 스크립트 안에서 fn() 을 한 번 실행 -> (걸린 시간, 결과). before() 는 시간에 넣지 않는다
+    job = {}
+    script = new_app(AppTest.from_function(in_script, args=(job,), default_timeout=600))
+    def call(fn, before=None):
+        def timed():
+            if before: before()
+            t = time.perf_counter()
+            job['result'] = fn()
+            job['sec'] = time.perf_counter() - t
+        job['fn'] = timed
+        run(script)
+        return job['sec'], job['result']
+
+    def record(name, times):
+        results[name] = summarize(times)
+        print(f"  {rows:>7} {name:<46}{results[name]['median'] * 1000:>10.1f} ms", flush=True)
+
+    # 처음 한 번은 재지 않는다 (plotly 템플릿 등 처음 쓸 때만 드는 비용)
+    def measure(name, fn, setup=None, before=None):
+        times = []
+        for _ in range(repeat + 1):
+            if setup: setup()
+            times.append(call(fn, before)[0])
+        record(name, times[1:])
+
+    # ww5 함수 (앱 스크립트를 한 번 실행해 함수들을 얻는다. 피드 목록은 cold 마다 다시 받도록)
+    g = ns['ww5'] = call(lambda: runpy.run_path(APPS['ww5'], run_name="__main__"))[1]
+    g['get_feed_index']().refresh = 0
+    week = list(g['WEEK_MAP'])[0]
+    load = lambda: g['load_all_dashboard_data'](week)
+    forget = lambda: st.session_state.pop('loaded_reports', None)
+    measure("ww5.load_all_dashboard_data/cold", load, setup=reset, before=forget)
+    measure("ww5.load_all_dashboard_data/shared_cache", load, before=forget)
+    measure("ww5.load_all_dashboard_data/session", load)
+    report = call(load)[1]
+    # 렌더링 함수와 그 인자(보고서 키)는 인쇄 모드 화면에 놓이는 자리에서 가져온다
+    def print_view():
+        view = g['new_report_view']()
+        g['layout_print'](view)
+        return view
+    view = call(print_view)[1]
+    for _, fields, render, _ in view['slots']:
+        args = [report.get(f) for f in fields]
+        measure(f"ww5.{render.__name__}", lambda: render(*args), setup=clear_figures, before=st.cache_data.clear)
+
+    # ww4 함수
+    g4 = call(lambda: runpy.run_path(APPS['ww4'], run_name="__main__"))[1]
+    week4 = list(g4['WEEK_MAP'])[0]
+    load4 = lambda: g4['load_full_data'](week4)
+    measure("ww4.load_full_data/cold", load4, setup=reset)
+    measure("ww4.load_full_data/cached", load4)
+    uv, pv, nu, df_daily, df_act, df_pub, df_cat, rc, rl = call(load4)[1]
+    measure("ww4.render_kpis", lambda: g4['render_kpis'](pv, uv, nu, len(df_act)))
+    measure("ww4.render_top10", lambda: g4['render_top10'](df_act.copy(), df_pub.copy()))
+    measure("ww4.render_charts", lambda: g4['render_charts'](df_cat, rc, rl))
+
+    # 스크립트 전체 실행: 캐시를 비운 새 세션의 첫 실행, 같은 세션의 재실행
+    # 첫 실행에서 마감까지 못 가져온 기사가 있으면 다음 실행이 다시 집계하므로, 한 번 더 실행한 뒤의 재실행을 잰다
+    for name, app, state in (("ww5.script/tabs", "ww5", {}), ("ww5.script/print", "ww5", {'print_mode': True}), ("ww4.script", "ww4", {})):
+        first, rerun = [], []
+        for _ in range(repeat):
+            reset()
+            at = new_app(AppTest.from_file(APPS[app], default_timeout=600), **state)
+            first.append(run(at))
+            run(at)
+            rerun.append(run(at))
+        record(f"{name}/first", first)
+        record(f"{name}/rerun", rerun)
+
+    shutil.rmtree(tmp, ignore_errors=True)
+    out.put({"benchmarks": results, "ga4_reports": client.report_count})
+
+def run_size(rows, srv, repeat, ga4_latency):
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    srv.reset_stats()
+    p = ctx.Process(target=size_worker, args=(rows, srv.base_url, repeat, ga4_latency, out))
+    p.start()
+    # 워커가 도중에 죽으면 (앱 스크립트 예외 등. 트레이스백은 워커가 stderr 에 남긴다) 더 기다리지 않는다
+    while True:
+        with contextlib.suppress(Exception): return {**out.get(timeout=5), "http_requests": srv.stats['requests']}
+        if not p.is_alive(): raise RuntimeError(f"rows={rows} 측정이 실패했습니다 (exit code {p.exitcode})")
+
+# 이전 결과와 크기별 중앙값 비교 -> 느려진 항목 수
+def compare(base, cur, threshold):
+    print(f"\n비교 기준: {(base['git'].get('rev') or '?')[:10]} {base['git'].get('subject') or ''}")
+    print(f"{'rows':>7} {'benchmark':<46}{'before ms':>11}{'after ms':>11}{'x':>7}")
+    slower = 0
+    for size, cur_size in cur['sizes'].items():
+        base_size = base['sizes'].get(size, {}).get('benchmarks', {})
+        for name, r in cur_size['benchmarks'].items():
+            if name not in base_size: continue
+            b, a = base_size[name]['median'], r['median']
+            ratio = a / b if b else float('inf')
+            flag = "  느려짐" if ratio > 1 + threshold and a - b > NOISE_FLOOR else ""
+            slower += bool(flag)
+            print(f"{size:>7} {name:<46}{b * 1000:>11.1f}{a * 1000:>11.1f}{ratio:>7.2f}{flag}")
+    return slower
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10000, 100000], help="GA4 리포트 크기 (행 수). 크기마다 따로 잰다")
+    ap.add_argument("--repeat", type=int, default=3, help="항목마다 반복 횟수")
+    ap.add_argument("--latency", type=float, default=0.0, help="스텁 기사 서버 응답 지연(초)")
+    ap.add_argument("--ga4-latency", type=float, default=0.0, help="가짜 GA4 요청당 지연(초)")
+    ap.add_argument("--out", help="결과 JSON 경로 (기본: bench/results/<커밋>.json)")
+    ap.add_argument("--compare", help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=0.2, help="중앙값이 이 비율 이상 늘면 느려진 것으로 표시")
+    args = ap.parse_args()
+
+    pages = {}
+    for path in glob.glob(os.path.join(FEED_DIR, "*.xml")):
+        with open(path, encoding="utf-8") as f: pages[FEED_URLS[os.path.basename(path)]] = f.read()
+
+    git = git_version()
+    result = {"suite": SUITE_VERSION, "at": datetime.now().isoformat(timespec="seconds"), "git": git, "environment": environment(),
+              "config": {"repeat": args.repeat, "latency": args.latency, "ga4_latency": args.ga4_latency}, "sizes": {}}
+    with StubArticleServer(latency=args.latency, pages=pages) as srv:
+        for rows in args.rows:
+            print(f"rows={rows}", flush=True)
+            result["sizes"][str(rows)] = run_size(rows, srv, args.repeat, args.ga4_latency)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{(git['rev'] or 'unknown')[:10]}{'-dirty' if git['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=1)
+    print(f"결과: {out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f: base = json.load(f)
+        slower = compare(base, result, args.threshold)
+        if slower: print(f"{slower}개 항목이 {args.threshold:.0%} 이상 느려졌습니다")
+
+if __name__ == "__main__":
+    main()
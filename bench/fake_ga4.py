@@ -0,0 +1,113 @@
+import math
+import random
+import threading
+import time
+
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsResponse, DimensionHeader, DimensionValue, MetricHeader, MetricType, MetricValue, Row, RunReportRequest, RunReportResponse
+)
+
+# ----------------- 벤치마크용 가짜 GA4 클라이언트 -----------------
+# BetaAnalyticsDataClient 의 run_report / batch_run_reports 와 같은 모양의 응답을 만든다.
+# 같은 seed/rows 면 항상 같은 값이 나온다 (행마다 seed 로 만든 난수).
+# - rows: 차원이 있는 리포트의 (기간별) 전체 행 수. offset/limit 으로 페이지를 나눠 돌려준다.
+#         값이 몇 개로 정해진 차원(매체, 지역, 날짜 등)만 있는 리포트는 그 조합 수까지만 (실제 GA4 처럼 일별 리포트는 7행)
+#         pagePath 같은 차원이 있으면 rows 행: 경로마다 정해진 차원 값 조합이 한 벌씩 붙는다 (경로 x 매체 등)
+# - dimension_filter 의 in_list 조건은 그 값들만 돌려준다 (TOP 10 기사의 시간대별 조회 등)
+# - latency: 요청 하나당 지연(초). batch 는 묶음당 한 번.
+# - calls: [('run' | 'batch', 리포트 수), ...] 호출 기록
+# 10만 행 응답을 만드는 시간이 측정에 섞이지 않도록 같은 요청의 응답은 직렬화한 바이트로 기억해 두고,
+# 호출마다 실제 클라이언트처럼 바이트에서 다시 읽는다.
+FLOAT_METRICS = {'bounceRate', 'userEngagementDuration'}
+DIM_VALUES = {
+    'sessionSource': ['google', 'naver', '(direct)', 'daum', 'facebook', 'bing'],
+    'region': ['Seoul', 'Busan', 'Gyeonggi-do', 'Incheon', '(not set)'],
+    'userAgeBracket': ['18-24', '25-34', '35-44', '45-54', 'unknown'],
+    'userGender': ['male', 'female', 'unknown'],
+}
+
+def dimension_value(dim, i):
+    if dim in DIM_VALUES: return DIM_VALUES[dim][i % len(DIM_VALUES[dim])]
+    if dim == 'pagePath': return f'/news/articleView.html?idxno={1000 + i}'
+    if dim == 'pageTitle': return f'기사 제목 {i}'
+    if dim == 'date': return f'202610{4 + i % 7:02d}'
+    if dim == 'dateHour': return f'202610{4 + i // 24 % 7:02d}{i % 24:02d}'
+    return f'{dim}{i}'
+
+# 값이 몇 개로 정해진 차원 -> 값 목록 (행마다 다른 값이 나오는 차원은 None)
+def dimension_values(dim):
+    if dim in DIM_VALUES: return DIM_VALUES[dim]
+    if dim == 'date': return [dimension_value(dim, i) for i in range(7)]
+    if dim == 'dateHour': return [dimension_value(dim, i) for i in range(7 * 24)]
+    return None
+
+# dimension_filter -> {차원: [값, ...]} (in_list 조건만, and_group 은 펼친다)
+def in_list_filters(expr):
+    if expr is None: return {}
+    if expr.and_group.expressions: return {k: v for e in expr.and_group.expressions for k, v in in_list_filters(e).items()}
+    f = expr.filter
+    return {f.field_name: list(f.in_list_filter.values)} if f.field_name and f.in_list_filter.values else {}
+
+class FakeGA4Client:
+    def __init__(self, rows=30, latency=0.0, seed=0):
+        self.rows = rows
+        self.latency = latency
+        self.seed = seed
+        self.calls = []
+        self._lock = threading.Lock()
+        self._memo = {}
+
+    # 요청 -> RunReportResponse 의 protobuf 메시지 (같은 요청이면 기억해 둔 바이트에서 읽는다)
+    def _response_pb(self, request):
+        key = RunReportRequest.serialize(request)
+        with self._lock: data = self._memo.get(key)
+        if data is None:
+            data = self._build(request).SerializeToString()
+            with self._lock: self._memo[key] = data
+        return RunReportResponse.pb().FromString(data)
+
+    def _build(self, request):
+        dims = [d.name for d in request.dimensions]
+        mets = [m.name for m in request.metrics]
+        ranges = list(request.date_ranges)
+        multi = len(ranges) > 1
+        filters = in_list_filters(request.dimension_filter if "dimension_filter" in request else None)
+        values = [filters.get(d) or dimension_values(d) for d in dims]
+        # 정해진 값들의 조합 수. 행 번호 i -> 조합 (i % combos), 나머지 차원 값은 i // combos 번째
+        combos = math.prod(len(v) for v in values if v is not None)
+        n = (self.rows if None in values else min(self.rows, combos)) if dims else 1
+        total = n * len(ranges)
+        start, stop = request.offset, min(total, request.offset + (request.limit or 10000))
+        pb_row, pb_dim, pb_met = Row.pb(), DimensionValue.pb(), MetricValue.pb()
+        rows = []
+        for j in range(start, stop):
+            i, dr = j % n, ranges[j // n]
+            rng = random.Random(f"{self.seed}:{dr.start_date}:{dims}:{i}")
+            k, dv = i % combos, []
+            for d, v in zip(dims, values):
+                if v is None:
+                    dv.append(pb_dim(value=dimension_value(d, i // combos)))
+                else:
+                    dv.append(pb_dim(value=v[k % len(v)]))
+                    k //= len(v)
+            if multi: dv.append(pb_dim(value=dr.name or f'date_range_{j // n}'))
+            mv = [pb_met(value=f'{rng.random() * 100:.3f}' if m in FLOAT_METRICS else str(rng.randint(1, 1000))) for m in mets]
+            rows.append(pb_row(dimension_values=dv, metric_values=mv))
+        return RunReportResponse.pb()(
+            dimension_headers=[DimensionHeader.pb()(name=d) for d in dims + (['dateRange'] if multi else [])],
+            metric_headers=[MetricHeader.pb()(name=m, type_=MetricType.TYPE_FLOAT if m in FLOAT_METRICS else MetricType.TYPE_INTEGER) for m in mets],
+            rows=rows, row_count=total)
+
+    def run_report(self, request):
+        with self._lock: self.calls.append(('run', 1))
+        if self.latency: time.sleep(self.latency)
+        return RunReportResponse.wrap(self._response_pb(request))
+
+    def batch_run_reports(self, request):
+        with self._lock: self.calls.append(('batch', len(request.requests)))
+        if self.latency: time.sleep(self.latency)
+        return BatchRunReportsResponse.wrap(BatchRunReportsResponse.pb()(reports=[self._response_pb(r) for r in request.requests]))
+
+    @property
+    def report_count(self):
+        with self._lock: return sum(n for _, n in self.calls)
@@ -0,0 +1,103 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----------------- 벤치마크용 로컬 기사 서버 -----------------
+# 실제 cooknchefnews.com 과 비슷한 구조의 기사 페이지를 돌려준다.
+# HTTP/1.1 keep-alive 를 지원하고, 받은 연결 수/요청 수를 기록해 커넥션 재사용을 확인할 수 있다.
+BODY_PARAGRAPH = "<p>쿡앤셰프 뉴스 본문 단락입니다. 외식 업계 동향과 셰프 인터뷰, 레시피 소개가 이어집니다.</p>\n"
+
+def render_article_html(idx, paragraphs=300):
+    return f"""<!DOCTYPE html>
+<html lang="ko"><head><meta charset="utf-8">
+<title>기사 제목 {idx} - 쿡앤셰프</title>
+<meta property="article:section" content="외식">
+</head><body>
+<div id="header"><ul class="gnb"><li><a href="/">홈</a></li><li><a href="/news">뉴스</a></li></ul></div>
+<div class="location"><a href="/">홈</a><a href="/news/articleList.html?sc_section_code=S1N1">뉴스</a><a href="/news/articleList.html?sc_sub_section_code=S2N{idx % 5}">외식 {idx % 5}</a></div>
+<article id="article-view">
+<header class="article-view-header"><h1 class="heading">기사 제목 {idx}</h1>
+<ul class="infomation"><li><span class="user-name">기자{idx % 7} 기자</span></li><li><span class="date">2026-10-{1 + idx % 28:02d} 09:30</span></li></ul>
+</header>
+<div class="article-body">{BODY_PARAGRAPH * paragraphs}</div>
+<div class="sns-like"><span class="sns-like-count">{idx * 3:,}</span></div>
+<div class="comment"><span class="comment-count">{idx % 11}</span></div>
+</article>
+<div id="footer">{'<a href="/news">관련 기사</a>' * 200}</div>
+</body></html>"""
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock: self.server.stats["connections"] += 1
+
+    def do_GET(self):
+        srv = self.server
+        with srv.stats_lock: srv.stats["requests"] += 1
+        latency = srv.slow.get(self.path, srv.latency)
+        if latency: time.sleep(latency)
+        if self.path.startswith("/missing"):
+            status, body = 404, b"not found"
+        else:
+            idx = sum(ord(c) for c in self.path)
+            status, body = 200, (srv.pages.get(self.path) or render_article_html(idx)).encode("utf-8")
+        # 사이트맵/RSS 목록 (pages 에 넣은 .xml 경로)
+        content_type = "application/xml" if self.path.endswith(".xml") else "text/html"
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # 크롤러가 타임아웃으로 먼저 끊은 연결
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+# 기본 listen backlog(5)로는 크롤러가 연결 20개를 한꺼번에 열 때 SYN 이 버려져 1초씩 재전송을 기다린다
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 128
+
+class StubArticleServer:
+    # slow: {경로: 응답 지연(초)} 느린/멈춘 기사 흉내 (그 외 경로는 latency)
+    def __init__(self, latency=0.0, pages=None, slow=None):
+        self.httpd = _Server(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.pages = pages or {}
+        self.httpd.slow = slow or {}
+        self.httpd.stats = {"connections": 0, "requests": 0}
+        self.httpd.stats_lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    # 실행 중에 응답 지연을 바꿀 수 있다 (사이트 장애/복구 흉내)
+    @property
+    def latency(self):
+        return self.httpd.latency
+
+    @latency.setter
+    def latency(self, value):
+        self.httpd.latency = value
+
+    @property
+    def stats(self):
+        return dict(self.httpd.stats)
+
+    def reset_stats(self):
+        with self.httpd.stats_lock: self.httpd.stats.update(connections=0, requests=0)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
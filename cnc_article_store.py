@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+import time
+
+# ----------------- 기사 메타데이터 영구 저장소 (SQLite) -----------------
+# pagePath 기준으로 크롤링 결과를 저장해 캐시 미스마다 같은 기사를 다시 긁지 않도록 한다.
+# - 정적 필드 (제목/작성자/카테고리/세부카테고리/발행일): 발행 후 거의 바뀌지 않으므로 긴 TTL
+# - 동적 필드 (좋아요/댓글): 짧은 TTL
+# - 실패한 경로: 지수 백오프로 네거티브 캐시
+# - 앱마다 저장하는 값의 형식이 다르므로(작성자 정리, 발행일 'YYYY-MM-DD HH:MM' / 'YYYY-MM-DD') 테이블을 따로 쓰고,
+#   행마다 저장 형식 버전(meta_version)을 남겨 다른 버전으로 저장된 행은 없는 것으로 보고 다시 가져온다.
+DEFAULT_DB_PATH = os.environ.get("CNC_ARTICLE_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "articles.sqlite3"))
+STATIC_TTL = 30 * 24 * 3600
+DYNAMIC_TTL = 3600
+FAIL_BACKOFF = 300
+MAX_FAIL_BACKOFF = 24 * 3600
+
+STATIC_FIELDS = ("title", "author", "category", "subcategory", "pub_date")
+DYNAMIC_FIELDS = ("likes", "comments")
+REQUIRED_STATIC_FIELDS = ("author", "category")
+# 기본 테이블(cncnews_ww5 / cnc_report.build_article_meta 형식)과 저장 형식 버전. 값 형식이 바뀌면 META_VERSION 을 올린다
+DEFAULT_TABLE = "articles"
+META_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    path TEXT PRIMARY KEY,
+    title TEXT,
+    author TEXT,
+    category TEXT,
+    subcategory TEXT,
+    pub_date TEXT,
+    static_at REAL,
+    likes INTEGER,
+    comments INTEGER,
+    dynamic_at REAL,
+    fail_count INTEGER NOT NULL DEFAULT 0,
+    retry_at REAL NOT NULL DEFAULT 0,
+    meta_version INTEGER
+)
+"""
+# 예전 스키마로 만든 DB 에 나중에 추가된 열
+ADDED_COLUMNS = {"title": "TEXT", "meta_version": "INTEGER"}
+
+class ArticleStore:
+    def __init__(self, db_path=DEFAULT_DB_PATH, static_ttl=STATIC_TTL, dynamic_ttl=DYNAMIC_TTL,
+                 fail_backoff=FAIL_BACKOFF, max_fail_backoff=MAX_FAIL_BACKOFF, table=DEFAULT_TABLE, meta_version=META_VERSION):
+        self.db_path = db_path
+        self.table = table
+        self.meta_version = meta_version
+        self.static_ttl = static_ttl
+        self.dynamic_ttl = dynamic_ttl
+        self.fail_backoff = fail_backoff
+        self.max_fail_backoff = max_fail_backoff
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if db_path != ":memory:": self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(SCHEMA.format(table=table))
+            existing = {r["name"] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+            for col, typ in ADDED_COLUMNS.items():
+                if col not in existing: self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {typ}")
+
+    def close(self):
+        with self._lock: self._conn.close()
+
+    # paths 중 저장된 레코드와, 새로 가져와야 할 경로 목록을 돌려준다.
+    # static_fields: 호출 측에서 필요한 정적 필드 (하나라도 비어 있으면 다시 가져옴)
+    # need_dynamic: 좋아요/댓글이 필요한 경우 True (짧은 TTL 적용)
+    # static_ttl: 정적 필드 TTL (기본: 저장소 설정). float('inf') 면 한 번 가져온 기사는 다시 가져오지 않는다 (전체 기사 색인)
+    def lookup(self, paths, static_fields=REQUIRED_STATIC_FIELDS, need_dynamic=True, now=None, static_ttl=None):
+        now = time.time() if now is None else now
+        static_ttl = self.static_ttl if static_ttl is None else static_ttl
+        paths = list(dict.fromkeys(paths))
+        rows = {}
+        with self._lock:
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                q = f"SELECT * FROM {self.table} WHERE path IN ({','.join('?' * len(chunk))})"
+                for r in self._conn.execute(q, chunk): rows[r["path"]] = dict(r)
+        records, to_fetch = {}, []
+        for p in paths:
+            r = rows.get(p)
+            if r is None:
+                to_fetch.append(p); continue
+            # 다른 저장 형식으로 저장된 값은 쓰지 않는다 (정적 필드가 없는 행과 같게 취급)
+            current = r["static_at"] is not None and r["meta_version"] == self.meta_version
+            if current: records[p] = {k: r[k] for k in STATIC_FIELDS + DYNAMIC_FIELDS if r[k] is not None}
+            if r["retry_at"] > now: continue
+            static_ok = current and now - r["static_at"] < static_ttl and all(r[f] is not None for f in static_fields)
+            dynamic_ok = not need_dynamic or (r["dynamic_at"] is not None and now - r["dynamic_at"] < self.dynamic_ttl)
+            if not (static_ok and dynamic_ok): to_fetch.append(p)
+        return records, to_fetch
+
+    # record 에 들어 있는 필드만 갱신하고 나머지는 기존 값을 유지한다.
+    def save(self, path, record, now=None):
+        now = time.time() if now is None else now
+        static = {k: record[k] for k in STATIC_FIELDS if record.get(k) is not None}
+        dynamic = {k: record[k] for k in DYNAMIC_FIELDS if record.get(k) is not None}
+        cols = ["path", "fail_count", "retry_at"] + list(static) + list(dynamic)
+        vals = [path, 0, 0] + list(static.values()) + list(dynamic.values())
+        updates = ["fail_count = 0", "retry_at = 0"] + [f"{k} = excluded.{k}" for k in list(static) + list(dynamic)]
+        if static:
+            cols += ["static_at", "meta_version"]; vals += [now, self.meta_version]
+            updates += ["static_at = excluded.static_at", "meta_version = excluded.meta_version"]
+        if dynamic:
+            cols.append("dynamic_at"); vals.append(now); updates.append("dynamic_at = excluded.dynamic_at")
+        q = (f"INSERT INTO {self.table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+             f"ON CONFLICT(path) DO UPDATE SET {', '.join(updates)}")
+        with self._lock, self._conn:
+            self._conn.execute(q, vals)
+
+    def mark_failed(self, path, now=None):
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            r = self._conn.execute(f"SELECT fail_count FROM {self.table} WHERE path = ?", (path,)).fetchone()
+            fails = (r["fail_count"] if r else 0) + 1
+            retry_at = now + min(self.fail_backoff * 2 ** (fails - 1), self.max_fail_backoff)
+            self._conn.execute(
+                f"INSERT INTO {self.table} (path, fail_count, retry_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET fail_count = excluded.fail_count, retry_at = excluded.retry_at",
+                (path, fails, retry_at))
+
+    # 저장소에서 먼저 찾고, 새 기사이거나 만료된 기사만 fetch_many 로 가져온다.
+    # fetch_many(paths) 는 {경로: 필드 dict 또는 실패 시 None} 을 돌려준다.
+    # 결과에 없는 경로는 아직 가져오는 중인 것으로 보고 실패 처리하지 않는다 (마감 시간이 있는 크롤링. 저장은 fetch_many 쪽에서)
+    # limit: 한 번에 가져올 최대 경로 수 (paths 앞쪽부터). 넘친 경로는 다음 호출 때 가져온다 (저장된 값이 있으면 그 값을 쓴다)
+    def get_or_crawl(self, paths, fetch_many, static_fields=REQUIRED_STATIC_FIELDS, need_dynamic=True, limit=None, static_ttl=None):
+        records, to_fetch = self.lookup(paths, static_fields, need_dynamic, static_ttl=static_ttl)
+        if limit is not None: to_fetch = to_fetch[:limit]
+        if to_fetch:
+            fetched = fetch_many(to_fetch)
+            for p in to_fetch:
+                if p not in fetched: continue
+                rec = fetched[p]
+                if rec is None:
+                    self.mark_failed(p)
+                else:
+                    self.save(p, rec)
+                    records[p] = {**records.get(p, {}), **{k: v for k, v in rec.items() if v is not None}}
+        return records
@@ -0,0 +1,358 @@
+import collections
+import hashlib
+import io
+import json
+import os
+import pickle
+import struct
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from cnc_metrics import count
+
+# ----------------- 프로세스/레플리카 간 공유 데이터 캐시 -----------------
+# st.cache_data 는 프로세스마다 따로라서, 레플리카를 늘리거나 재시작하면 GA4 조회와 크롤링을
+# 처음부터 다시 한다. 여기 백엔드는 디스크나 Redis 에 값을 두어 여러 프로세스가 같은 캐시를 쓴다.
+# - 값 직렬화: DataFrame 은 zstd 압축 Parquet, 나머지(숫자/문자열/날짜 등)는 pickle
+# - 백엔드 선택: CNC_CACHE_URL
+#     (없음) 또는 disk:///경로  -> DiskCache (기본 <repo>/.cache/data)
+#     redis://host:6379/0        -> RedisCache (redis 패키지 필요)
+#     memory://                  -> 프로세스 내 FakeRedis (테스트/벤치마크용)
+#     none                       -> 캐시 사용 안 함
+# - get_or_set 은 같은 키의 동시 계산을 하나로 합친다 (single-flight).
+#   같은 프로세스 안에서는 SingleFlight 로, 프로세스/레플리카 사이에서는 백엔드의 잠금 키로 합치고
+#   기다리는 쪽은 계산 중인 쪽이 남긴 진행 상황을 받아 볼 수 있다.
+KEY_PREFIX = "cnc:v1:"
+DEFAULT_TTL = 3600
+# 계산 중인 프로세스가 죽어도 이 시간이 지나면 잠금이 풀린다
+LOCK_TTL = 600
+WAIT_POLL = 0.5
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "data")
+PARQUET_COMPRESSION = "zstd"
+
+class _ParquetFrame:
+    __slots__ = ("data",)
+    def __init__(self, data): self.data = data
+
+def _pack(obj):
+    if isinstance(obj, pd.DataFrame):
+        buf = io.BytesIO()
+        try:
+            obj.to_parquet(buf, compression=PARQUET_COMPRESSION)
+        except Exception:
+            # Arrow 로 못 바꾸는 열(int/str 이 섞인 object 등)이 있으면 pickle 로 그대로 둔다
+            return obj
+        return _ParquetFrame(buf.getvalue())
+    if isinstance(obj, dict): return {k: _pack(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return type(obj)(_pack(v) for v in obj)
+    return obj
+
+def _unpack(obj):
+    if isinstance(obj, _ParquetFrame): return pd.read_parquet(io.BytesIO(obj.data))
+    if isinstance(obj, dict): return {k: _unpack(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return type(obj)(_unpack(v) for v in obj)
+    return obj
+
+def dumps(obj):
+    return pickle.dumps(_pack(obj), protocol=pickle.HIGHEST_PROTOCOL)
+
+def loads(data):
+    return _unpack(pickle.loads(data))
+
+# 임의의 인자(dict/list/문자열)로 캐시 키를 만든다.
+def make_key(namespace, *parts):
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return f"{KEY_PREFIX}{namespace}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+# 같은 프로세스 안에서 같은 키의 계산을 하나만 실행하고, 나머지 호출은 그 결과를 기다린다.
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    # on_wait(): 기다리는 동안 WAIT_POLL 초마다 호출 (진행 표시용)
+    def do(self, key, fn, on_wait=None, poll=WAIT_POLL):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader: call = self._calls[key] = _Call()
+        if not leader:
+            while not call.event.wait(poll):
+                if on_wait: on_wait()
+            if call.error is not None: raise call.error
+            return call.value
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock: del self._calls[key]
+            call.event.set()
+
+# 키에 이름 공간이 들어 있으므로 모든 캐시 인스턴스가 하나를 같이 쓴다
+_FLIGHTS = SingleFlight()
+
+class DataCache:
+    # 백엔드는 바이트만 다루고, 직렬화/키 관리는 여기서 한다.
+    # 적중/미스는 키의 이름 공간(ga4_report, weekly_report 등)별로 센다 (cnc_metrics)
+    def get(self, key):
+        value = self._load(key)
+        count("cache_requests", namespace=key[len(KEY_PREFIX):].split(':', 1)[0], result="miss" if value is None else "hit")
+        return value
+
+    def _load(self, key):
+        data = self.get_bytes(key)
+        if data is None: return None
+        try:
+            return loads(data)
+        except Exception:
+            return None
+
+    def set(self, key, value, ttl=DEFAULT_TTL):
+        self.set_bytes(key, dumps(value), ttl)
+
+    # 캐시에 있으면 그 값, 없으면 fn(progress) 결과를 저장하고 반환.
+    # 같은 키를 동시에 요청하면 한 곳에서만 fn 을 실행하고 나머지는 결과를 기다린다.
+    # progress(비율, 메시지): fn 이 진행 상황을 알릴 때 호출 (기다리는 쪽에도 전달됨)
+    # on_progress(비율, 메시지, waiting): 화면 표시용. waiting=True 면 다른 곳의 계산을 기다리는 중
+    # should_cache(값): False 면 저장하지 않음 (일부 조회가 실패한 결과 등)
+    def get_or_set(self, key, fn, ttl=DEFAULT_TTL, on_progress=None, lock_ttl=LOCK_TTL, should_cache=None):
+        value = self.get(key)
+        if value is not None: return value
+        def wait_in_process():
+            if on_progress: on_progress(*self.get_progress(key), True)
+        return _FLIGHTS.do(key, lambda: self._fill(key, fn, ttl, on_progress, lock_ttl, should_cache), wait_in_process)
+
+    def _fill(self, key, fn, ttl, on_progress, lock_ttl, should_cache):
+        lock_key, token = f"{key}:lock", uuid.uuid4().hex.encode()
+        while True:
+            if self.add_bytes(lock_key, token, lock_ttl):
+                try:
+                    # 잠금을 얻기 직전에 다른 프로세스가 채웠을 수 있으므로 다시 확인
+                    value = self._load(key)
+                    if value is not None: return value
+                    def progress(frac, msg=""):
+                        self.set_progress(key, frac, msg, lock_ttl)
+                        if on_progress: on_progress(frac, msg, False)
+                    value = fn(progress)
+                    if value is not None and (should_cache is None or should_cache(value)): self.set(key, value, ttl)
+                    return value
+                finally:
+                    if self.get_bytes(lock_key) == token: self.delete(lock_key)
+                    self.delete(f"{key}:progress")
+            # 다른 프로세스가 계산 중: 잠금이 풀릴 때까지 진행 상황을 보여 주며 기다림
+            while self.get_bytes(lock_key) is not None:
+                if on_progress: on_progress(*self.get_progress(key), True)
+                time.sleep(WAIT_POLL)
+            value = self._load(key)
+            if value is not None: return value
+            # 계산하던 쪽이 실패해 값 없이 잠금이 풀렸으면 직접 계산
+
+    def set_progress(self, key, frac, msg, ttl=LOCK_TTL):
+        self.set_bytes(f"{key}:progress", json.dumps([frac, msg], ensure_ascii=False).encode('utf-8'), ttl)
+
+    # -> (비율, 메시지). 아직 알림이 없으면 (0.0, "")
+    def get_progress(self, key):
+        data = self.get_bytes(f"{key}:progress")
+        if not data: return 0.0, ""
+        try:
+            frac, msg = json.loads(data)
+            return float(frac), msg
+        except Exception:
+            return 0.0, ""
+
+    def get_bytes(self, key): raise NotImplementedError
+    def set_bytes(self, key, data, ttl): raise NotImplementedError
+    # 키가 없을 때만 저장하고 True (잠금용)
+    def add_bytes(self, key, data, ttl): raise NotImplementedError
+    def delete(self, key): raise NotImplementedError
+
+# 저장은 하지 않지만 같은 프로세스 안의 동시 계산은 합친다
+class NullCache(DataCache):
+    def get_bytes(self, key): return None
+    def set_bytes(self, key, data, ttl): pass
+    def add_bytes(self, key, data, ttl): return True
+    def delete(self, key): pass
+
+# 파일 하나에 값 하나: [만료 시각(double)][직렬화된 값]. 같은 디스크를 쓰는 프로세스끼리 공유된다.
+class DiskCache(DataCache):
+    HEADER = struct.Struct("<d")
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, hashlib.sha1(key.encode('utf-8')).hexdigest() + ".bin")
+
+    def get_bytes(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f: data = f.read()
+        except OSError:
+            return None
+        # add_bytes 로 막 만들어져 아직 쓰는 중인 파일
+        if len(data) < self.HEADER.size: return None
+        expires_at, = self.HEADER.unpack_from(data)
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return data[self.HEADER.size:]
+
+    def set_bytes(self, key, data, ttl):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.HEADER.pack(time.time() + ttl if ttl else 0))
+            f.write(data)
+        os.replace(tmp, path)
+
+    # O_EXCL 로 만들어 같은 디스크를 쓰는 프로세스 사이에서 한 곳만 성공. 만료된 파일은 지우고 다시 시도.
+    def add_bytes(self, key, data, ttl):
+        path = self._path(key)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                if self.get_bytes(key) is not None: return False
+                continue
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.HEADER.pack(time.time() + ttl if ttl else 0))
+                f.write(data)
+            return True
+        return False
+
+    def delete(self, key):
+        try: os.remove(self._path(key))
+        except OSError: pass
+
+# redis-py 클라이언트(또는 같은 get/set/delete 를 가진 객체)를 쓰는 백엔드
+class RedisCache(DataCache):
+    def __init__(self, url=None, client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise RuntimeError("redis:// 캐시를 쓰려면 redis 패키지를 설치하세요 (pip install redis)") from e
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get_bytes(self, key):
+        return self.client.get(key)
+
+    def set_bytes(self, key, data, ttl):
+        self.client.set(key, data, ex=int(ttl) if ttl else None)
+
+    def add_bytes(self, key, data, ttl):
+        return bool(self.client.set(key, data, ex=int(ttl) if ttl else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+# Redis 없이 RedisCache 를 돌려 보기 위한 프로세스 내 가짜 클라이언트 (get/set(ex, nx)/delete 만)
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None: return None
+            value, expires_at = item
+            if expires_at and expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            item = self._data.get(key)
+            if nx and item is not None and not (item[1] and item[1] < time.time()): return None
+            self._data[key] = (bytes(value), time.time() + ex if ex else 0)
+        return True
+
+    def delete(self, *keys):
+        with self._lock: return sum(self._data.pop(k, None) is not None for k in keys)
+
+# ----------------- Plotly 차트 캐시 -----------------
+# 같은 데이터로 같은 차트를 다시 그릴 때(인쇄 모드 전환 등 재실행, 다른 세션) px.* 로 새로 만들지 않고 재사용한다.
+# 키: (주차, 차트 id, 데이터 지문). 프로세스 안에서는 Figure 객체를 그대로 두고(LRU),
+# store(DataCache) 가 있으면 figure JSON 을 넣어 다른 프로세스/재시작 후에도 쓴다.
+def frame_fingerprint(*frames):
+    h = hashlib.sha1()
+    for df in frames:
+        if isinstance(df, pd.DataFrame):
+            h.update(json.dumps([list(map(str, df.columns)), list(map(str, df.dtypes))], ensure_ascii=False).encode('utf-8'))
+            h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+        else:
+            h.update(json.dumps(df, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+class FigureCache:
+    def __init__(self, store=None, max_items=256, ttl=DEFAULT_TTL):
+        self.store = store
+        self.max_items = max_items
+        self.ttl = ttl
+        self._figs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "shared_hits": 0, "misses": 0}
+
+    # build(): 캐시에 없을 때 Figure 를 만드는 함수. data: 지문을 낼 DataFrame(또는 JSON 으로 바꿀 수 있는 값) 목록
+    def get_or_build(self, week, chart_id, data, build):
+        key = make_key("figure", week, chart_id, frame_fingerprint(*data))
+        with self._lock:
+            fig = self._figs.get(key)
+            if fig is not None:
+                self._figs.move_to_end(key)
+                self.stats["hits"] += 1
+                count("figure_cache_requests", result="hit")
+                return fig
+        fig = self._load_shared(key)
+        if fig is not None:
+            self.stats["shared_hits"] += 1
+            count("figure_cache_requests", result="shared_hit")
+        else:
+            fig = build()
+            self.stats["misses"] += 1
+            count("figure_cache_requests", result="miss")
+            if self.store is not None:
+                import plotly.io
+                self.store.set_bytes(key, plotly.io.to_json(fig, validate=False).encode('utf-8'), self.ttl)
+        with self._lock:
+            self._figs[key] = fig
+            while len(self._figs) > self.max_items: self._figs.popitem(last=False)
+        return fig
+
+    # 프로세스 안에 둔 Figure 만 비운다 (store 에 넣은 JSON 은 그대로)
+    def clear(self):
+        with self._lock: self._figs.clear()
+
+    def _load_shared(self, key):
+        if self.store is None: return None
+        data = self.store.get_bytes(key)
+        if not data: return None
+        import plotly.graph_objects as go
+        try:
+            return go.Figure(json.loads(data))
+        except Exception:
+            return None
+
+def cache_from_url(url=None):
+    url = os.environ.get("CNC_CACHE_URL", "") if url is None else url
+    if url == "none": return NullCache()
+    if url.startswith(("redis://", "rediss://", "unix://")): return RedisCache(url)
+    if url.startswith("memory://"): return RedisCache(client=FakeRedis())
+    if url.startswith("disk://"): return DiskCache(url[len("disk://"):] or DEFAULT_CACHE_DIR)
+    return DiskCache(url or DEFAULT_CACHE_DIR)
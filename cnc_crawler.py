@@ -0,0 +1,211 @@
+import asyncio
+import codecs
+import concurrent.futures
+import os
+import random
+import threading
+import time
+
+import aiohttp
+
+# ----------------- 기사 크롤러 엔진 (asyncio + 커넥션 풀) -----------------
+# 하나의 ClientSession 을 백그라운드 이벤트 루프에서 계속 유지해
+# www.cooknchefnews.com 으로의 keep-alive 연결을 캐시 미스 사이에도 재사용한다.
+# CNC_NEWS_BASE_URL 로 대상 서버를 바꿀 수 있다 (벤치마크용 스텁 서버 등)
+BASE_URL = os.environ.get("CNC_NEWS_BASE_URL", "http://www.cooknchefnews.com")
+USER_AGENT = "Mozilla/5.0 (compatible; CNCWeeklyReport/1.0)"
+# 재시도 대상 상태 코드 (그 외 4xx 는 바로 실패 처리)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STREAM_CHUNK_SIZE = 8192
+# 조기 종료 후 남은 본문이 이 크기 이하이면 읽어 버리고 연결을 재사용
+DRAIN_LIMIT = 256 * 1024
+# 서킷 브레이커: 연속 실패가 이 횟수에 이르면 열고, BREAKER_COOLDOWN 초 동안은 요청하지 않는다
+BREAKER_FAILURES = 8
+BREAKER_COOLDOWN = 30
+# 브레이커가 열려 있어 요청하지 않은 경로의 결과 (실패가 아니므로 저장소에 실패로 남기지 않는다)
+SKIPPED = object()
+
+# ----------------- 서킷 브레이커 -----------------
+# 사이트가 죽었거나 느리면 요청마다 타임아웃 x 재시도만큼 기다리게 되므로, 연속 실패가 쌓이면 회로를 연다.
+# - closed: 정상. 연결 오류/타임아웃/재시도 대상 상태 코드(5xx, 429)가 연속 failures 번이면 open
+#           (404 같은 그 밖의 응답은 서버가 살아 있다는 뜻이므로 성공으로 센다)
+# - open: cooldown 초 동안 요청하지 않고 바로 SKIPPED
+# - half_open: cooldown 이 지나면 요청 하나만 시험으로 보내고, 나머지는 그 결과를 기다린다. 성공하면 closed, 실패하면 다시 open
+# 크롤러 이벤트 루프 스레드에서만 바꾸고, 다른 스레드에서는 snapshot() 으로 읽기만 한다
+class CircuitBreaker:
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = None
+        self._probe = None
+        self.stats = {"opened": 0, "skipped": 0, "probes": 0}
+
+    # 요청을 보내도 되면 True
+    async def allow(self):
+        while True:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "closed": return True
+            if self.state == "open":
+                self.stats["skipped"] += 1
+                return False
+            if self._probe is None:
+                self._probe = asyncio.Event()
+                self.stats["probes"] += 1
+                return True
+            await self._probe.wait()
+
+    # 시험 요청이 끝나면 기다리던 요청을 깨운다. 결과 없이 끝났으면(취소, 예외) half_open 그대로라 다음 요청이 시험을 맡는다
+    def end_probe(self):
+        if self._probe is not None:
+            self._probe.set()
+            self._probe = None
+
+    def record_success(self):
+        self.state, self.consecutive = "closed", 0
+        self.end_probe()
+
+    def record_failure(self):
+        self.consecutive += 1
+        if self.state == "half_open" or (self.state == "closed" and self.consecutive >= self.failures):
+            self.state, self.opened_at = "open", time.monotonic()
+            self.stats["opened"] += 1
+            self.end_probe()
+
+    def snapshot(self):
+        return {"state": self.state, "consecutive_failures": self.consecutive, **self.stats}
+
+class ArticleCrawler:
+    def __init__(self, base_url=BASE_URL, per_host_limit=20, timeout=2, retries=2, backoff=0.2, max_backoff=2.0, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = None
+        self._session = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="article-crawler", daemon=True)
+        self._thread.start()
+
+    # 세션은 반드시 크롤러 이벤트 루프 안에서 만든다.
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.per_host_limit, keepalive_timeout=60, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers={"User-Agent": USER_AGENT})
+        return self._session
+
+    def _retry_delay(self, attempt):
+        # full jitter: 0 ~ min(max_backoff, backoff * 2^attempt)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    # 응답 본문 처리(read)는 호출 측에서 넘긴다. 연결 오류/재시도 대상 상태 코드만 재시도.
+    # 시도마다 서킷 브레이커를 거치고, 브레이커가 열리면 남은 재시도 없이 SKIPPED (이미 실패한 경로라면 None)
+    async def _fetch(self, session, path, read):
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.retries + 1):
+            if not await self.breaker.allow(): return SKIPPED if attempt == 0 else None
+            try:
+                async with session.get(url) as resp:
+                    if resp.status not in RETRY_STATUSES: self.breaker.record_success()
+                    if resp.status < 400:
+                        return await read(resp)
+                    if resp.status not in RETRY_STATUSES:
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            except BaseException:
+                if self.breaker.state == "half_open": self.breaker.end_probe()
+                raise
+            self.breaker.record_failure()
+            if attempt < self.retries:
+                await asyncio.sleep(self._retry_delay(attempt))
+        return None
+
+    # 커넥션 풀 자리(per_host_limit)를 얻은 뒤에 브레이커를 보므로, 회로가 열리면 줄 서 있던 경로는 기다리지 않고 바로 SKIPPED
+    async def _crawl_one(self, session, path, read):
+        if self._slots is None: self._slots = asyncio.Semaphore(self.per_host_limit)
+        try:
+            async with self._slots:
+                return await self._fetch(session, path, read)
+        except Exception:
+            return None
+
+    async def _crawl(self, paths, read):
+        session = self._get_session()
+        results = await asyncio.gather(*[self._crawl_one(session, p, read) for p in paths])
+        return dict(zip(paths, results))
+
+    # 브레이커 때문에 요청하지 않은 경로는 결과에서 빼고 on_skip(경로) 로 알린다
+    @staticmethod
+    def _settle(p, result, results, on_skip):
+        if result is not SKIPPED: results[p] = result
+        elif on_skip: on_skip(p)
+
+    async def _crawl_each(self, path, read):
+        return await self._crawl_one(self._get_session(), path, read)
+
+    # budget: 기다릴 최대 시간(초). 그때까지 끝난 경로만 돌려주고, 나머지는 백그라운드에서 마저 가져와
+    #         끝나는 대로 on_late(경로, 결과 또는 실패 시 None) 를 부른다 (크롤러 이벤트 루프 스레드에서).
+    # 경로는 주어진 순서대로 커넥션 풀에 들어가므로, 중요한 경로(조회수 순)를 앞에 두면 먼저 끝난다.
+    # on_skip(경로): 서킷 브레이커가 열려 있어 요청하지 않은 경로 (결과에 없다. 마감 뒤에 건너뛴 경로는 알리지 않는다)
+    def _run(self, paths, read, budget=None, on_late=None, on_skip=None):
+        paths = list(dict.fromkeys(paths))
+        if not paths: return {}
+        results = {}
+        if budget is None:
+            for p, result in asyncio.run_coroutine_threadsafe(self._crawl(paths, read), self._loop).result().items():
+                self._settle(p, result, results, on_skip)
+            return results
+        futures = {p: asyncio.run_coroutine_threadsafe(self._crawl_each(p, read), self._loop) for p in paths}
+        concurrent.futures.wait(futures.values(), timeout=max(budget, 0))
+        for p, fut in futures.items():
+            if fut.done(): self._settle(p, fut.result(), results, on_skip)
+            elif on_late: fut.add_done_callback(lambda f, p=p: None if f.cancelled() or f.result() is SKIPPED else on_late(p, f.result()))
+        return results
+
+    # 배치 API: 경로 목록 -> {경로: parse_fn(html) 결과 또는 실패 시 None}
+    # budget 을 주면 그 안에 끝나지 않은 경로는, 서킷 브레이커가 열려 요청하지 않은 경로는 결과에 없다 (_run 참고)
+    def crawl(self, paths, parse_fn, budget=None, on_late=None, on_skip=None):
+        async def read(resp):
+            html = await resp.text(errors="replace")
+            return await asyncio.get_running_loop().run_in_executor(None, parse_fn, html)
+        return self._run(paths, read, budget, on_late, on_skip)
+
+    # 스트리밍 배치 API: 본문을 조각 단위로 make_extractor() 에 넣고, extractor.done 이 되면
+    # 나머지 본문은 파싱하지 않는다. -> {경로: build_fn(extractor.result()) 또는 실패 시 None}
+    def crawl_extract(self, paths, make_extractor, build_fn, budget=None, on_late=None, on_skip=None):
+        async def read(resp):
+            ex = make_extractor()
+            try: decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+            except LookupError: decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            received = 0
+            async for chunk in resp.content.iter_chunked(STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                ex.feed(decoder.decode(chunk))
+                if ex.done: break
+            else:
+                ex.feed(decoder.decode(b"", final=True))
+            ex.close()
+            # 남은 본문이 작으면 마저 받아 keep-alive 연결을 풀로 돌려보내고, 크면 연결을 닫는다.
+            if not resp.content.at_eof() and resp.content_length is not None and resp.content_length - received <= DRAIN_LIMIT:
+                await resp.read()
+            return build_fn(ex.result())
+        return self._run(paths, read, budget, on_late, on_skip)
+
+    def close(self):
+        async def _close():
+            # 마감 뒤 백그라운드에서 돌던 크롤링은 취소한다
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks: t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+        asyncio.run_coroutine_threadsafe(_close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
@@ -0,0 +1,282 @@
+import argparse
+import glob
+import os
+import sys
+import textwrap
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+from matplotlib import font_manager, pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+from cnc_article_store import ArticleStore
+from cnc_cache import cache_from_url
+from cnc_crawler import ArticleCrawler
+from cnc_feed import FeedIndex
+from cnc_precompute import make_ga4_client, select_weeks
+from cnc_report import PROPERTY_ID, build_weekly_report, get_sunday_to_saturday_ranges, weekly_report_key
+from cnc_snapshot import SnapshotStore
+from cnc_tables import (SHARE_FORMATS, TRAFFIC_SHARE_FORMATS, TREND_COLS, category_tables, format_columns, get_writers_df_real, kpi_items,
+                        order_other_last, share_change_table, top10_detail_table, top10_trend_tables, traffic_share_table, writer_pen_table,
+                        writer_real_table)
+
+# ----------------- 주간 보고서 PDF 내보내기 -----------------
+# 대시보드 인쇄 모드(render_summary ~ render_writer_pen)와 같은 섹션을 서버에서 matplotlib 으로 그려
+# 가로 A4 여러 쪽짜리 PDF 로 저장한다. 브라우저 없이 돌아가므로 cron 으로 주차별 보관본을 만들 수 있다.
+# 데이터: 스냅샷(cnc_precompute) > 공유 캐시(cnc_cache) > 직접 집계 순. 캐시/스냅샷만 있으면 GA4 도 필요 없다.
+#
+# 사용법:
+#   python cnc_export.py --weeks 1 --out-dir exports            # 지난주(최근 1주)
+#   python cnc_export.py --weeks 42주차,41주차 --max-age 0       # 스냅샷이 오래됐어도 그대로 사용
+# 한글 글꼴: --font <ttf/otf 경로> > CNC_PDF_FONT > 설치된 NanumGothic / Noto Sans CJK KR 등
+#   (Debian/Ubuntu: apt install fonts-nanum)
+PAGE_SIZE = (11.69, 8.27)   # A4 가로 (inch)
+COLOR_NAVY = "#1a237e"
+COLOR_RED = "#d32f2f"
+COLOR_GREY = "#78909c"
+CHART_PALETTE = [COLOR_NAVY, COLOR_RED, "#5c6bc0", "#ef5350", "#8d6e63", COLOR_GREY]
+COLOR_GENDER = {'여성': '#d32f2f', '남성': '#1a237e'}
+KOREAN_FONTS = ["NanumGothic", "NanumBarunGothic", "Noto Sans CJK KR", "Noto Sans KR", "Malgun Gothic", "AppleGothic", "UnDotum"]
+TABLE_ROWS_PER_PAGE = 22
+
+# 한글 글꼴을 matplotlib 기본 글꼴로. 찾은 글꼴 이름, 없으면 None (한글이 네모로 나온다)
+def setup_korean_font(path=None):
+    path = path or os.environ.get("CNC_PDF_FONT")
+    if path:
+        # 같은 폴더의 굵은 글꼴 등도 같이 등록 (NanumGothic.ttf + NanumGothicBold.ttf)
+        for f in glob.glob(os.path.join(os.path.dirname(os.path.abspath(path)), "*.[ot]t[fc]")): font_manager.fontManager.addfont(f)
+        name = font_manager.FontProperties(fname=path).get_name()
+    else:
+        installed = {f.name for f in font_manager.fontManager.ttflist}
+        name = next((n for n in KOREAN_FONTS if n in installed), None)
+    if name is None: return None
+    plt.rcParams["font.family"] = name
+    plt.rcParams["axes.unicode_minus"] = False
+    # 글꼴을 TrueType 그대로 넣어 PDF 에서 글자 선택/검색이 되게 한다
+    plt.rcParams["pdf.fonttype"] = 42
+    return name
+
+# ----------------- 쪽/차트/표 그리기 -----------------
+def new_page(title, period, page_no):
+    fig = plt.figure(figsize=PAGE_SIZE)
+    fig.text(0.04, 0.95, title, fontsize=17, fontweight="bold", color=COLOR_NAVY, va="top")
+    fig.add_artist(plt.Line2D([0.04, 0.96], [0.905, 0.905], color=COLOR_RED, linewidth=2))
+    fig.text(0.04, 0.025, f"쿡앤셰프 주간 성과보고서 · {period}", fontsize=8, color="#999999")
+    fig.text(0.96, 0.025, str(page_no), fontsize=8, color="#999999", ha="right")
+    return fig
+
+def draw_table(ax, df, fontsize=8, col_widths=None):
+    ax.axis("off")
+    if df is None or df.empty:
+        ax.text(0.5, 0.5, "데이터 없음", ha="center", va="center", color=COLOR_GREY)
+        return
+    cells = [[str(v) for v in row] for row in df.itertuples(index=False)]
+    table = ax.table(cellText=cells, colLabels=[str(c) for c in df.columns], loc="upper center", cellLoc="center", colWidths=col_widths)
+    table.auto_set_font_size(False)
+    table.set_fontsize(fontsize)
+    table.scale(1, 1.35)
+    for (r, _), cell in table.get_celld().items():
+        cell.set_edgecolor("#cfd8dc")
+        if r == 0:
+            cell.set_facecolor(COLOR_NAVY)
+            cell.get_text().set_color("white")
+            cell.get_text().set_fontweight("bold")
+
+def draw_donut(ax, df, names, values, title, color_map=None):
+    ax.set_title(title, fontsize=11, fontweight="bold")
+    if df is None or df.empty or df[values].sum() <= 0:
+        ax.axis("off")
+        ax.text(0.5, 0.5, "데이터 없음", ha="center", va="center", color=COLOR_GREY)
+        return
+    df = order_other_last(df, values)
+    colors = [color_map.get(n, COLOR_GREY) for n in df[names]] if color_map else [CHART_PALETTE[i % len(CHART_PALETTE)] for i in range(len(df))]
+    ax.pie(df[values], labels=df[names], colors=colors, autopct="%1.1f%%", pctdistance=0.78, startangle=90, counterclock=False,
+           wedgeprops=dict(width=0.45, edgecolor="white"), textprops=dict(fontsize=8))
+    ax.axis("equal")
+
+def draw_grouped_bars(ax, categories, series, horizontal=False, value_labels=False):
+    width = 0.8 / max(1, len(series))
+    pos = range(len(categories))
+    for i, (label, vals, color) in enumerate(series):
+        offs = [p - 0.4 + width * (i + 0.5) for p in pos]
+        bars = ax.barh(offs, vals, height=width, label=label, color=color) if horizontal else ax.bar(offs, vals, width=width, label=label, color=color)
+        if value_labels: ax.bar_label(bars, labels=[f"{int(v):,}" for v in vals], fontsize=7, padding=2)
+    if horizontal:
+        ax.set_yticks(list(pos), categories, fontsize=8)
+        ax.invert_yaxis()
+    else: ax.set_xticks(list(pos), categories, fontsize=8, rotation=45 if len(categories) > 8 else 0)
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.legend(fontsize=8, frameon=False)
+
+def no_data(fig):
+    fig.text(0.5, 0.5, "데이터 없음", ha="center", va="center", color=COLOR_GREY, fontsize=12)
+
+# ----------------- 섹션별 쪽 -----------------
+def page_summary(fig, report):
+    items = kpi_items(report["cur_pv"], report["cur_uv"], report["new_ratio"], report["search_ratio"], report["active_article_count"])
+    for i, (l, v_f, u) in enumerate(items):
+        x = 0.04 + i * 0.155
+        fig.patches.append(plt.Rectangle((x, 0.73), 0.145, 0.14, transform=fig.transFigure, facecolor="#fffcf7", edgecolor="#eceff1"))
+        fig.text(x + 0.0725, 0.84, "\n".join(textwrap.wrap(l, 14)), ha="center", va="center", fontsize=8, color="#546e7a")
+        fig.text(x + 0.0725, 0.76, f"{v_f}{u}", ha="center", fontsize=17, fontweight="bold", color=COLOR_NAVY)
+    ax1, ax2 = fig.add_axes([0.06, 0.12, 0.4, 0.5]), fig.add_axes([0.55, 0.12, 0.4, 0.5])
+    ax1.set_title("주간 일별 방문 추이", fontsize=11, fontweight="bold")
+    df_daily = report["df_daily"]
+    if not df_daily.empty: draw_grouped_bars(ax1, list(df_daily['날짜']), [("UV", df_daily['UV'], COLOR_GREY), ("PV", df_daily['PV'], COLOR_NAVY)])
+    else: ax1.axis("off")
+    ax2.set_title("최근 3달 간 추이 분석", fontsize=11, fontweight="bold")
+    df_weekly = report["df_weekly"]
+    if not df_weekly.empty: draw_grouped_bars(ax2, list(df_weekly['주차']), [("UV", df_weekly['UV'], COLOR_GREY), ("PV", df_weekly['PV'], COLOR_NAVY)])
+    else: ax2.axis("off")
+
+def page_traffic(fig, report):
+    draw_donut(fig.add_axes([0.05, 0.42, 0.4, 0.44]), report["df_traffic_curr"], '유입경로', '조회수', "이번주")
+    draw_donut(fig.add_axes([0.55, 0.42, 0.4, 0.44]), report["df_traffic_last"], '유입경로', '조회수', "지난주 (비교)")
+    fig.text(0.04, 0.38, "주요 유입경로 비중 변화", fontsize=11, fontweight="bold")
+    draw_table(fig.add_axes([0.15, 0.06, 0.7, 0.3]), format_columns(traffic_share_table(report["df_traffic_curr"], report["df_traffic_last"]), TRAFFIC_SHARE_FORMATS))
+
+def page_region(fig, report):
+    draw_donut(fig.add_axes([0.03, 0.15, 0.3, 0.7]), report["df_region_curr"], '구분', 'activeUsers', "이번주")
+    draw_donut(fig.add_axes([0.34, 0.15, 0.3, 0.7]), report["df_region_last"], '구분', 'activeUsers', "지난주 (비교)")
+    draw_table(fig.add_axes([0.67, 0.08, 0.3, 0.78]), format_columns(share_change_table(report["df_region_curr"], report["df_region_last"]), SHARE_FORMATS), fontsize=7)
+
+def page_age_gender(fig, report):
+    rows = [("연령별", report["df_age_curr"], report["df_age_last"], None), ("성별", report["df_gender_curr"], report["df_gender_last"], COLOR_GENDER)]
+    for i, (sub, d_c, d_l, cmap) in enumerate(rows):
+        y = 0.49 - i * 0.43
+        fig.text(0.04, y + 0.39, f"{sub} 분석", fontsize=11, fontweight="bold")
+        draw_donut(fig.add_axes([0.03, y, 0.3, 0.36]), d_c, '구분', 'activeUsers', "이번주", cmap)
+        draw_donut(fig.add_axes([0.34, y, 0.3, 0.36]), d_l, '구분', 'activeUsers', "지난주 (비교)", cmap)
+        draw_table(fig.add_axes([0.67, y, 0.3, 0.34]), format_columns(share_change_table(d_c, d_l), SHARE_FORMATS), fontsize=7)
+
+def page_top10_detail(fig, report):
+    df_top10 = report["df_top10"]
+    if df_top10.empty: return no_data(fig)
+    df = top10_detail_table(df_top10).copy()
+    df['제목'] = df['제목'].map(lambda t: t if len(t) <= 28 else t[:27] + "…")
+    widths = [0.035, 0.06, 0.07, 0.26, 0.06, 0.07, 0.06, 0.06, 0.045, 0.04, 0.07, 0.07, 0.05]
+    draw_table(fig.add_axes([0.02, 0.08, 0.96, 0.8]), df, fontsize=7, col_widths=widths)
+
+def page_top10_trends(fig, report):
+    df_top10 = report["df_top10"]
+    if df_top10.empty: return no_data(fig)
+    # 시간대별 조회수가 없는 보고서(예전 스냅샷)는 표에 전체 조회수만 싣는다
+    if not all(c in df_top10.columns for c in TREND_COLS):
+        df = df_top10[['순위', '제목', '작성자', '발행일시', '전체조회수']].copy()
+        df['전체조회수'] = df['전체조회수'].map(lambda x: f"{int(x):,}")
+        fig.text(0.04, 0.87, "※ 이 보고서에는 시간대별 조회수 데이터가 없습니다.", fontsize=9, color=COLOR_GREY)
+        draw_table(fig.add_axes([0.05, 0.08, 0.9, 0.76]), df, fontsize=8, col_widths=[0.06, 0.5, 0.12, 0.12, 0.12])
+        return
+    df_table, df_chart = top10_trend_tables(df_top10)
+    df_table = df_table.copy()
+    df_table['제목'] = df_table['제목'].map(lambda t: t if len(t) <= 24 else t[:23] + "…")
+    draw_table(fig.add_axes([0.02, 0.08, 0.5, 0.8]), df_table, fontsize=7)
+    if not df_chart.empty:
+        ax = fig.add_axes([0.64, 0.12, 0.33, 0.74])
+        titles = list(dict.fromkeys(df_chart['기사제목']))
+        series = [(t, [int(df_chart[(df_chart['기사제목'] == title) & (df_chart['시간대'] == t)]['조회수'].sum()) for title in titles], CHART_PALETTE[i])
+                  for i, t in enumerate(TREND_COLS)]
+        draw_grouped_bars(ax, titles, series, horizontal=True, value_labels=True)
+
+def page_category(fig, report):
+    df_articles = report["df_articles"]
+    if df_articles.empty: return no_data(fig)
+    cat_main, cat_sub = category_tables(df_articles)
+    for i, (title, df, x_col) in enumerate([("1. 메인 카테고리별 기사 수", cat_main, '카테고리'), ("2. 세부 카테고리별 기사 수", cat_sub, '세부카테고리')]):
+        x = 0.05 + i * 0.48
+        ax = fig.add_axes([x, 0.5, 0.42, 0.34])
+        ax.set_title(title, fontsize=11, fontweight="bold")
+        bars = ax.bar(df[x_col], df['기사수'], color=[CHART_PALETTE[j % len(CHART_PALETTE)] for j in range(len(df))])
+        ax.bar_label(bars, fontsize=8)
+        ax.tick_params(axis="x", labelsize=8)
+        ax.spines[["top", "right"]].set_visible(False)
+        draw_table(fig.add_axes([x, 0.06, 0.42, 0.36]), df, fontsize=7)
+
+# 행이 많은 표(기자별)는 여러 쪽으로 나눈다
+def table_pages(df, rows=TABLE_ROWS_PER_PAGE):
+    if df is None or df.empty: return [df]
+    return [df.iloc[i:i + rows] for i in range(0, len(df), rows)]
+
+# 보고서(cnc_report.build_weekly_report 결과) -> PDF 파일
+def render_report_pdf(report, label, period, out):
+    writers_df = get_writers_df_real(report["df_articles"])
+    pages = [
+        ("1. 주간 전체 성과 요약", page_summary),
+        ("2. 주간 접근 경로 분석", page_traffic),
+        ("3. 주간 전체 방문자 특성 분석 (지역)", page_region),
+        ("3. 주간 전체 방문자 특성 분석 (연령/성별)", page_age_gender),
+        ("4. 최근 7일 조회수 TOP 10 기사 상세", page_top10_detail),
+        ("5. TOP 10 기사 시간대별 조회수 추이", page_top10_trends),
+        ("6. 카테고리별 분석", page_category),
+    ]
+    for title, df in [("7. 이번주 기자별 분석 (본명 기준)", writer_real_table(writers_df) if not writers_df.empty else None),
+                      ("8. 이번주 기자별 분석 (필명 기준)", writer_pen_table(writers_df) if not writers_df.empty else None)]:
+        for part in table_pages(df):
+            pages.append((title, lambda fig, report, part=part: draw_table(fig.add_axes([0.05, 0.08, 0.9, 0.8]), part, fontsize=8)))
+
+    with PdfPages(out, metadata={"Title": f"쿡앤셰프 주간 성과보고서 {label} ({period})"}) as pdf:
+        for no, (title, draw) in enumerate(pages, 1):
+            fig = new_page(f"{title}  ·  {label}", period, no)
+            draw(fig, report)
+            pdf.savefig(fig)
+            plt.close(fig)
+    return out
+
+# ----------------- 배치 실행 -----------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="주간 보고서 PDF 내보내기")
+    ap.add_argument("--weeks", help="최근 N주(숫자) 또는 쉼표로 구분한 주차 라벨. 기본: 전체 12주")
+    ap.add_argument("--out-dir", default="exports", help="PDF 저장 경로")
+    ap.add_argument("--property", default=PROPERTY_ID, help="GA4 속성 ID")
+    ap.add_argument("--credentials", help="서비스 계정 JSON 경로 (스냅샷/캐시에 없는 주차를 집계할 때만 사용)")
+    ap.add_argument("--snapshot-dir", help="스냅샷 경로 (기본: CNC_SNAPSHOT_DIR 또는 .cache/snapshots)")
+    ap.add_argument("--max-age", type=float, help="이보다 오래된 스냅샷(초)은 쓰지 않음. 0 이면 제한 없음")
+    ap.add_argument("--font", help="한글 글꼴 파일 경로")
+    args = ap.parse_args(argv)
+
+    if setup_korean_font(args.font) is None:
+        print("[warn] 한글 글꼴을 찾지 못했습니다. --font 또는 CNC_PDF_FONT 로 지정하세요.", file=sys.stderr, flush=True)
+    week_map = get_sunday_to_saturday_ranges()
+    weeks = select_weeks(week_map, args.weeks)
+    snapshots = SnapshotStore(args.snapshot_dir) if args.snapshot_dir else SnapshotStore()
+    cache = cache_from_url()
+    os.makedirs(args.out_dir, exist_ok=True)
+    # GA4 클라이언트/크롤러는 스냅샷과 캐시에 모두 없는 주차가 나왔을 때만 만든다
+    live = {}
+
+    def load(label):
+        report = snapshots.load(args.property, week_map[label], week_map, args.max_age)
+        if report is None: report = cache.get(weekly_report_key(args.property, week_map, label))
+        if report is not None: return report
+        if not live:
+            live.update(client=make_ga4_client(args.credentials), store=ArticleStore(), crawler=ArticleCrawler(per_host_limit=20, timeout=2))
+            live['feeds'] = FeedIndex(live['crawler'])
+        return cache.get_or_set(weekly_report_key(args.property, week_map, label),
+                                lambda progress: build_weekly_report(live['client'], args.property, week_map, label, live['store'], live['crawler'], cache, progress,
+                                                                    feeds=live['feeds'], crawl_budget=None),
+                                should_cache=lambda r: not r.get('errors') and not r.get('crawl_degraded'))
+
+    failed = 0
+    try:
+        for label in weeks:
+            t = time.perf_counter()
+            try:
+                report = load(label)
+                # 조회에 실패한 섹션이 있거나 기사 사이트 장애로 기사 정보가 빠진 보고서로는 보관본을 만들지 않는다
+                if report.get('errors'): raise RuntimeError("GA4 조회 실패 - " + "; ".join(f"{k}: {v}" for k, v in report['errors'].items()))
+                if report.get('crawl_degraded'): raise RuntimeError(f"기사 사이트 응답 없음 - 기사 {report['crawl_degraded']}건의 정보를 가져오지 못함")
+                start = week_map[label].split(' ~ ')[0].replace('.', '-')
+                path = render_report_pdf(report, label, week_map[label], os.path.join(args.out_dir, f"cncnews_weekly_{start}_{label}.pdf"))
+                print(f"[ok] {label} {week_map[label]} {time.perf_counter() - t:.1f}s -> {path}", flush=True)
+            except Exception as e:
+                failed += 1
+                print(f"[fail] {label} {week_map[label]}: {e}", file=sys.stderr, flush=True)
+    finally:
+        if live:
+            live['crawler'].close()
+            live['store'].close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+from html.parser import HTMLParser
+
+# ----------------- 기사 메타데이터 부분 추출기 -----------------
+# BeautifulSoup 트리를 통째로 만들지 않고, 필요한 노드(작성자/좋아요/댓글/브레드크럼/
+# article:section)만 스트리밍으로 읽는다. 필요한 값이 모두 모이면 본문 나머지는 읽지 않는다.
+CHUNK_SIZE = 8192
+# 클래스 이름 -> 첫 번째 요소의 텍스트
+TEXT_CLASSES = ("user-name", "writer", "byline", "sns-like-count", "comment-count", "date", "regdate")
+# 클래스 이름 -> 하위 <a> 텍스트 목록 (soup.select('.location a') 와 같은 의미)
+CRUMB_CLASSES = ("location", "breadcrumb", "path")
+# 모두 찾으면 조기 종료 (기본값: 대시보드 기사 크롤링에 필요한 값)
+# 튜플 항목은 그중 하나만 찾으면 된다 (발행일은 .date 또는 .regdate)
+DEFAULT_STOP_WHEN = ("user-name", "sns-like-count", "comment-count", "location", ("date", "regdate"))
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+SCAN_TAGS = {"span", "div", "li"}
+
+class ArticleExtractor(HTMLParser):
+    # scan_author: 작성자 클래스가 없을 때 '기자' 가 들어간 짧은 span/div/li 를 찾는 보조 탐색
+    def __init__(self, stop_when=DEFAULT_STOP_WHEN, scan_author=True):
+        super().__init__(convert_charrefs=True)
+        self.stop_when = tuple(stop_when)
+        self.scan_author = scan_author
+        self.texts = {}
+        self.crumbs = {c: [] for c in CRUMB_CLASSES}
+        self.crumbs_closed = set()
+        self.section = None
+        self.author_candidates = []
+        self._stack = []      # [태그, 이 요소에서 시작한 캡처 키 목록]
+        self._active = {}     # 캡처 키 -> 텍스트 조각 목록
+        self._open_crumbs = []
+        self._order = 0
+
+    def found(self, k):
+        if isinstance(k, tuple): return any(self.found(c) for c in k)
+        return k in self.texts or (k in self.crumbs_closed and self.crumbs[k])
+
+    @property
+    def done(self):
+        return all(self.found(k) for k in self.stop_when)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            if self.section is None and attrs.get("property") == "article:section": self.section = attrs.get("content")
+            return
+        if tag in VOID_TAGS: return
+        keys = []
+        classes = (attrs.get("class") or "").split()
+        for c in classes:
+            if c in TEXT_CLASSES and c not in self.texts and ("text", c) not in self._active:
+                keys.append(("text", c))
+            elif c in CRUMB_CLASSES and c not in self._open_crumbs:
+                keys.append(("crumb", c)); self._open_crumbs.append(c)
+        if tag == "a" and self._open_crumbs:
+            self._order += 1; keys.append(("a", self._order, tuple(self._open_crumbs)))
+        if self.scan_author and tag in SCAN_TAGS:
+            self._order += 1; keys.append(("scan", self._order))
+        for k in keys:
+            if k[0] != "crumb": self._active[k] = []
+        self._stack.append((tag, keys))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self._stack and self._stack[-1][0] == tag: self._close_top()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS: return
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                while len(self._stack) > i: self._close_top()
+                return
+
+    def handle_data(self, data):
+        if not self._active: return
+        disqualified = []
+        for k, parts in self._active.items():
+            parts.append(data)
+            # 보조 탐색 후보는 10자 이상이 되면 더 모을 필요가 없음
+            if k[0] == "scan" and len("".join(parts).strip()) >= 10: disqualified.append(k)
+        for k in disqualified: del self._active[k]
+
+    def _close_top(self):
+        _, keys = self._stack.pop()
+        for k in keys:
+            if k[0] == "crumb":
+                self._open_crumbs.remove(k[1]); self.crumbs_closed.add(k[1]); continue
+            parts = self._active.pop(k, None)
+            if parts is None: continue
+            txt = "".join(parts).strip()
+            if k[0] == "text":
+                # 빈 요소는 select_one(...) or ... 에서 건너뛰는 것과 같게 처리
+                if txt: self.texts[k[1]] = txt
+            elif k[0] == "a":
+                for c in k[2]: self.crumbs[c].append(txt)
+            elif k[0] == "scan" and "기자" in txt and len(txt) < 10:
+                self.author_candidates.append((k[1], txt))
+
+    def close(self):
+        super().close()
+        while self._stack: self._close_top()
+
+    def result(self):
+        crumbs = next((self.crumbs[c] for c in CRUMB_CLASSES if self.crumbs[c]), [])
+        scanned = min(self.author_candidates)[1] if self.author_candidates else None
+        return {"texts": dict(self.texts), "crumbs": {c: list(v) for c, v in self.crumbs.items()}, "breadcrumbs": crumbs,
+                "section": self.section, "scanned_author": scanned}
+
+# 문자열 html 을 조각 단위로 넣다가, 필요한 값이 모두 모이면 중단
+def extract_article_fields(html, stop_when=DEFAULT_STOP_WHEN, scan_author=True, chunk_size=CHUNK_SIZE):
+    ex = ArticleExtractor(stop_when, scan_author)
+    for i in range(0, len(html), chunk_size):
+        ex.feed(html[i:i + chunk_size])
+        if ex.done: break
+    ex.close()
+    return ex.result()
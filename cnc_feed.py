@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from cnc_metrics import span
+from cnc_report import clean_author_name, parse_pub_date
+
+# ----------------- 사이트맵/RSS 일괄 수집 -----------------
+# 기사마다 본문 HTML 을 받지 않고, 사이트의 RSS/섹션 피드와 사이트맵 목록 한 번으로 수십 건의
+# 작성자/카테고리/발행일을 읽는다. 목록은 XMLPullParser 로 조각 단위로 읽고 항목을 다 읽으면 바로 버린다.
+# 피드에 없거나 필드가 빠진 기사만 기존처럼 기사 페이지를 크롤링한다 (cnc_report 의 전체 기사 색인).
+# CNC_FEED_PATHS: 쉼표로 구분한 목록 경로 (RSS 2.0 / 뉴스 사이트맵). 비우면 피드를 쓰지 않는다
+FEED_PATHS = tuple(p for p in os.environ.get("CNC_FEED_PATHS", "/rss/allArticle.xml,/sitemap.xml").split(",") if p)
+# 목록을 다시 받는 간격 (초)
+FEED_REFRESH = 600
+KST = timezone(timedelta(hours=9))
+
+# 태그 이름 -> 항목 필드 (네임스페이스는 떼고 비교. 사이트맵의 news:title/news:publication_date 포함)
+ITEM_TAGS = ("item", "url")
+FIELD_TAGS = {"link": "link", "guid": "link", "loc": "link", "title": "title", "author": "author", "creator": "author",
+              "pubDate": "date", "publication_date": "date", "lastmod": "date"}
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+# 목록 XML 조각 -> 항목 dict 목록 {'link', 'title', 'author', 'date', 'categories'}
+# ArticleCrawler.crawl_extract 에 그대로 넘길 수 있게 cnc_extract.ArticleExtractor 와 같은 feed/done/close/result 를 갖는다
+class FeedExtractor:
+    done = False
+
+    def __init__(self):
+        self._parser = XMLPullParser(events=("end",))
+        self.items = []
+        self.error = None
+
+    def feed(self, text):
+        if self.error: return
+        try:
+            self._parser.feed(text)
+            self._collect()
+        except ParseError as e:
+            # 잘린 목록이면 그때까지 읽은 항목만 쓴다
+            self.error = e
+
+    def close(self):
+        if self.error: return
+        try:
+            self._parser.close()
+            self._collect()
+        except ParseError as e:
+            self.error = e
+
+    def _collect(self):
+        for _, elem in self._parser.read_events():
+            if local_name(elem.tag) not in ITEM_TAGS: continue
+            item = {"categories": []}
+            for child in elem.iter():
+                name = local_name(child.tag)
+                text = (child.text or "").strip()
+                if not text: continue
+                if name == "category": item["categories"].append(text)
+                elif name in FIELD_TAGS: item.setdefault(FIELD_TAGS[name], text)
+            if "link" in item: self.items.append(item)
+            elem.clear()
+
+    def result(self):
+        return self.items
+
+# 기사 링크 -> GA4 pagePath 와 같은 모양 (경로 + 쿼리)
+def feed_path(link):
+    parts = urlsplit(link)
+    if not parts.path: return None
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
+
+# RFC 822 (RSS pubDate) / ISO 8601 (사이트맵) / 'YYYY-MM-DD HH:MM' -> 'YYYY-MM-DD HH:MM' (시간대가 있으면 한국 시각으로)
+def parse_feed_date(text):
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try: dt = parse(text)
+        except (TypeError, ValueError, IndexError): continue
+        if dt.tzinfo: dt = dt.astimezone(KST)
+        return dt.strftime('%Y-%m-%d %H:%M')
+    return parse_pub_date(text)
+
+# 피드 항목 -> 기사 메타데이터 (cnc_article_store 의 정적 필드). 피드에 없는 필드는 넣지 않는다
+# 카테고리: <category> 가 여러 개면 순서대로 카테고리/세부카테고리, 하나면 '뉴스 > 외식' 같은 경로를 나눈다
+def build_feed_meta(item):
+    cats = item["categories"]
+    if len(cats) == 1: cats = [c.strip() for c in cats[0].split('>') if c.strip()]
+    meta = {'title': item.get('title'), 'author': clean_author_name(item['author']) if item.get('author') else None,
+            'category': cats[0] if cats else None, 'subcategory': cats[1] if len(cats) > 1 else None,
+            'pub_date': parse_feed_date(item['date']) if item.get('date') else None}
+    return {k: v for k, v in meta.items() if v}
+
+class FeedIndex:
+    # crawler: cnc_crawler.ArticleCrawler (기사 크롤링과 같은 커넥션 풀로 목록을 받는다)
+    def __init__(self, crawler, feed_paths=FEED_PATHS, refresh=FEED_REFRESH):
+        self.crawler = crawler
+        self.feed_paths = list(feed_paths)
+        self.refresh = refresh
+        self._records = {}
+        self._at = None
+        self._lock = threading.Lock()
+
+    # {경로: 메타데이터}. 마지막으로 받은 지 refresh 초가 지났으면 목록을 다시 받는다 (동시에 불러도 한 번만)
+    # 같은 기사가 여러 목록에 있으면 먼저 나온 목록의 값을 쓰고, 빠진 필드만 뒤 목록에서 채운다
+    def records(self):
+        with self._lock:
+            if self.feed_paths and (self._at is None or time.time() - self._at >= self.refresh):
+                records = {}
+                with span("feed", feeds=len(self.feed_paths)) as tags:
+                    fetched = self.crawler.crawl_extract(self.feed_paths, FeedExtractor, lambda items: items)
+                    tags['items'] = sum(len(items or []) for items in fetched.values())
+                for fp in self.feed_paths:
+                    for item in fetched.get(fp) or []:
+                        path = feed_path(item['link'])
+                        if not path: continue
+                        rec = records.setdefault(path, {})
+                        for k, v in build_feed_meta(item).items(): rec.setdefault(k, v)
+                self._records, self._at = records, time.time()
+            return self._records
+
+    # paths 중 피드에 fields 가 모두 있는 기사만 -> {경로: 메타데이터}
+    def lookup(self, paths, fields):
+        records = self.records()
+        return {p: records[p] for p in paths if p in records and all(records[p].get(f) for f in fields)}
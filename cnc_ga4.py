@@ -0,0 +1,330 @@
+import collections
+import concurrent.futures
+import threading
+import numpy as np
+import pandas as pd
+
+from cnc_cache import make_key
+from cnc_metrics import bind, count, span
+from cnc_quota import RETRYABLE, QuotaExhausted, get_limiter
+
+from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest, DateRange, Dimension, Filter, FilterExpression, FilterExpressionList, Metric, MetricType, RunReportRequest, OrderBy
+)
+
+# ----------------- GA4 리포트 요청/응답 공통 처리 -----------------
+# batchRunReports 는 한 번에 최대 5개의 리포트만 허용
+BATCH_SIZE = 5
+DEFAULT_LIMIT = 10000
+# 페이지 단위 조회 시 한 페이지의 행 수
+PAGE_SIZE = 10000
+
+DATE_RANGE_DIM = "dateRange"
+
+# date_ranges: [(시작일, 종료일, 이름), ...] 를 주면 여러 기간을 한 요청으로 조회한다.
+# 이 경우 응답에 dateRange 차원(값 = 기간 이름)이 붙은 long-format 프레임이 된다.
+def normalize_date_ranges(start_date=None, end_date=None, date_ranges=None):
+    if not date_ranges: return [(start_date, end_date, None)]
+    return [(r[0], r[1], r[2] if len(r) > 2 else f"date_range_{i}") for i, r in enumerate(date_ranges)]
+
+# dimension_filter: {차원 이름: [값, ...]} -> 차원마다 값 목록 중 하나와 일치하는 행만 (여러 차원이면 AND)
+def build_dimension_filter(dimension_filter):
+    if not dimension_filter: return None
+    exprs = [FilterExpression(filter=Filter(field_name=d, in_list_filter=Filter.InListFilter(values=list(values))))
+             for d, values in dimension_filter.items()]
+    return exprs[0] if len(exprs) == 1 else FilterExpression(and_group=FilterExpressionList(expressions=exprs))
+
+# 여러 기간을 한 요청으로 받으면 GA4 는 모든 기간의 행을 합쳐 정렬하고 limit 을 적용한다
+# (이번주 조회가 많으면 상위 행을 이번주가 거의 다 차지해 지난주 상위 50개가 잘린다).
+# 그래서 여러 기간이면 요청의 limit 은 DEFAULT_LIMIT x 기간 수로 두고, 받은 뒤 기간마다 limit 개씩 자른다 (trim_date_ranges).
+def request_limit(limit, ranges):
+    return (limit if limit and len(ranges) == 1 else DEFAULT_LIMIT) * len(ranges)
+
+def build_report_request(property_id, start_date=None, end_date=None, dimensions=(), metrics=(), order_by_metric=None, limit=None, date_ranges=None, offset=0,
+                         dimension_filter=None):
+    ranges = normalize_date_ranges(start_date, end_date, date_ranges)
+    order_bys = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=order_by_metric), desc=True)] if order_by_metric else []
+    return RunReportRequest(
+        property=f"properties/{property_id}",
+        dimensions=[Dimension(name=d) for d in dimensions],
+        metrics=[Metric(name=m) for m in metrics],
+        date_ranges=[DateRange(start_date=s, end_date=e, name=n) if n else DateRange(start_date=s, end_date=e) for s, e, n in ranges],
+        order_bys=order_bys,
+        dimension_filter=build_dimension_filter(dimension_filter),
+        limit=request_limit(limit, ranges),
+        offset=offset,
+        # 남은 토큰/동시 요청 수를 받아 cnc_quota 가 속도를 조절
+        return_property_quota=True
+    )
+
+def report_dimensions(dimensions, date_ranges=None):
+    dims = list(dimensions)
+    if date_ranges and len(date_ranges) > 1 and DATE_RANGE_DIM not in dims: dims.append(DATE_RANGE_DIM)
+    return dims
+
+# error: 조회에 실패해 빈 프레임으로 대신한 경우 그 이유 (df.attrs['error'])
+def empty_report_df(dimensions, metrics, error=None):
+    df = pd.DataFrame(columns=list(dimensions) + list(metrics))
+    if error: df.attrs['error'] = error
+    return df
+
+def report_error(df):
+    return df.attrs.get('error')
+
+def describe_error(e):
+    return f"{type(e).__name__}: {e}"
+
+# 모든 GA4 호출은 속성별 쿼터 제한기(cnc_quota)를 거친다
+# 호출마다 차원/측정항목, 받은 행 수, 응답 크기(바이트)를 span 으로 남긴다 (쿼터 대기/재시도 시간 포함)
+def call_run_report(client, property_id, request):
+    with span("ga4.run_report", dimensions=[d.name for d in request.dimensions], metrics=[m.name for m in request.metrics],
+              offset=request.offset) as tags:
+        response = get_limiter(property_id).call(client.run_report, request)
+        tags.update(rows=len(response.rows), bytes=response_bytes(response))
+    count("ga4_rows", tags['rows'], method="run_report")
+    count("ga4_response_bytes", tags['bytes'], method="run_report")
+    return response
+
+def call_batch_run_reports(client, property_id, request):
+    with span("ga4.batch_run_reports", reports=[{'dimensions': [d.name for d in r.dimensions], 'metrics': [m.name for m in r.metrics]}
+                                                 for r in request.requests]) as tags:
+        response = get_limiter(property_id).call(client.batch_run_reports, request)
+        tags.update(rows=sum(len(r.rows) for r in response.reports), bytes=response_bytes(response))
+    count("ga4_rows", tags['rows'], method="batch_run_reports")
+    count("ga4_response_bytes", tags['bytes'], method="batch_run_reports")
+    return response
+
+def response_bytes(response):
+    pb = type(response).pb(response) if hasattr(type(response), 'pb') else response
+    return pb.ByteSize()
+
+# 측정항목 타입 -> dtype (TYPE_INTEGER 만 정수, 초/통화/비율 등 나머지는 실수)
+def metric_dtype(metric_type):
+    return np.int64 if metric_type == MetricType.TYPE_INTEGER else np.float64
+
+# 응답 헤더의 차원/측정항목 이름을 우선 사용 (다중 기간이면 dateRange 가 추가됨)
+# 행마다 dict 를 만들지 않고 열 단위로 채운다. 측정항목은 metric_headers 의 타입으로 dtype 을 고정하고
+# (행마다 '.' 유무로 추측하면 같은 열이 int/float 섞인 object 가 될 수 있음), 차원은 category 로 만든다.
+# 전체 행 수(row_count)는 df.attrs['row_count'] 에 남겨 잘린 결과인지 판단할 수 있게 한다.
+def response_to_df(response, dimensions, metrics):
+    # proto-plus 래퍼를 거치지 않고 원본 protobuf 메시지에서 바로 읽는다.
+    pb = type(response).pb(response) if hasattr(type(response), 'pb') else response
+    dimensions = [h.name for h in pb.dimension_headers] or list(dimensions)
+    metrics = [h.name for h in pb.metric_headers] or list(metrics)
+    types = [h.type_ for h in pb.metric_headers]
+    rows = pb.rows
+    n = len(rows)
+    cols = {}
+    for i, dim in enumerate(dimensions):
+        cols[dim] = pd.Categorical([row.dimension_values[i].value for row in rows])
+    for i, met in enumerate(metrics):
+        values = [row.metric_values[i].value for row in rows]
+        if i < len(types): dtype = metric_dtype(types[i])
+        else: dtype = np.float64 if any('.' in v for v in values) else np.int64
+        arr = np.empty(n, dtype=dtype)
+        arr[:] = values
+        cols[met] = arr
+    df = pd.DataFrame(cols, copy=False)
+    df.attrs['row_count'] = pb.row_count
+    return df
+
+# long-format 프레임 -> {기간 이름: 프레임} (dateRange 열은 제거)
+# 다른 기간에만 있는 값이 category 에 남지 않도록 사용하지 않는 category 는 정리한다.
+def split_date_ranges(df, names):
+    out = {}
+    for n in names:
+        if DATE_RANGE_DIM in df.columns:
+            part = df[df[DATE_RANGE_DIM] == n].drop(columns=DATE_RANGE_DIM).reset_index(drop=True)
+            for c in part.columns:
+                if isinstance(part[c].dtype, pd.CategoricalDtype): part[c] = part[c].cat.remove_unused_categories()
+            out[n] = part
+        else:
+            out[n] = df.iloc[0:0].copy()
+    return out
+
+# long-format 프레임 -> 기간마다 앞에서 limit 개 (order_by 로 정렬된 응답이면 기간별 상위 limit 개)
+def trim_date_ranges(df, limit):
+    if not limit or DATE_RANGE_DIM not in df.columns: return df
+    out = df.groupby(DATE_RANGE_DIM, observed=True, sort=False).head(limit).reset_index(drop=True)
+    out.attrs.update(df.attrs)
+    return out
+
+# ----------------- 공유 캐시 (cnc_cache) -----------------
+# 같은 속성/요청 내용이면 같은 키. 실패해서 빈 프레임으로 대신한 결과(row_count 없음)는 저장하지 않는다.
+def report_cache_key(property_id, spec):
+    return make_key("ga4_report", str(property_id), spec)
+
+def _cacheable(df):
+    return 'row_count' in df.attrs
+
+def run_report(client, property_id, start_date, end_date, dimensions, metrics, order_by_metric=None, limit=None, date_ranges=None,
+               cache=None, ttl=3600, dimension_filter=None):
+    dims = report_dimensions(dimensions, date_ranges)
+    if cache is not None:
+        spec = dict(start_date=start_date, end_date=end_date, dimensions=dimensions, metrics=metrics,
+                    order_by_metric=order_by_metric, limit=limit, date_ranges=date_ranges)
+        # 필터가 없는 리포트는 예전과 같은 키
+        if dimension_filter: spec['dimension_filter'] = dimension_filter
+        key = report_cache_key(property_id, spec)
+        df = cache.get(key)
+        if df is not None: return df
+    if not client: return empty_report_df(dims, metrics, "GA4 클라이언트 없음")
+    request = build_report_request(property_id, start_date, end_date, dimensions, metrics, order_by_metric, limit, date_ranges,
+                                   dimension_filter=dimension_filter)
+    try:
+        df = trim_date_ranges(response_to_df(call_run_report(client, property_id, request), dims, metrics), limit)
+    except Exception as e:
+        # 재시도까지 실패한 경우: 빈 프레임에 오류를 남겨 호출 측이 '데이터 없음'과 구분할 수 있게 한다
+        return empty_report_df(dims, metrics, describe_error(e))
+    if cache is not None: cache.set(key, df, ttl)
+    return df
+
+# ----------------- 페이지 단위 스트리밍 조회 -----------------
+# limit=10000 한 번으로 잘리던 큰 리포트를 offset 으로 나눠 DataFrame 조각 단위로 yield 한다.
+# 첫 페이지의 row_count 로 전체 크기를 알면 나머지 페이지는 max_workers 개씩 동시에 받고,
+# 순서대로 내보낸다. 동시에 메모리에 올라가는 페이지는 max_workers 개로 제한된다.
+# first_page: 이미 받아 둔 첫 페이지(예: batchRunReports 결과, 같은 page_size 로 요청한 것)
+def iter_report_pages(client, property_id, start_date=None, end_date=None, dimensions=(), metrics=(), order_by_metric=None,
+                      page_size=PAGE_SIZE, date_ranges=None, max_workers=4, first_page=None):
+    dims = report_dimensions(dimensions, date_ranges)
+    def fetch(offset):
+        request = build_report_request(property_id, start_date, end_date, dimensions, metrics, order_by_metric, page_size, date_ranges, offset)
+        return response_to_df(call_run_report(client, property_id, request), dims, metrics)
+
+    first = fetch(0) if first_page is None else first_page
+    yield first
+    total = first.attrs.get('row_count', len(first))
+    step = request_limit(page_size, normalize_date_ranges(start_date, end_date, date_ranges))
+    if total <= step: return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()
+        for offset in range(step, total, step):
+            pending.append(executor.submit(bind(fetch), offset))
+            if len(pending) >= max_workers: yield pending.popleft().result()
+        while pending: yield pending.popleft().result()
+
+# ----------------- batchRunReports 묶음 실행 -----------------
+# specs: {이름: dict(start_date, end_date, dimensions, metrics, order_by_metric=None, limit=None, date_ranges=None, dimension_filter=None)}
+# 반환: {이름: DataFrame} (run_report 를 개별 호출한 것과 같은 모양)
+def chunk_report_specs(specs, batch_size=BATCH_SIZE):
+    names = list(specs)
+    return [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+
+def _run_batch(client, property_id, specs, names):
+    requests = [build_report_request(property_id, **specs[n]) for n in names]
+    try:
+        response = call_batch_run_reports(client, property_id, BatchRunReportsRequest(property=f"properties/{property_id}", requests=requests))
+        return {n: trim_date_ranges(response_to_df(rep, report_dimensions(specs[n]['dimensions'], specs[n].get('date_ranges')), specs[n]['metrics']),
+                                    specs[n].get('limit'))
+                for n, rep in zip(names, response.reports)}
+    except RETRYABLE + (QuotaExhausted,) as e:
+        # 쿼터/일시 오류는 제한기에서 이미 재시도했으므로 개별 요청으로 나눠 다시 보내지 않는다
+        return {n: empty_report_df(report_dimensions(specs[n]['dimensions'], specs[n].get('date_ranges')), specs[n]['metrics'], describe_error(e))
+                for n in names}
+    except Exception:
+        # 묶음 안의 한 요청이 잘못되면 묶음 전체가 실패하므로, 개별 요청으로 다시 시도
+        return {n: run_report(client, property_id, **{'start_date': None, 'end_date': None, **specs[n]}) for n in names}
+
+# run_batch_reports 와 같지만 기다리지 않고 {이름: Future} 를 바로 반환한다 (먼저 끝난 묶음부터 쓸 수 있게).
+# executor: 묶음 요청을 실행할 concurrent.futures.Executor
+# cache: cnc_cache.DataCache. 캐시에 있는 리포트는 빼고 나머지만 묶어서 요청한다.
+def submit_batch_reports(executor, client, property_id, specs, batch_size=BATCH_SIZE, cache=None, ttl=3600):
+    futures = {n: concurrent.futures.Future() for n in specs}
+    keys = {n: report_cache_key(property_id, s) for n, s in specs.items()} if cache is not None else {}
+    todo = {}
+    for n, s in specs.items():
+        df = cache.get(keys[n]) if cache is not None else None
+        if df is not None: futures[n].set_result(df)
+        else: todo[n] = s
+    if todo and not client:
+        for n, s in todo.items():
+            futures[n].set_result(empty_report_df(report_dimensions(s['dimensions'], s.get('date_ranges')), s['metrics'], "GA4 클라이언트 없음"))
+        return futures
+
+    def run(names):
+        try:
+            part = _run_batch(client, property_id, todo, names)
+        except BaseException as e:
+            for n in names: futures[n].set_exception(e)
+            return
+        for n in names:
+            if cache is not None and _cacheable(part[n]): cache.set(keys[n], part[n], ttl)
+            futures[n].set_result(part[n])
+    for names in chunk_report_specs(todo, batch_size): executor.submit(bind(run), names)
+    return futures
+
+def run_batch_reports(client, property_id, specs, batch_size=BATCH_SIZE, max_workers=4, cache=None, ttl=3600):
+    if not specs: return {}
+    n_chunks = len(chunk_report_specs(specs, batch_size))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(max_workers, n_chunks))) as executor:
+        futures = submit_batch_reports(executor, client, property_id, specs, batch_size, cache, ttl)
+        return {n: f.result() for n, f in futures.items()}
+
+# ----------------- 기간별 조회 (여러 기간 비교) -----------------
+# GA4 는 한 요청에 기간을 최대 4개까지 받는다
+MAX_DATE_RANGES = 4
+
+# 기간 없는 spec + 한 기간 -> 그 기간만 조회하는 spec (기간별 캐시 키용. 같은 기간을 조회한 단일 기간 spec 과 같은 키)
+def period_spec(spec, start_date, end_date):
+    return {**{k: v for k, v in spec.items() if k not in ('start_date', 'end_date', 'date_ranges')}, 'start_date': start_date, 'end_date': end_date}
+
+# specs: {이름: 기간 없는 spec (dimensions, metrics, order_by_metric=None, limit=None)}
+# periods: [(시작일, 종료일, 기간 이름), ...]
+# 반환: {이름: Future -> {기간 이름: DataFrame}} (기간 순서대로)
+# 결과는 기간마다 따로 캐시한다. 다른 비교(예: 지난주 보고서의 '이번주')가 이미 조회한 기간은 캐시에서 꺼내고,
+# 없는 기간만 MAX_DATE_RANGES 개씩 한 요청에 묶어 submit_batch_reports 로 보낸다 (기간 N개 -> 요청 ceil(N/4)개).
+def submit_period_reports(executor, client, property_id, specs, periods, cache=None, ttl=3600):
+    names = [p[2] for p in periods]
+    out = {n: concurrent.futures.Future() for n in specs}
+    found = {n: {} for n in specs}
+    missing = {n: [] for n in specs}
+    keys = {}
+    for n, spec in specs.items():
+        for s, e, p in periods:
+            keys[n, p] = report_cache_key(property_id, period_spec(spec, s, e))
+            df = cache.get(keys[n, p]) if cache is not None else None
+            if df is not None: found[n][p] = df
+            else: missing[n].append((s, e, p))
+    fetch, parts = {}, {n: [] for n in specs}
+    for n, spec in specs.items():
+        for i in range(0, len(missing[n]), MAX_DATE_RANGES):
+            chunk = missing[n][i:i + MAX_DATE_RANGES]
+            fetch[f"{n}#{i}"] = {**period_spec(spec, None, None), 'date_ranges': chunk}
+            parts[n].append((f"{n}#{i}", chunk))
+    futures = submit_batch_reports(executor, client, property_id, fetch, cache=None)
+
+    def finish(n):
+        try:
+            for sub, chunk in parts[n]:
+                df = futures[sub].result()
+                split = split_date_ranges(df, [p for _, _, p in chunk]) if len(chunk) > 1 else {chunk[0][2]: df}
+                for p, part in split.items():
+                    # 실패한 요청이면 그 기간들 모두 같은 오류가 남은 빈 프레임
+                    if report_error(df): part.attrs['error'] = report_error(df)
+                    elif cache is not None and _cacheable(df): cache.set(keys[n, p], part, ttl)
+                    found[n][p] = part
+        except BaseException as e:
+            out[n].set_exception(e)
+            return
+        out[n].set_result({p: found[n][p] for p in names})
+    for n in specs:
+        subs = [futures[sub] for sub, _ in parts[n]]
+        if not subs:
+            finish(n)
+            continue
+        # 묶음 요청 스레드를 잡고 기다리지 않도록, 마지막 조각이 끝날 때 모은다
+        remaining = [len(subs)]
+        lock = threading.Lock()
+        def done(_, n=n, remaining=remaining, lock=lock):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last: finish(n)
+        for f in subs: f.add_done_callback(done)
+    return out
+
+def run_period_reports(client, property_id, specs, periods, max_workers=4, cache=None, ttl=3600):
+    if not specs: return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = submit_period_reports(executor, client, property_id, specs, periods, cache, ttl)
+        return {n: f.result() for n, f in futures.items()}
@@ -0,0 +1,133 @@
+import collections
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+# ----------------- 단계별 시간 측정 / 지표 내보내기 -----------------
+# 느린 로드가 GA4 조회 때문인지, 기사 크롤링 때문인지, pandas 집계 때문인지 구분할 수 있도록
+# 단계마다 span 을 남긴다.
+# - span(stage, **tags): 걸린 시간을 재서
+#     (1) 단계별 지표(횟수/합계/히스토그램)에 더하고
+#     (2) CNC_METRICS_LOG 가 있으면 JSON 한 줄로 로그에 남기고 ('-' 면 stderr, 아니면 파일 경로)
+#     (3) 지금 측정 중인 로드(trace)가 있으면 그 waterfall 에 넣는다
+# - count(name, value, **labels): 캐시 적중/미스, GA4 행 수/바이트 같은 누적 카운터
+# - trace(name, **tags): 로드 한 번. 끝나면 최근 MAX_TRACES 개를 프로세스에 보관하고 (대시보드 관리자 패널),
+#   CNC_METRICS_FILE 이 있으면 지표를 Prometheus 텍스트 형식으로 그 파일에 쓴다 (node_exporter textfile collector 용)
+# 스레드 풀에 넘기는 작업은 bind() 로 감싸야 같은 trace 에 남는다 (contextvars 는 다른 스레드로 따라가지 않는다)
+METRICS_LOG = os.environ.get("CNC_METRICS_LOG")
+METRICS_FILE = os.environ.get("CNC_METRICS_FILE")
+MAX_TRACES = 20
+# 단계별 소요 시간 히스토그램 구간 (초)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+logger = logging.getLogger("cnc.metrics")
+if METRICS_LOG:
+    _handler = logging.StreamHandler() if METRICS_LOG == "-" else logging.FileHandler(METRICS_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_lock = threading.Lock()
+# {(지표 이름, ((라벨, 값), ...)): 값}
+_counters = collections.defaultdict(float)
+# {단계: [구간별 횟수..., 합계, 횟수]}
+_stages = {}
+_traces = collections.deque(maxlen=MAX_TRACES)
+_current = contextvars.ContextVar("cnc_trace", default=None)
+
+def count(name, value=1, **labels):
+    with _lock: _counters[name, tuple(sorted(labels.items()))] += value
+
+def _observe(stage, sec):
+    with _lock:
+        h = _stages.setdefault(stage, [0] * len(BUCKETS) + [0.0, 0])
+        for i, le in enumerate(BUCKETS):
+            if sec <= le: h[i] += 1
+        h[-2] += sec
+        h[-1] += 1
+
+# tags 는 로그/waterfall 에만 남고 지표 라벨에는 들어가지 않는다 (라벨 수가 늘지 않게)
+# with span(...) as tags: 안에서 tags['rows'] = ... 처럼 끝난 뒤에 알게 된 값을 더할 수 있다
+@contextlib.contextmanager
+def span(stage, **tags):
+    tr = _current.get()
+    start = time.perf_counter()
+    try:
+        yield tags
+    except BaseException as e:
+        tags['error'] = type(e).__name__
+        raise
+    finally:
+        sec = time.perf_counter() - start
+        _observe(stage, sec)
+        if tr is not None:
+            tr['spans'].append({'stage': stage, 'start': start - tr['t0'], 'sec': sec, 'thread': threading.current_thread().name, **tags})
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'ts': time.time(), 'stage': stage, 'sec': round(sec, 6), 'trace': tr and tr['id'], **tags},
+                                   ensure_ascii=False, default=str))
+
+# 지금 trace 를 다른 스레드에서 실행할 함수에 붙인다 (pool.submit(bind(fn), ...))
+def bind(fn):
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+_ids = itertools.count(1)
+
+@contextlib.contextmanager
+def trace(name, **tags):
+    tr = {'id': next(_ids), 'name': name, 'at': time.time(), 't0': time.perf_counter(), 'spans': [], 'tags': tags}
+    token = _current.set(tr)
+    try:
+        # tr['tags'] 에 더한 값은 로드 전체 span 의 로그에도 남는다
+        with span(name, **tags) as tr['tags']: yield tr
+    finally:
+        _current.reset(token)
+        tr['sec'] = time.perf_counter() - tr['t0']
+        _traces.append(tr)
+        if METRICS_FILE: write_prometheus(METRICS_FILE)
+
+# 최근 로드부터 -> [{'id', 'name', 'at': 시작 시각(epoch), 'sec', 'tags', 'spans': [{'stage', 'start', 'sec', 'thread', ...태그}]}]
+def recent_traces(n=MAX_TRACES):
+    return list(_traces)[::-1][:n]
+
+def _escape(v):
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+# Prometheus 텍스트 형식 (text/plain; version=0.0.4)
+def render_prometheus():
+    with _lock:
+        counters = dict(_counters)
+        stages = {k: list(v) for k, v in _stages.items()}
+    lines = []
+    for name in sorted({n for n, _ in counters}):
+        lines.append(f"# TYPE cnc_{name}_total counter")
+        for (n, labels), v in sorted(counters.items()):
+            if n == name: lines.append(f"cnc_{name}_total{_labels(labels)} {v:g}")
+    if stages:
+        lines.append("# HELP cnc_stage_seconds 단계별 소요 시간")
+        lines.append("# TYPE cnc_stage_seconds histogram")
+        for stage, h in sorted(stages.items()):
+            for le, c in zip(BUCKETS, h):
+                lines.append(f"cnc_stage_seconds_bucket{_labels([('stage', stage), ('le', f'{le:g}')])} {c}")
+            lines.append(f"cnc_stage_seconds_bucket{_labels([('stage', stage), ('le', '+Inf')])} {h[-1]}")
+            lines.append(f"cnc_stage_seconds_sum{_labels([('stage', stage)])} {h[-2]:.6f}")
+            lines.append(f"cnc_stage_seconds_count{_labels([('stage', stage)])} {h[-1]}")
+    return "\n".join(lines) + "\n"
+
+# 다른 프로세스가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓰고 바꾼다
+def write_prometheus(path):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f: f.write(render_prometheus())
+        os.replace(tmp, path)
+    except OSError:
+        logger.warning("지표 파일을 쓰지 못했습니다: %s", path)
@@ -0,0 +1,108 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+import tomllib
+
+from google.oauth2 import service_account
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+
+from cnc_article_store import ArticleStore
+from cnc_cache import cache_from_url
+from cnc_crawler import ArticleCrawler
+from cnc_feed import FeedIndex
+from cnc_metrics import trace
+from cnc_report import PROPERTY_ID, build_weekly_report, get_sunday_to_saturday_ranges
+from cnc_snapshot import SnapshotStore
+
+# ----------------- 주간 보고서 사전 집계 작업 -----------------
+# 대시보드(cncnews_ww5)가 요청 중에 하던 GA4 조회 + 기사 크롤링 + 집계를 미리 실행해
+# 주차별 스냅샷(cnc_snapshot)으로 저장한다. 대시보드는 스냅샷이 있으면 그대로 읽는다.
+#
+# 사용법:
+#   python cnc_precompute.py                          # WEEK_MAP 의 12주 전체
+#   python cnc_precompute.py --weeks 2                # 최근 2주
+#   python cnc_precompute.py --weeks 42주차,41주차 --parallel 2 --property 370663478
+# 인증: --credentials <서비스 계정 JSON> > GOOGLE_APPLICATION_CREDENTIALS > .streamlit/secrets.toml 의 [ga4_credentials]
+#
+# 예약 실행 (cron): 이번주/지난주는 매시, 나머지는 하루 한 번
+#   5 * * * *  cd /srv/cncnews && .venv/bin/python cnc_precompute.py --weeks 2 >> .cache/precompute.log 2>&1
+#   20 4 * * * cd /srv/cncnews && .venv/bin/python cnc_precompute.py --parallel 3 >> .cache/precompute.log 2>&1
+# (systemd timer 라면 같은 명령을 ExecStart 로 두는 oneshot 서비스 + OnCalendar=hourly)
+SECRETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".streamlit", "secrets.toml")
+
+def load_credentials_info(path=None):
+    path = path or os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    if path:
+        with open(path, encoding="utf-8") as f: return json.load(f)
+    with open(SECRETS_PATH, "rb") as f: return tomllib.load(f)["ga4_credentials"]
+
+def make_ga4_client(credentials_path=None):
+    creds = service_account.Credentials.from_service_account_info(load_credentials_info(credentials_path))
+    return BetaAnalyticsDataClient(credentials=creds)
+
+# '2' -> 최근 2주, '42주차,41주차' (또는 '42,41') -> 해당 주차
+def select_weeks(week_map, weeks):
+    labels = list(week_map)
+    if not weeks: return labels
+    if weeks.isdigit() and int(weeks) <= len(labels) and f"{weeks}주차" not in week_map: return labels[:int(weeks)]
+    picked = []
+    for w in weeks.split(','):
+        w = w.strip()
+        if w and not w.endswith("주차"): w = f"{w}주차"
+        if w not in week_map: raise SystemExit(f"알 수 없는 주차: {w} (가능: {', '.join(labels)})")
+        picked.append(w)
+    return picked
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="주간 보고서 스냅샷 사전 집계")
+    ap.add_argument("--weeks", help="최근 N주(숫자) 또는 쉼표로 구분한 주차 라벨. 기본: 전체 12주")
+    ap.add_argument("--property", default=PROPERTY_ID, help="GA4 속성 ID")
+    ap.add_argument("--parallel", type=int, default=1, help="동시에 집계할 주차 수")
+    ap.add_argument("--credentials", help="서비스 계정 JSON 경로")
+    ap.add_argument("--snapshot-dir", help="스냅샷 저장 경로 (기본: CNC_SNAPSHOT_DIR 또는 .cache/snapshots)")
+    args = ap.parse_args(argv)
+
+    week_map = get_sunday_to_saturday_ranges()
+    weeks = select_weeks(week_map, args.weeks)
+    client = make_ga4_client(args.credentials)
+    snapshots = SnapshotStore(args.snapshot_dir) if args.snapshot_dir else SnapshotStore()
+    store, crawler = ArticleStore(), ArticleCrawler(per_host_limit=20, timeout=2)
+    feeds = FeedIndex(crawler)
+    # 주차 추이 리포트처럼 여러 주차가 같이 쓰는 GA4 리포트는 공유 캐시로 한 번만 조회
+    cache = cache_from_url()
+
+    def run(label):
+        t = time.perf_counter()
+        # 사전 집계는 시간 제약이 없으므로 전체 기사 색인에서 못 본 기사를 한 번에 다 크롤링하고, 크롤링도 끝까지 기다린다
+        # 주차마다 단계별 시간을 남긴다 (CNC_METRICS_LOG / CNC_METRICS_FILE)
+        with trace("precompute", week=label):
+            report = build_weekly_report(client, args.property, week_map, label, store, crawler, cache, index_crawl_limit=None, feeds=feeds, crawl_budget=None)
+        # 조회에 실패한 섹션이 있으면 빈 섹션이 든 스냅샷을 배포하지 않는다 (기존 스냅샷 유지)
+        if report['errors']: raise RuntimeError("GA4 조회 실패 - " + "; ".join(f"{k}: {v}" for k, v in report['errors'].items()))
+        # 기사 사이트 장애로 서킷 브레이커가 열려 예전 값/'미상'으로 집계한 보고서도 배포하지 않는다
+        if report['crawl_degraded']: raise RuntimeError(f"기사 사이트 응답 없음 - 기사 {report['crawl_degraded']}건의 정보를 가져오지 못함")
+        path = snapshots.save(args.property, week_map[label], report, week_map)
+        return label, time.perf_counter() - t, path
+
+    failed = 0
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.parallel)) as executor:
+            futures = {executor.submit(run, w): w for w in weeks}
+            for fut in concurrent.futures.as_completed(futures):
+                label = futures[fut]
+                try:
+                    _, sec, path = fut.result()
+                    print(f"[ok] {label} {week_map[label]} {sec:.1f}s -> {path}", flush=True)
+                except Exception as e:
+                    failed += 1
+                    print(f"[fail] {label} {week_map[label]}: {e}", file=sys.stderr, flush=True)
+    finally:
+        crawler.close()
+        store.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+
+from google.api_core import exceptions as gexc
+
+# ----------------- GA4 속성 쿼터 기반 동시 실행 제한 -----------------
+# 대시보드/사전 집계 작업의 모든 GA4 호출은 속성별 QuotaLimiter 를 거친다.
+# - 요청에 return_property_quota=True 를 넣고, 응답의 property_quota 로 남은 토큰/동시 요청 수를 추적
+# - 동시 실행 수는 AIMD 로 조절: 여유 있으면 조금씩 늘리고, 동시 요청 한도에 가깝거나 429 가 나면 절반으로
+# - 시간당 토큰이 바닥에 가까우면 하나씩 간격을 두고 보내고(대기열), 0 이면 바로 QuotaExhausted
+# - 429/503/타임아웃은 지수 백오프 후 재시도, 그 밖의 오류는 그대로 올린다
+MAX_CONCURRENCY = 10      # GA4 표준 속성의 동시 요청 한도
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+# 시간당 토큰이 이 비율 아래로 남으면 요청 사이에 PACE_DELAY 간격을 둔다
+LOW_TOKEN_RATIO = 0.1
+PACE_DELAY = 1.0
+# 토큰이 0 으로 보고되면 이 시간 동안은 보내지 않고 바로 실패 (그 뒤 다시 시도해 본다)
+EXHAUSTED_HOLD = 300
+RETRYABLE = (gexc.ResourceExhausted, gexc.TooManyRequests, gexc.ServiceUnavailable, gexc.DeadlineExceeded,
+             gexc.InternalServerError, gexc.Aborted, ConnectionError, TimeoutError)
+
+class QuotaExhausted(Exception):
+    pass
+
+# 응답(RunReportResponse / BatchRunReportsResponse) -> PropertyQuota 목록
+def response_quotas(response):
+    reports = getattr(response, "reports", None)
+    found = [r.property_quota for r in reports] if reports is not None else [getattr(response, "property_quota", None)]
+    return [q for q in found if q is not None and q.tokens_per_hour.consumed + q.tokens_per_hour.remaining > 0]
+
+class QuotaLimiter:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, initial=INITIAL_CONCURRENCY, min_concurrency=MIN_CONCURRENCY,
+                 retries=3, backoff=1.0, max_backoff=16.0, low_token_ratio=LOW_TOKEN_RATIO, pace_delay=PACE_DELAY):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.low_token_ratio = low_token_ratio
+        self.pace_delay = pace_delay
+        self.in_flight = 0
+        # 마지막으로 본 쿼터: {이름: (consumed, remaining)}
+        self.quota = {}
+        self.stats = {"calls": 0, "retries": 0, "throttled": 0, "errors": 0}
+        self._paused_until = 0.0
+        self._exhausted_until = 0.0
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._exhausted_until > time.monotonic():
+                    raise QuotaExhausted(f"GA4 속성 토큰 소진 (시간당/일일 남은 토큰: {self.quota['tokens_per_hour'][1]}/{self.quota['tokens_per_day'][1]})")
+                wait = self._paused_until - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self.in_flight < max(self.min_concurrency, int(self.limit)):
+                    self.in_flight += 1
+                    return
+                else:
+                    self._cond.wait()
+
+    def _release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def _pause(self, delay):
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    # 응답의 쿼터를 반영해 동시 실행 수/간격을 조절
+    def observe(self, quotas):
+        if not quotas: return
+        with self._cond:
+            for name in ("tokens_per_hour", "tokens_per_day", "concurrent_requests", "tokens_per_project_per_hour"):
+                # 같은 응답 안에서는 가장 적게 남은 값 기준
+                st = min((getattr(q, name) for q in quotas), key=lambda s: s.remaining)
+                self.quota[name] = (st.consumed, st.remaining)
+            consumed, remaining = self.quota["tokens_per_hour"]
+            if remaining <= 0 or self.quota["tokens_per_day"][1] <= 0:
+                self._exhausted_until = time.monotonic() + EXHAUSTED_HOLD
+            if remaining < (consumed + remaining) * self.low_token_ratio:
+                self.limit = self.min_concurrency
+                self._pause(self.pace_delay)
+                self.stats["throttled"] += 1
+            elif self.quota["concurrent_requests"][1] <= 1:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+            else:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _overloaded(self, attempt):
+        with self._cond:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self._pause(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            self.stats["retries"] += 1
+            self._cond.notify_all()
+
+    # fn(*args) 를 한도 안에서 실행. 재시도할 수 있는 오류는 백오프 후 다시 보내고, 마지막 오류는 그대로 올린다.
+    def call(self, fn, *args):
+        for attempt in range(self.retries + 1):
+            self._acquire()
+            try:
+                response = fn(*args)
+            except RETRYABLE:
+                self._release()
+                if attempt == self.retries:
+                    with self._cond: self.stats["errors"] += 1
+                    raise
+                self._overloaded(attempt)
+                continue
+            except BaseException:
+                self._release()
+                with self._cond: self.stats["errors"] += 1
+                raise
+            self._release()
+            with self._cond: self.stats["calls"] += 1
+            self.observe(response_quotas(response))
+            return response
+
+    def snapshot(self):
+        with self._cond:
+            return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "quota": dict(self.quota), **self.stats}
+
+_LIMITERS = {}
+_LIMITERS_LOCK = threading.Lock()
+
+# 속성별로 프로세스 안에서 하나를 같이 쓴다
+def get_limiter(property_id):
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(str(property_id))
+        if limiter is None: limiter = _LIMITERS[str(property_id)] = QuotaLimiter()
+        return limiter
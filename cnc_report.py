@@ -0,0 +1,539 @@
+import concurrent.futures
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from cnc_cache import make_key
+from cnc_metrics import bind, count, span
+from cnc_ga4 import PAGE_SIZE, describe_error, iter_report_pages, period_spec, report_error, run_report, submit_batch_reports, submit_period_reports
+from cnc_extract import ArticleExtractor
+from cnc_tables import TREND_COLS
+
+# ----------------- 주간 보고서 데이터 엔진 -----------------
+# cncnews_ww5 대시보드의 load_all_dashboard_data 가 하던 GA4 조회 + 기사 크롤링 + 집계를
+# Streamlit 없이 실행할 수 있게 분리한 모듈. 대시보드와 사전 집계 작업(cnc_precompute)이 함께 쓴다.
+PROPERTY_ID = "370663478"
+
+# build_weekly_report 결과의 키 (대시보드에서 이 순서로 풀어 쓴다)
+REPORT_FIELDS = ("cur_uv", "cur_pv", "df_daily", "df_weekly", "df_traffic_curr", "df_traffic_last",
+                 "df_region_curr", "df_region_last", "df_age_curr", "df_age_last", "df_gender_curr", "df_gender_last",
+                 "df_top10", "df_raw_all", "new_ratio", "search_ratio", "active_article_count", "df_articles", "articles_pending",
+                 "top_degraded", "articles_degraded")
+
+# GA4 리포트 이름 -> 화면에 표시할 섹션 이름 (조회 실패 안내용)
+SECTION_LABELS = {'summary': "성과 요약 KPI", 'daily': "일별 방문 추이", 'pages_count': "활성 기사 수", 'traffic': "접근 경로",
+                  'region': "지역", 'age': "연령", 'gender': "성별", 'top': "TOP 기사", 'top_hours': "TOP 기사 시간대별 조회수", 'week': "최근 3달 추이", 'articles': "전체 기사 색인"}
+
+# 보고서 구성(REPORT_FIELDS)이 바뀌면 올린다. 예전 구성으로 캐시된 보고서를 쓰지 않게 캐시 키에 들어간다
+REPORT_VERSION = 6
+
+# 공유 캐시(cnc_cache)에 둘 주차 보고서의 키. sections 가 있으면 그 섹션만 집계한 보고서 (탭별 지연 로딩)
+def weekly_report_key(property_id, week_map, selected_week, sections=None):
+    if sections is None: return make_key("weekly_report", REPORT_VERSION, property_id, week_map[selected_week], week_map)
+    return make_key("weekly_sections", REPORT_VERSION, property_id, week_map[selected_week], week_map, sorted(sections))
+
+def clean_author_name(name):
+    if not name: return "미상"
+    name = name.replace('#', '').replace('기자', '')
+    return ' '.join(name.split())
+
+# 기사 메타데이터에 꼭 있어야 하는 정적 필드 (하나라도 없으면 기사 페이지를 크롤링)
+INDEX_FIELDS = ("author", "category", "subcategory")
+# 정보를 가져오지 못한 기사(크롤링 실패, 마감 초과, 사이트 장애)의 값.
+# 실제 작성자/카테고리('관리자', '뉴스')와 섞여 기자/카테고리별 표가 틀어지지 않게 '미상'/'미분류' 로 따로 모은다
+ARTICLE_DEFAULTS = {'author': "미상", 'likes': 0, 'comments': 0, 'category': "미분류", 'subcategory': "미분류"}
+
+# '입력 2026.10.05 09:30' 같은 발행일 표기 -> 'YYYY-MM-DD HH:MM' (시각이 없으면 'YYYY-MM-DD'), 못 읽으면 None
+PUB_DATE_RE = re.compile(r'(\d{4})[.\-/]\s*(\d{1,2})[.\-/]\s*(\d{1,2})\.?(?:\s+(\d{1,2}):(\d{2}))?')
+
+def parse_pub_date(text):
+    m = PUB_DATE_RE.search(text or "")
+    if not m: return None
+    y, mo, d, h, mi = m.groups()
+    date = f"{y}-{int(mo):02d}-{int(d):02d}"
+    return f"{date} {int(h):02d}:{mi}" if h else date
+
+# 부분 추출 결과(cnc_extract) -> 기사 메타데이터
+# 작성자: .user-name > .writer > .byline > '기자' 가 들어간 짧은 span/div/li
+# 카테고리: .location/.breadcrumb/.path 의 2, 3번째 링크, 없으면 article:section
+# 발행일: .date > .regdate
+def build_article_meta(fields):
+    t = fields['texts']
+    author = clean_author_name(t.get('user-name') or t.get('writer') or t.get('byline') or fields['scanned_author'] or "관리자")
+    likes = int(t['sns-like-count'].replace(',', '')) if 'sns-like-count' in t else 0
+    comments = int(t['comment-count'].replace(',', '')) if 'comment-count' in t else 0
+    cat, subcat = "뉴스", "이슈"
+    breadcrumbs = fields['breadcrumbs']
+    if breadcrumbs:
+        if len(breadcrumbs) >= 2: cat = breadcrumbs[1]
+        if len(breadcrumbs) >= 3: subcat = breadcrumbs[2]
+    elif fields['section']: cat = fields['section']
+    pub_date = parse_pub_date(t.get('date')) or parse_pub_date(t.get('regdate'))
+    return {'author': author, 'likes': likes, 'comments': comments, 'category': cat, 'subcategory': subcat, 'pub_date': pub_date}
+
+# {주차 라벨: 'YYYY.MM.DD ~ YYYY.MM.DD'} (일~토, 최근 주부터)
+def get_sunday_to_saturday_ranges(count=12, today=None):
+    ranges = {}
+    today = today or datetime.now()
+    days_since_sunday = (today.weekday() + 1) % 7
+    last_sunday = today - timedelta(days=days_since_sunday)
+    for i in range(count):
+        start_date = last_sunday - timedelta(weeks=i)
+        end_date = start_date + timedelta(days=6)
+        label = f"{start_date.isocalendar()[1]}주차"
+        ranges[label] = f"{start_date.strftime('%Y.%m.%d')} ~ {end_date.strftime('%Y.%m.%d')}"
+    return ranges
+
+# ----------------- 기간 하나의 GA4 리포트 -> 보고서 값 -----------------
+# 주간 보고서(이번주/지난주)와 기간 비교(compare_periods)가 같이 쓴다. 받은 프레임은 고치지 않는다 (캐시에서 꺼낸 것일 수 있음).
+# 섹션 이름 -> 기간 없는 GA4 리포트 spec (cnc_ga4.period_spec 으로 기간을 붙임)
+PERIOD_SPECS = {
+    'summary': dict(dimensions=[], metrics=["activeUsers", "screenPageViews", "newUsers"]),
+    'traffic': dict(dimensions=["sessionSource"], metrics=["screenPageViews"]),
+    'region': dict(dimensions=["region"], metrics=["activeUsers"], order_by_metric="activeUsers", limit=50),
+    'age': dict(dimensions=["userAgeBracket"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+    'gender': dict(dimensions=["userGender"], metrics=["activeUsers"], order_by_metric="activeUsers"),
+}
+TREND_SPEC = dict(dimensions=[], metrics=["activeUsers", "screenPageViews"])
+
+# -> {'uv', 'pv', 'new_ratio'}
+def summary_values(df):
+    if not df.empty: uv, pv, new = int(df['activeUsers'].iloc[0]), int(df['screenPageViews'].iloc[0]), int(df['newUsers'].iloc[0])
+    else: uv, pv, new = 0, 0, 0
+    return {'uv': uv, 'pv': pv, 'new_ratio': round((new / uv * 100), 1) if uv > 0 else 0}
+
+def map_source(s):
+    s = s.lower()
+    if 'naver' in s: return '네이버'
+    if 'daum' in s: return '다음'
+    if 'facebook' in s: return '페이스북'
+    if '(direct)' in s: return '직접'
+    if 'google' in s: return '구글'
+    return '기타'
+
+# -> 유입경로, 조회수
+def shape_traffic(df):
+    df = df.assign(유입경로=df['sessionSource'].apply(map_source))
+    return df.groupby('유입경로')['screenPageViews'].sum().reset_index().rename(columns={'screenPageViews':'조회수'})
+
+SEARCH_ENGINES = ['네이버', '구글', '다음']
+
+def search_ratio(df_traffic):
+    search_pv = df_traffic[df_traffic['유입경로'].isin(SEARCH_ENGINES)]['조회수'].sum()
+    total_pv_traffic = df_traffic['조회수'].sum()
+    return round((search_pv / total_pv_traffic * 100), 1) if total_pv_traffic > 0 else 0
+
+def clean_and_group(df, col_name):
+    if df.empty: return pd.DataFrame(columns=['구분', 'activeUsers'])
+    df = df.assign(구분=df[col_name].replace({'(not set)': '기타', '': '기타', 'unknown': '기타'}).fillna('기타'))
+    return df.groupby('구분', as_index=False)['activeUsers'].sum()
+
+REGION_MAP = {'Seoul':'서울','Gyeonggi-do':'경기','Incheon':'인천','Busan':'부산','Daegu':'대구','Gyeongsangnam-do':'경남','Gyeongsangbuk-do':'경북','Chungcheongnam-do':'충남','Chungcheongbuk-do':'충북','Jeollanam-do':'전남','Jeollabuk-do':'전북','Gangwon-do':'강원','Daejeon':'대전','Gwangju':'광주','Ulsan':'울산','Jeju-do':'제주','Sejong-si':'세종'}
+
+# -> 구분, activeUsers (아래 셋 모두)
+def shape_region(df):
+    if not df.empty: df = df.assign(region_mapped=df['region'].map(REGION_MAP).fillna('기타'))
+    return clean_and_group(df, 'region_mapped')
+
+def shape_age(df):
+    if df.empty: return pd.DataFrame()
+    age = df['userAgeBracket'].astype(str).replace({'unknown': '기타', '(not set)': '기타'})
+    df = df.assign(구분=age.where(age == '기타', age + '세'))
+    return df[df['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum()
+
+def shape_gender(df):
+    if df.empty: return pd.DataFrame()
+    df = df.assign(구분=df['userGender'].map({'male': '남성', 'female': '여성'}))
+    return df.dropna(subset=['구분']).groupby('구분', as_index=False)['activeUsers'].sum()
+
+PERIOD_SHAPERS = {'summary': summary_values, 'traffic': shape_traffic, 'region': shape_region, 'age': shape_age, 'gender': shape_gender}
+
+# ----------------- TOP 기사 발행 후 시간대별 조회수 -----------------
+# 발행 시각부터 12/24/48시간 동안의 누적 조회수. TOP 10 기사만 dateHour x pagePath 리포트 한 번으로 조회한다
+TREND_HOURS = dict(zip(TREND_COLS, (12, 24, 48)))
+# 이보다 오래전에 발행된 기사는 조회하지 않는다 (시간대별 조회수 없음)
+TREND_LOOKBACK_DAYS = 14
+
+# 크롤링한 발행일(경로 -> 'YYYY-MM-DD HH:MM', 'YYYY-MM-DD' 또는 None) -> 발행 시각. 시각까지 있는 값만 쓴다
+# 'YYYY-MM-DD' 는 기사 페이지에 날짜만 있는 경우(parse_pub_date)로, 발행 시각을 모르는 기사로 보고 뺀다.
+# 발행일이 없는 기사도 시간대를 셀 기준이 없으므로 뺀다 (둘 다 표에는 '-'). 날짜만 있는 기사 수는 pub_date_untimed 로 센다
+def pub_timestamps(pub_dates):
+    s = pd.Series(pub_dates, dtype=object)
+    timed = pd.Series(pd.to_datetime(s, format='%Y-%m-%d %H:%M', errors='coerce').to_numpy(), index=s.index.astype(str))
+    date_only = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce').notna().to_numpy()
+    if date_only.any(): count("pub_date_untimed", int(date_only.sum()))
+    return timed.dropna()
+
+# 발행 시각(pub_times: 경로 -> Timestamp) -> 조회 기간 (시작일, 종료일). 종료일은 오늘을 넘지 않는다
+def hour_trend_range(pub_times, s_dt, today=None):
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    start = max(pub_times.min().normalize(), pd.Timestamp(s_dt) - timedelta(days=TREND_LOOKBACK_DAYS))
+    end = min(pub_times.max().normalize() + timedelta(hours=max(TREND_HOURS.values())), today)
+    return start.strftime('%Y-%m-%d'), max(start, end).strftime('%Y-%m-%d')
+
+# dateHour x pagePath 조회수 -> 경로별 TREND_COLS 누적 조회수 (발행 시각이 든 시간대부터 센다)
+# 기간 시작 전에 발행된 기사는 NaN (일부 시간대가 빠져 있으므로)
+def hour_trend_windows(df_hours, pub_times, start_date):
+    df = pd.DataFrame({'path': df_hours['pagePath'].astype(str), 'views': df_hours['screenPageViews'].to_numpy(),
+                       'hour': pd.to_datetime(df_hours['dateHour'].astype(str), format='%Y%m%d%H')})
+    df['age'] = (df['hour'] - df['path'].map(pub_times).dt.floor('h')) / pd.Timedelta(hours=1)
+    df = df[df['age'] >= 0].sort_values(['path', 'age'])
+    df['cum'] = df.groupby('path')['views'].cumsum()
+    out = pd.DataFrame({col: df[df['age'] < hours].groupby('path')['cum'].max() for col, hours in TREND_HOURS.items()},
+                       index=pub_times.index, columns=TREND_COLS).fillna(0)
+    out.loc[pub_times < pd.Timestamp(start_date)] = float('nan')
+    return out
+
+# ----------------- 기사 색인 -----------------
+# 기사 페이지로 보는 경로 (활성 기사 수와 전체 기사 색인이 같이 쓴다). 목록 페이지(articleList)는 색인에서 뺀다
+ARTICLE_PATH_RE = r'article|news|view|story'
+LIST_PATH_RE = r'articleList'
+# 보고서 한 번에 새로 크롤링할 최대 기사 수 (조회수 많은 순). 나머지는 다음 집계 때 이어서 색인한다
+INDEX_CRAWL_LIMIT = 100
+# 보고서 한 번에 기사 크롤링을 기다리는 최대 시간 (초). TOP 기사와 전체 기사 색인 크롤링을 합쳐서 센다
+CRAWL_BUDGET = 1.5
+# 보고서에서 빼는 자사 홍보 기사 (제목/작성자에 들어 있으면 제외)
+EXCLUDED_MARKERS = ('cook&chef', '쿡앤셰프')
+
+def excluded_mask(titles, authors):
+    mask = pd.Series(False, index=titles.index)
+    for col in (titles, authors):
+        norm = col.astype(str).str.lower().str.replace(' ', '', regex=False)
+        for marker in EXCLUDED_MARKERS: mask |= norm.str.contains(marker, regex=False)
+    return mask
+
+# 10000행에서 잘리지 않도록 페이지 단위로 받아 DataFrame 조각을 yield (호출 측에서 점진 집계)
+# first_page: 배치로 이미 받은 첫 페이지 (limit=PAGE_SIZE 로 요청한 것)
+# 중간에 실패하면 errors[name] 에 남기고 멈춘다
+def iter_pages(client, property_id, start_date, end_date, dimensions, metrics, first_page=None, errors=None, name=None):
+    try:
+        yield from iter_report_pages(client, property_id, start_date, end_date, dimensions, metrics, page_size=PAGE_SIZE, first_page=first_page)
+    except Exception as e:
+        if errors is not None: errors[name] = describe_error(e)
+
+# 한 주차의 보고서 데이터를 섹션 단위로 만든다.
+# GA4 묶음 요청을 한꺼번에 보내 두고, 섹션마다 필요한 리포트가 도착하는 대로 따로 집계해
+# 끝난 순서대로 {REPORT_FIELDS 의 키: 값} 을 yield 한다 (KPI 는 GA4 왕복 한 번이면 나오고, 크롤링이 필요한 TOP 기사는 마지막).
+# 마지막으로 {'generated_at': 집계 시각, 'errors': {섹션 이름: 오류}, 'crawl_pending': 마감까지 못 가져온 기사 수,
+#              'crawl_degraded': 서킷 브레이커가 열려 있어 요청하지 않은 기사 수} 를 yield 한다.
+#    errors 가 비어 있지 않으면 일부 섹션이 조회 실패로 비어 있는 것이므로 캐시/스냅샷으로 배포하지 않는다.
+#    crawl_pending 이 0 이 아니면 일부 기사 정보가 기본값이므로 역시 캐시하지 않는다 (백그라운드 크롤링이 끝나면 다음 집계에 반영).
+#    crawl_degraded 가 0 이 아니면 기사 사이트 장애로 저장소의 예전 값(없으면 '미상')을 쓴 것이므로 역시 캐시하지 않는다.
+#    top_degraded / articles_degraded: 그 섹션에서 이렇게 예전 값이나 '미상'으로 집계한 기사 수 (화면에서 섹션별로 안내)
+# store: cnc_article_store.ArticleStore, crawler: cnc_crawler.ArticleCrawler
+# cache: cnc_cache.DataCache (GA4 리포트 단위 공유 캐시. 주차 추이 리포트는 다른 주차 보고서와 같이 쓴다)
+# progress(비율, 메시지): 섹션이 끝날 때마다 진행 상황 알림 (대시보드 진행 표시줄용, 호출한 스레드에서 부른다)
+# sections: 만들 섹션 이름 목록 (SECTION_LABELS 의 키). None 이면 전체. 필요 없는 섹션의 GA4 조회/크롤링은 하지 않는다.
+# index_crawl_limit: 전체 기사 색인에서 이번에 새로 크롤링할 최대 기사 수 (None 이면 전부, 사전 집계 작업용)
+# feeds: cnc_feed.FeedIndex. 있으면 전체 기사 색인은 사이트맵/RSS 목록에서 먼저 찾고, 없는 기사만 크롤링한다
+# crawl_budget: 기사 크롤링을 기다리는 최대 시간 (초, None 이면 끝까지 기다림). 조회수 순으로 크롤링해 그때까지 가져온 정보로 집계하고,
+#               나머지는 백그라운드에서 마저 가져와 저장소에 넣는다
+def iter_weekly_report(client, property_id, week_map, selected_week, store, crawler, cache=None, progress=None, sections=None,
+                       index_crawl_limit=INDEX_CRAWL_LIMIT, feeds=None, crawl_budget=CRAWL_BUDGET):
+    progress = progress or (lambda frac, msg="": None)
+    dr = week_map[selected_week]
+    parts = dr.split(' ~ ')
+    s_dt, e_dt = parts[0].replace('.', '-'), parts[1].replace('.', '-')
+    ls_dt = (datetime.strptime(s_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
+    le_dt = (datetime.strptime(e_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
+
+    # 0. GA4 리포트 일괄 요청 (batchRunReports, 5개씩 묶음)
+    # 크롤링까지 해야 하는 top 은 첫 묶음에 넣어 가장 먼저 출발시킨다
+    def week_dates(date_str):
+        w_parts = date_str.split(' ~ ')
+        return w_parts[0].replace('.', '-'), w_parts[1].replace('.', '-')
+
+    trend_weeks = list(week_map.items())[:12]
+    specs = {
+        'summary': period_spec(PERIOD_SPECS['summary'], s_dt, e_dt),
+        'top': dict(start_date=s_dt, end_date=e_dt, dimensions=["pageTitle", "pagePath"], metrics=["screenPageViews", "activeUsers", "userEngagementDuration", "bounceRate"], order_by_metric="screenPageViews", limit=100),
+        'daily': dict(start_date=s_dt, end_date=e_dt, dimensions=["date"], metrics=["activeUsers", "screenPageViews"]),
+        'pages_count': dict(start_date=s_dt, end_date=e_dt, dimensions=["pagePath"], metrics=["screenPageViews"], limit=PAGE_SIZE),
+        'articles': dict(start_date=s_dt, end_date=e_dt, dimensions=["pagePath", "pageTitle"], metrics=["screenPageViews"], order_by_metric="screenPageViews", limit=PAGE_SIZE),
+    }
+    # 이번주/지난주 비교 섹션과 12주 추이는 기간별로 캐시된다 (cnc_ga4.submit_period_reports).
+    # 지난주는 보통 지난주 보고서의 '이번주' 로 이미 캐시에 있어 이번주만 조회하고, 추이도 새 주차만 조회한다.
+    compare_ranges = [(s_dt, e_dt, 'curr'), (ls_dt, le_dt, 'last')]
+    compare_specs = {n: PERIOD_SPECS[n] for n in ('traffic', 'region', 'age', 'gender')}
+    trend_ranges = [(*week_dates(dstr), wl) for wl, dstr in trend_weeks]
+
+    errors = {}
+    # 리포트가 도착할 때까지 기다렸다가 반환 (실패했으면 errors 에 섹션 이름으로 남김)
+    # 기다린 시간은 ga4.wait 로 따로 남겨, 섹션 시간에서 빼면 집계(pandas) 시간이 된다
+    def report(name):
+        with span("ga4.wait", report=name): df = futures[name].result()
+        err = report_error(df)
+        if err: errors.setdefault(SECTION_LABELS[name], err)
+        return df
+    # -> {기간 이름: DataFrame}
+    def period_reports(name):
+        with span("ga4.wait", report=name): frames = period_futures[name].result()
+        for df in frames.values():
+            err = report_error(df)
+            if err: errors.setdefault(SECTION_LABELS[name], err)
+        return frames
+    def compare(name):
+        frames = period_reports(name)
+        return frames['curr'], frames['last']
+
+    # 1. KPI
+    def summary():
+        values = summary_values(report('summary'))
+        return {"cur_uv": values['uv'], "cur_pv": values['pv'], "new_ratio": values['new_ratio']}
+
+    # 2. 일별 데이터
+    def daily():
+        df_daily = report('daily')
+        if not df_daily.empty:
+            df_daily = df_daily.rename(columns={'date':'날짜', 'activeUsers':'UV', 'screenPageViews':'PV'})
+            df_daily['날짜'] = pd.to_datetime(df_daily['날짜']).dt.strftime('%m-%d')
+        return {"df_daily": df_daily}
+
+    # 3. 3개월 추이
+    def week():
+        results = []
+        for wl, res in period_reports('week').items():
+            if not res.empty:
+                results.append({
+                    '주차': wl, 
+                    'UV': int(res['activeUsers'][0]), 
+                    'PV': int(res['screenPageViews'][0])
+                })
+        
+        df_weekly = pd.DataFrame(results)
+        if not df_weekly.empty:
+            df_weekly['week_num'] = df_weekly['주차'].apply(lambda x: int(re.search(r'\d+', x).group()))
+            df_weekly = df_weekly.sort_values('week_num')
+        return {"df_weekly": df_weekly}
+    
+    # 활성 기사 수 (첫 페이지는 배치 결과, 나머지 페이지는 이어 받아 조각별로 셈)
+    def pages_count():
+        article_paths, other_paths = 0, 0
+        for df_pages_count in iter_pages(client, property_id, s_dt, e_dt, ["pagePath"], ["screenPageViews"], first_page=report('pages_count'),
+                                      errors=errors, name=SECTION_LABELS['pages_count']):
+            if df_pages_count.empty: continue
+            mask_article = df_pages_count['pagePath'].str.contains(ARTICLE_PATH_RE, case=False, regex=True, na=False)
+            article_paths += int(mask_article.sum())
+            other_paths += int((df_pages_count['pagePath'].str.len() > 1).sum())
+        return {"active_article_count": article_paths if article_paths else other_paths}
+
+    # 4. 유입경로
+    def traffic():
+        df_t_raw, df_tl_raw = compare('traffic')
+        df_traffic_curr = shape_traffic(df_t_raw)
+        return {"df_traffic_curr": df_traffic_curr, "df_traffic_last": shape_traffic(df_tl_raw), "search_ratio": search_ratio(df_traffic_curr)}
+
+    # 5. 방문자 특성
+    def region():
+        d_rc, d_rl = compare('region')
+        return {"df_region_curr": shape_region(d_rc), "df_region_last": shape_region(d_rl)}
+
+    def age():
+        d_ac, d_al = compare('age')
+        return {"df_age_curr": shape_age(d_ac), "df_age_last": shape_age(d_al)}
+
+    def gender():
+        d_gc, d_gl = compare('gender')
+        return {"df_gender_curr": shape_gender(d_gc), "df_gender_last": shape_gender(d_gl)}
+
+    # 기사 메타데이터를 열로 붙인다 (작성자/좋아요/댓글/카테고리/세부카테고리). 발행일 목록을 같이 돌려준다
+    def attach_meta(df, meta):
+        paths = df['pagePath'].tolist()
+        scraped_data = [{**ARTICLE_DEFAULTS, **meta.get(p, {})} for p in paths]
+        auths, lks, cmts, cats, subcats = zip(*[(m['author'], m['likes'], m['comments'], m['category'], m['subcategory']) for m in scraped_data])
+        df['작성자'] = auths; df['좋아요'] = lks; df['댓글'] = cmts
+        df['카테고리'] = cats; df['세부카테고리'] = subcats
+        return [m.get('pub_date') for m in scraped_data]
+
+    # 크롤링 마감 시각: 처음 크롤링을 시작할 때 정한다 (GA4 조회 시간은 세지 않음)
+    crawl_deadline = []
+    late_paths = set()
+    # 서킷 브레이커가 열려 있어 요청하지 않은 기사 (실패로 남기지 않고, 저장된 값이 있으면 그 값을 쓴다)
+    skipped_paths = set()
+
+    # 크롤링 결과에 GA4 의 기사 제목을 붙여 저장소에 같이 남긴다 (색인: 경로 -> 제목/작성자/카테고리/세부카테고리/발행일)
+    # 마감까지 못 가져온 기사는 결과에서 빠지고, 백그라운드에서 끝나는 대로 저장소에 넣는다
+    def crawl_articles(df):
+        titles = dict(zip(df['pagePath'], df['pageTitle']))
+        with_title = lambda p, rec: rec and {**rec, 'title': titles[p]}
+        def late(p, rec):
+            if rec is None: store.mark_failed(p)
+            else: store.save(p, with_title(p, rec))
+        def fetch(ps):
+            budget = None
+            if crawl_budget is not None:
+                if not crawl_deadline: crawl_deadline.append(time.monotonic() + crawl_budget)
+                budget = crawl_deadline[0] - time.monotonic()
+            # TOP 기사 크롤링에서 마감을 넘겨 아직 가져오는 중인 기사는 다시 요청하지 않는다
+            todo = [p for p in ps if p not in late_paths]
+            with span("crawl", paths=len(todo), budget=budget) as tags:
+                fetched = crawler.crawl_extract(todo, ArticleExtractor, build_article_meta, budget, late, skipped_paths.add)
+                overdue = [p for p in todo if p not in fetched and p not in skipped_paths]
+                tags.update(ok=sum(rec is not None for rec in fetched.values()), failed=sum(rec is None for rec in fetched.values()),
+                            late=len(overdue), skipped=len(todo) - len(fetched) - len(overdue))
+            for result in ("ok", "failed", "late", "skipped"): count("crawl_paths", tags[result], result=result)
+            late_paths.update(overdue)
+            return {p: with_title(p, rec) for p, rec in fetched.items()}
+        return fetch
+    # TOP 기사 크롤링이 끝난 뒤 색인을 만들어, 같은 기사를 두 번 긁지 않게 한다
+    top_crawled = threading.Event()
+
+    # 6. TOP 10 및 크롤링
+    def top():
+        try: return top_articles()
+        finally: top_crawled.set()
+
+    def top_articles():
+        df_raw_top = report('top')
+        
+        if not df_raw_top.empty:
+            meta = store.get_or_crawl(df_raw_top['pagePath'].tolist(), crawl_articles(df_raw_top), static_fields=INDEX_FIELDS)
+            pub_dates = attach_meta(df_raw_top, meta)
+            # 발행일시 열은 표시용 (없으면 주 시작일). 시간대별 조회수는 크롤링한 발행 시각으로만 센다
+            crawled_pub = dict(zip(df_raw_top['pagePath'].astype(str), pub_dates))
+            df_raw_top['발행일시'] = [d or s_dt for d in pub_dates]
+            
+            df_raw_all = df_raw_top[~excluded_mask(df_raw_top['pageTitle'], df_raw_top['작성자'])].copy()
+            
+            df_top10 = df_raw_all.sort_values('screenPageViews', ascending=False).head(10)
+            df_top10['순위'] = range(1, len(df_top10)+1)
+            df_top10 = df_top10.rename(columns={'pageTitle': '제목', 'pagePath': '경로', 'screenPageViews': '전체조회수', 'activeUsers': '전체방문자수', 'userEngagementDuration': '평균체류시간', 'bounceRate': '이탈률'})
+            
+            def format_duration(sec):
+                m, s = divmod(int(sec), 60)
+                return f"{m}분 {s}초"
+            df_top10['체류시간_fmt'] = df_top10['평균체류시간'].apply(format_duration)
+            df_top10['신규방문자비율'] = f"{summary()['new_ratio']}%"
+            df_top10 = df_top10.join(top_hour_trends(df_top10, crawled_pub), on=df_top10['경로'].astype(str))
+            top_degraded = int(df_top10['경로'].isin(skipped_paths).sum())
+        else: 
+            df_top10 = pd.DataFrame()
+            df_raw_all = pd.DataFrame()
+            top_degraded = 0
+        return {"df_top10": df_top10, "df_raw_all": df_raw_all, "top_degraded": top_degraded}
+
+    # TOP 10 기사의 발행 후 12/24/48시간 조회수 (GA4 요청 1회, 리포트 캐시 사용)
+    # 크롤링한 발행 시각이 없는 기사는 결과에 없으므로 join 뒤 NaN
+    def top_hour_trends(df_top10, crawled_pub):
+        pub_times = pub_timestamps({p: crawled_pub.get(p) for p in df_top10['경로'].astype(str)})
+        if pub_times.empty: return pd.DataFrame(columns=TREND_COLS, dtype=float)
+        start, end = hour_trend_range(pub_times, s_dt)
+        df_hours = run_report(client, property_id, start, end, ["dateHour", "pagePath"], ["screenPageViews"], limit=PAGE_SIZE, cache=cache,
+                              dimension_filter={'pagePath': sorted(pub_times.index)})
+        err = report_error(df_hours)
+        if err:
+            errors.setdefault(SECTION_LABELS['top_hours'], err)
+            return pd.DataFrame(index=pub_times.index, columns=TREND_COLS, dtype=float)
+        return hour_trend_windows(df_hours, pub_times, start)
+
+    # 7. 전체 기사 색인: 이번주 조회된 모든 기사 (카테고리/기자별 분석용)
+    # 저장소에 없는 기사만 조회수 순으로 index_crawl_limit 개까지 크롤링하고, 한 번 색인한 기사는 다시 긁지 않는다.
+    # 좋아요/댓글은 마지막으로 크롤링했을 때 값 (TOP 기사는 방금 갱신한 값). 아직 색인하지 못한 기사는 빼고 그 수를 articles_pending 으로 알린다.
+    def articles():
+        pieces = [df for df in iter_pages(client, property_id, s_dt, e_dt, ["pagePath", "pageTitle"], ["screenPageViews"], first_page=report('articles'),
+                                          errors=errors, name=SECTION_LABELS['articles']) if not df.empty]
+        if not pieces: return {"df_articles": pd.DataFrame(), "articles_pending": 0, "articles_degraded": 0}
+        df = pd.concat(pieces, ignore_index=True)
+        path = df['pagePath'].astype(str)
+        df = df[path.str.contains(ARTICLE_PATH_RE, case=False, regex=True) & ~path.str.contains(LIST_PATH_RE, case=False, regex=True)]
+        # 같은 경로의 제목이 여러 개면 조회수가 가장 많은 제목
+        df = (df.sort_values('screenPageViews', ascending=False, kind='stable')
+                .groupby('pagePath', sort=False).agg(pageTitle=('pageTitle', 'first'), screenPageViews=('screenPageViews', 'sum'))
+                .reset_index().sort_values('screenPageViews', ascending=False, kind='stable'))
+        if 'top' in builders: top_crawled.wait()
+        paths = df['pagePath'].tolist()
+        # 아직 색인하지 않은 기사 중 사이트맵/RSS 목록에 있는 기사는 그 값으로 먼저 채우고, 나머지만 크롤링 (크롤링 상한에 세지 않는다)
+        if feeds is not None:
+            _, unseen = store.lookup(paths, INDEX_FIELDS, need_dynamic=False, static_ttl=float('inf'))
+            for p, rec in feeds.lookup(unseen, INDEX_FIELDS).items(): store.save(p, rec)
+        meta = store.get_or_crawl(paths, crawl_articles(df), static_fields=INDEX_FIELDS,
+                                  need_dynamic=False, limit=index_crawl_limit, static_ttl=float('inf'))
+        indexed = df['pagePath'].isin(list(meta))
+        df_articles = df[indexed].copy()
+        if not df_articles.empty:
+            attach_meta(df_articles, meta)
+            df_articles = df_articles[~excluded_mask(df_articles['pageTitle'], df_articles['작성자'])].reset_index(drop=True)
+        return {"df_articles": df_articles, "articles_pending": int((~indexed).sum()),
+                "articles_degraded": int(df['pagePath'].isin(skipped_paths).sum())}
+
+    # 섹션 하나를 만드는 데 걸린 시간 (리포트/크롤링 대기 포함)
+    def timed(name, fn):
+        with span(f"section.{name}"): return fn()
+
+    builders = {'summary': summary, 'daily': daily, 'week': week, 'pages_count': pages_count, 'traffic': traffic,
+                'region': region, 'age': age, 'gender': gender, 'top': top, 'articles': articles}
+    if sections is not None: builders = {n: fn for n, fn in builders.items() if n in sections}
+    # top 은 신규 방문자 비율 때문에 summary 리포트도 쓴다
+    needed = set(builders) | ({'summary'} if 'top' in builders else set())
+    specs = {n: spec for n, spec in specs.items() if n in needed}
+    compare_specs = {n: spec for n, spec in compare_specs.items() if n in needed}
+    progress(0.05, "GA4 리포트 조회 중")
+    # GA4 묶음 요청과 섹션 집계는 서로 다른 풀에서 돌려, 리포트를 기다리는 섹션이 요청 스레드를 잡지 않게 한다
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ga4_pool, \
+         concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(builders))) as section_pool:
+        futures = submit_batch_reports(ga4_pool, client, property_id, specs, cache=cache)
+        period_futures = submit_period_reports(ga4_pool, client, property_id, compare_specs, compare_ranges, cache=cache)
+        if 'week' in needed: period_futures.update(submit_period_reports(ga4_pool, client, property_id, {'week': TREND_SPEC}, trend_ranges, cache=cache))
+        pending = {section_pool.submit(bind(timed), name, fn): name for name, fn in builders.items()}
+        for done, fut in enumerate(concurrent.futures.as_completed(pending), 1):
+            values = fut.result()
+            progress(0.05 + 0.95 * done / len(pending), f"{SECTION_LABELS[pending[fut]]} 완료")
+            yield values
+    yield {"generated_at": datetime.now(), "errors": errors, "crawl_pending": len(late_paths), "crawl_degraded": len(skipped_paths)}
+
+# 한 주차의 보고서 데이터 전체를 만든다 (iter_weekly_report 결과를 모은 것).
+# -> {REPORT_FIELDS 의 키: 값, 'generated_at': 집계 시각, 'errors': {섹션 이름: 오류}}
+def build_weekly_report(client, property_id, week_map, selected_week, store, crawler, cache=None, progress=None, sections=None,
+                        index_crawl_limit=INDEX_CRAWL_LIMIT, feeds=None, crawl_budget=CRAWL_BUDGET):
+    report = {}
+    for values in iter_weekly_report(client, property_id, week_map, selected_week, store, crawler, cache, progress, sections,
+                                     index_crawl_limit, feeds, crawl_budget): report.update(values)
+    return report
+
+# ----------------- 기간 비교 -----------------
+# 주간 보고서의 '이번주 vs 지난주' 를 임의 기간 목록으로 넓힌 것 (전월 대비, 전년 동기 대비, 직접 지정한 기간 등).
+# 기간: (시작일 'YYYY-MM-DD', 종료일, 이름). 첫 기간이 기준이고 cnc_tables.period_share_table 로 표를 만든다.
+def to_period(start, end, name=None):
+    s, e = pd.Timestamp(start).strftime('%Y-%m-%d'), pd.Timestamp(end).strftime('%Y-%m-%d')
+    return (s, e, name or f"{s} ~ {e}")
+
+# 주차 라벨들 -> 기간 (week_map 의 'YYYY.MM.DD ~ YYYY.MM.DD')
+def week_periods(week_map, labels=None):
+    return [to_period(*(d.replace('.', '-') for d in week_map[wl].split(' ~ ')), wl) for wl in (labels or list(week_map))]
+
+# year 년 month 월부터 count 개월 (최근 달부터). 이번 달이면 오늘까지
+def month_periods(year, month, count=2, today=None):
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    periods = []
+    for i in range(count):
+        start = pd.Timestamp(year=year, month=month, day=1) - pd.DateOffset(months=i)
+        end = min(start + pd.offsets.MonthEnd(0), today)
+        periods.append(to_period(start, end, start.strftime('%Y-%m')))
+    return periods
+
+# 같은 날짜 범위를 1년씩 앞당겨 count 개 (전년 동기 대비)
+def year_over_year(start, end, count=2):
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    return [to_period(start - pd.DateOffset(years=i), end - pd.DateOffset(years=i), str((start - pd.DateOffset(years=i)).year)) for i in range(count)]
+
+# periods 전체를 섹션별로 조회해 집계한다. 기간 N개는 섹션마다 ceil(N/4) 개 요청으로 묶이고
+# (섹션들은 batchRunReports 로 다시 묶임), 이미 캐시에 있는 기간(주간 보고서가 조회한 주차 등)은 다시 조회하지 않는다.
+# sections: PERIOD_SPECS 의 키 목록 (기본: 전체)
+# -> {'periods': [기간 이름], 'sections': {섹션: {기간 이름: 값}}, 'errors': {'섹션 (기간)': 오류}, 'generated_at': 집계 시각}
+#    값: summary 는 {'uv', 'pv', 'new_ratio'}, 나머지는 DataFrame (traffic: 유입경로/조회수, 그 외: 구분/activeUsers)
+def compare_periods(client, property_id, periods, sections=None, cache=None, ttl=3600):
+    specs = {n: spec for n, spec in PERIOD_SPECS.items() if sections is None or n in sections}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as ga4_pool:
+        futures = submit_period_reports(ga4_pool, client, property_id, specs, periods, cache=cache, ttl=ttl)
+        frames = {n: f.result() for n, f in futures.items()}
+    errors, values = {}, {}
+    for n, by_period in frames.items():
+        values[n] = {}
+        for p, df in by_period.items():
+            err = report_error(df)
+            if err: errors.setdefault(f"{SECTION_LABELS[n]} ({p})", err)
+            values[n][p] = PERIOD_SHAPERS[n](df)
+    return {'periods': [p[2] for p in periods], 'sections': values, 'errors': errors, 'generated_at': datetime.now()}
@@ -0,0 +1,72 @@
+import glob
+import os
+import pickle
+import time
+
+from cnc_cache import make_key
+
+# ----------------- 주간 보고서 스냅샷 저장소 -----------------
+# 사전 집계 작업(cnc_precompute)이 만든 주차별 보고서 데이터를 파일로 저장하고,
+# 대시보드는 GA4/크롤링 없이 이 파일만 읽어 화면을 그린다.
+# 경로: <root>/<property>/<시작일>-<종료일>/<집계시각>.v<버전>.pkl
+# - 집계할 때마다 새 파일을 쓰고(os.replace 로 원자적 교체) 최근 keep 개만 남긴다.
+# - SNAPSHOT_VERSION 이 다른 파일(데이터 구조가 바뀌기 전 스냅샷)은 읽지 않는다.
+# - 최근 12주 추이(df_weekly)가 주차 목록(week_map)에 따라 달라지므로, 저장할 때의 week_map 지문이
+#   읽는 쪽과 다른 스냅샷(일요일에 주차가 넘어가기 전에 집계한 것)도 읽지 않는다.
+SNAPSHOT_VERSION = 6
+DEFAULT_SNAPSHOT_DIR = os.environ.get("CNC_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "snapshots"))
+# 이보다 오래된 스냅샷은 무시하고 대시보드가 직접 집계
+MAX_AGE = int(os.environ.get("CNC_SNAPSHOT_MAX_AGE", 24 * 3600))
+KEEP = 5
+
+# 'YYYY.MM.DD ~ YYYY.MM.DD' -> 'YYYYMMDD-YYYYMMDD'
+def period_key(period):
+    s, e = period.split(' ~ ')
+    return f"{s.replace('.', '')}-{e.replace('.', '')}"
+
+def week_map_key(week_map):
+    return make_key("week_map", week_map)
+
+class SnapshotStore:
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR, max_age=MAX_AGE, keep=KEEP):
+        self.root = root
+        self.max_age = max_age
+        self.keep = keep
+
+    def _dir(self, property_id, period):
+        return os.path.join(self.root, str(property_id), period_key(period))
+
+    def _files(self, property_id, period):
+        # 파일 이름이 집계 시각(ms)으로 시작하므로 이름순 = 시간순
+        return sorted(glob.glob(os.path.join(self._dir(property_id, period), f"*.v{SNAPSHOT_VERSION}.pkl")))
+
+    # report: cnc_report.build_weekly_report 결과, week_map: 그 보고서를 집계할 때 쓴 주차 목록 -> 저장한 파일 경로
+    def save(self, property_id, period, report, week_map, now=None):
+        now = time.time() if now is None else now
+        d = self._dir(property_id, period)
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, f"{int(now * 1000)}.v{SNAPSHOT_VERSION}.pkl")
+        payload = {"version": SNAPSHOT_VERSION, "property_id": str(property_id), "period": period, "week_map": week_map_key(week_map),
+                   "saved_at": now, "report": report}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        for old in self._files(property_id, period)[:-self.keep]:
+            try: os.remove(old)
+            except OSError: pass
+        return path
+
+    # 가장 최근 스냅샷의 report (없거나 max_age 보다 오래됐거나 읽을 수 없거나 week_map 이 다르면 None)
+    def load(self, property_id, period, week_map, max_age=None, now=None):
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time() if now is None else now
+        for path in reversed(self._files(property_id, period)):
+            try:
+                with open(path, "rb") as f: payload = pickle.load(f)
+            except Exception:
+                continue
+            if payload.get("version") != SNAPSHOT_VERSION or payload.get("week_map") != week_map_key(week_map): continue
+            if max_age and now - payload["saved_at"] > max_age: return None
+            return payload["report"]
+        return None
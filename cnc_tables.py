@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+# ----------------- 보고서 표 (대시보드/PDF 공용) -----------------
+# cncnews_ww5 의 render_* 함수와 PDF 내보내기(cnc_export)가 같은 표를 그리도록
+# 보고서 값(cnc_report.build_weekly_report 결과) -> 화면에 보여 줄 DataFrame 변환을 여기에 모았다.
+PEN_NAMES = [{'필명':'맛객', '본명':'이경엽'}, {'필명':'Chef J', '본명':'조용수'}, {'필명':'푸드헌터', '본명':'김철호'}, {'필명':'Dr.Kim', '본명':'안정미'}]
+TREND_COLS = ['12시간', '24시간', '48시간']
+
+# -> [(이름, 표시 값, 단위)]. 아직 집계 중인 값(None)은 표시 값도 None
+def kpi_items(cur_pv, cur_uv, new_ratio, search_ratio, active_article_count):
+    pv_per_user = (round(cur_pv/cur_uv, 1) if cur_uv > 0 else 0) if cur_pv is not None and cur_uv is not None else None
+    # '지난 7일 간' 추가
+    kpis = [("활성 기사 수", active_article_count, "건"), ("지난 7일 간 주간 전체 조회수(PV)", cur_pv, "건"), ("지난 7일 간 주간 총 방문자수(UV)", cur_uv, "명"),
+            ("방문자당 페이지뷰", pv_per_user, "건"), ("신규 방문자 비율", new_ratio, "%"), ("검색 유입 비율", search_ratio, "%")]
+    items = []
+    for l, v, u in kpis:
+        if v is None: v_f = None
+        else: v_f = f"{v:,}" if isinstance(v, (int, np.integer, float)) and l not in ["방문자당 페이지뷰", "신규 방문자 비율", "검색 유입 비율"] else str(v)
+        items.append((l, v_f, u))
+    return items
+
+# 값 큰 순서, '기타' 는 맨 뒤. -> 그 순서의 위치 배열
+def other_last_order(keys, values):
+    return np.lexsort((-np.asarray(values, dtype=float), np.asarray(keys) == '기타'))
+
+# 도넛 차트용: '기타' 를 맨 뒤로
+def order_other_last(df, values):
+    if '구분' not in df.columns: return df
+    return df.iloc[other_last_order(df['구분'].to_numpy(), df[values].to_numpy())]
+
+# ----------------- 이번주 vs 지난주 비교 표 -----------------
+# 유입경로/지역/연령/성별 표가 같이 쓰는 비교 엔진: (이번주, 지난주) 차원별 집계 -> 비중, 변화, 정렬을 한 번에 계산한 숫자 표.
+# 셀마다 문자열을 만들지 않고 표시 형식은 열 단위 printf 형식(*_FORMATS)으로 넘긴다.
+# 대시보드는 st.column_config.NumberColumn(format=...), PDF 는 format_columns 로 문자열 표를 만든다.
+SHARE_COLS = ('이번주(%)', '지난주(%)', '변화(%p)')
+SHARE_FORMATS = {'이번주(%)': '%.1f%%', '지난주(%)': '%.1f%%', '변화(%p)': '%+.1f%%p'}
+TRAFFIC_SHARE_COLS = ('이번주 비중', '지난주 비중', '비중 변화')
+TRAFFIC_SHARE_FORMATS = {'이번주 비중': '%.1f', '지난주 비중': '%.1f', '비중 변화': '%+.1f%%p'}
+
+# frames: 기간별 차원 집계 목록 (첫 번째가 기준) -> (항목, 값 행렬[항목 x 기간], 비중 행렬(%, 소수 첫째 자리))
+# how='left': 기준 기간 항목 기준 (다른 기간에 없으면 0), 'inner': 모든 기간에 있는 항목만. 비중은 표에 남은 항목 합 기준
+def share_matrix(frames, key, value, how='left'):
+    series = [df.set_index(key)[value] if not df.empty else pd.Series(dtype=float) for df in frames]
+    idx = series[0].index
+    if how == 'inner':
+        for ser in series[1:]: idx = idx.intersection(ser.index, sort=False)
+    values = np.column_stack([ser.reindex(idx).fillna(0).to_numpy(dtype=float) for ser in series]) if len(idx) else np.zeros((0, len(series)))
+    totals = values.sum(axis=0)
+    shares = np.round(np.divide(values * 100, totals, out=np.zeros_like(values), where=totals > 0), 1)
+    return idx.to_numpy(), values, shares
+
+# order=True 면 이번주 값 큰 순서 + '기타' 맨 뒤, False 면 이번주 표 순서 그대로
+def compare_shares(df_curr, df_last, key='구분', value='activeUsers', how='left', order=True, cols=SHARE_COLS):
+    keys, values, shares = share_matrix([df_curr, df_last], key, value, how)
+    pos = other_last_order(keys, values[:, 0]) if order else np.arange(len(keys))
+    return pd.DataFrame({key: keys[pos], cols[0]: shares[pos, 0], cols[1]: shares[pos, 1], cols[2]: (shares[:, 0] - shares[:, 1])[pos]})
+
+# N개 기간 비중 표 (cnc_report.compare_periods 결과용). frames: {기간 이름: 차원 집계}, 첫 기간이 기준
+# -> key, '<기간>(%)' ..., '<기간> 대비(%p)' (기준 기간 비중 - 그 기간 비중). 정렬은 compare_shares 와 같다
+def period_share_table(frames, key='구분', value='activeUsers'):
+    names = list(frames)
+    keys, values, shares = share_matrix(list(frames.values()), key, value)
+    pos = other_last_order(keys, values[:, 0])
+    out = {key: keys[pos]}
+    for i, n in enumerate(names): out[f"{n}(%)"] = shares[pos, i]
+    for i, n in enumerate(names[1:], 1): out[f"{n} 대비(%p)"] = (shares[:, 0] - shares[:, i])[pos]
+    return pd.DataFrame(out)
+
+def period_share_formats(names):
+    return {**{f"{n}(%)": '%.1f%%' for n in names}, **{f"{n} 대비(%p)": '%+.1f%%p' for n in names[1:]}}
+
+# 숫자 표 -> 문자열 표 (PDF 처럼 셀을 글자로 그리는 곳용). formats: {열: printf 형식}
+def format_columns(df, formats):
+    if df is None: return None
+    out = df.copy()
+    for c, fmt in formats.items():
+        if c in out.columns: out[c] = np.char.mod(fmt, out[c].to_numpy(dtype=float))
+    return out
+
+def traffic_share_table(df_traffic_curr, df_traffic_last):
+    return compare_shares(df_traffic_curr, df_traffic_last, '유입경로', '조회수', how='inner', order=False, cols=TRAFFIC_SHARE_COLS)
+
+# 지역/연령/성별 이번주 vs 지난주 비율 변화 표. 한쪽이라도 비어 있으면 None
+def share_change_table(d_c, d_l):
+    if d_c.empty or d_l.empty: return None
+    return compare_shares(d_c, d_l)
+
+def top10_detail_table(df_top10):
+    df_p4 = df_top10.copy()
+    df_p4['이탈률'] = df_p4['이탈률'].apply(lambda x: f"{float(x):.1f}%" if str(x).replace('.','').replace('-','').isdigit() else x)
+    for c in ['전체조회수','전체방문자수','좋아요','댓글']:
+        df_p4[c] = df_p4[c].apply(lambda x: f"{int(x):,}" if str(x).replace('.','').isdigit() else x)
+    return df_p4[['순위','카테고리','세부카테고리','제목','작성자','발행일시','전체조회수','전체방문자수','좋아요','댓글','체류시간_fmt','신규방문자비율','이탈률']]
+
+# df_top10 (TREND_COLS 포함) -> (표, 상위 5개 기사 차트용 데이터). 시간대별 조회수가 없는 기사(NaN)는 '-'
+def top10_trend_tables(df_top10):
+    df_p5 = df_top10.copy()
+    display_cols = ['전체조회수'] + TREND_COLS
+    for c in display_cols:
+        df_p5[c] = df_p5[c].apply(lambda x: f"{int(x):,}" if str(x).replace('.','').isdigit() else '-' if pd.isna(x) else x)
+    top5_data = []
+    for _, r in df_p5.head(5).iterrows():
+        ttl = (r['제목'][:12]+'..') if len(r['제목'])>12 else r['제목']
+        for t_col in TREND_COLS:
+            try: val = int(str(r[t_col]).replace(',', ''))
+            except: val = 0
+            top5_data.append({'기사제목': ttl, '시간대': t_col, '조회수': val})
+    return df_p5[['순위', '제목', '작성자', '발행일시'] + display_cols], pd.DataFrame(top5_data)
+
+# -> (메인 카테고리 표, 세부 카테고리 표). 차트는 '기사수' 열을 쓴다
+# df_articles: 전체 기사 색인 (cnc_report 의 articles 섹션). 이번주 조회된 기사 전체 기준
+def category_tables(df_articles):
+    df = df_articles.rename(columns={'pageTitle': '제목', 'screenPageViews': '전체조회수'})
+    cat_main = df.groupby('카테고리').agg(기사수=('제목','count'), 전체조회수=('전체조회수','sum')).reset_index()
+    cat_main['비중'] = (cat_main['기사수'] / cat_main['기사수'].sum() * 100).map('{:.1f}%'.format)
+    cat_main['기사1건당평균'] = (cat_main['전체조회수'] / cat_main['기사수']).astype(int).map('{:,}'.format)
+    cat_main['전체조회수'] = cat_main['전체조회수'].map('{:,}'.format)
+    cat_sub = df.groupby(['카테고리', '세부카테고리']).agg(기사수=('제목','count'), 전체조회수=('전체조회수','sum')).reset_index()
+    cat_sub['비중'] = (cat_sub['기사수'] / cat_sub['기사수'].sum() * 100).map('{:.1f}%'.format)
+    cat_sub['기사1건당평균'] = (cat_sub['전체조회수'] / cat_sub['기사수']).astype(int).map('{:,}'.format)
+    cat_sub['전체조회수'] = cat_sub['전체조회수'].map('{:,}'.format)
+    return cat_main, cat_sub
+
+def get_writers_df_real(df_raw_all):
+    real_to_pen_map = {item['본명']: item['필명'] for item in PEN_NAMES}
+    if df_raw_all.empty: return pd.DataFrame()
+    writers = df_raw_all.groupby('작성자').agg(기사수=('pageTitle','count'), 총조회수=('screenPageViews','sum'), 좋아요=('좋아요', 'sum'), 댓글=('댓글', 'sum')).reset_index().sort_values('총조회수', ascending=False)
+    writers['순위'] = range(1, len(writers)+1)
+    writers['필명'] = writers['작성자'].map(real_to_pen_map).fillna('')
+    writers['평균조회수'] = (writers['총조회수']/writers['기사수']).astype(int)
+    return writers
+
+def writer_real_table(writers_df):
+    disp_w = writers_df.copy()
+    for c in ['총조회수','평균조회수','좋아요','댓글']: disp_w[c] = disp_w[c].apply(lambda x: f"{x:,}")
+    disp_w = disp_w[['순위', '작성자', '필명', '기사수', '총조회수', '평균조회수', '좋아요', '댓글']]
+    disp_w.columns = ['순위', '본명', '필명', '발행기사 수', '전체 조회 수', '기사 1건 당 평균 조회 수', '좋아요 개수', '댓글 개수']
+    return disp_w
+
+# 필명이 있는 기자만. 없으면 None
+def writer_pen_table(writers_df):
+    df_pen = writers_df[writers_df['필명'] != ''].copy()
+    if df_pen.empty: return None
+    df_pen['순위'] = df_pen['총조회수'].rank(ascending=False).astype(int)
+    df_pen = df_pen.sort_values('순위')
+    disp_w = df_pen.copy()
+    for c in ['총조회수','평균조회수','좋아요','댓글']: disp_w[c] = disp_w[c].apply(lambda x: f"{x:,}")
+    disp_w = disp_w[['순위', '필명', '작성자', '기사수', '총조회수', '평균조회수', '좋아요', '댓글']]
+    disp_w.columns = ['순위', '필명', '본명', '발행기사 수', '전체 조회 수', '기사 1건 당 평균 조회 수', '좋아요 개수', '댓글 개수']
+    return disp_w
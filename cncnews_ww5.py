@@ -1,22 +1,24 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
-import requests
-import re
-import concurrent.futures
-from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
-import random
+from datetime import datetime
+import io
+import os
+import time
 
 # 인증 모듈
 from google.oauth2 import service_account 
 from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import (
-    DateRange, Dimension, Metric, RunReportRequest, OrderBy
-)
+from cnc_article_store import ArticleStore
+from cnc_cache import FigureCache, cache_from_url
+from cnc_crawler import ArticleCrawler
+from cnc_feed import FeedIndex
+from cnc_metrics import count, recent_traces, render_prometheus, span, trace
+from cnc_report import PROPERTY_ID, get_sunday_to_saturday_ranges, iter_weekly_report, weekly_report_key
+from cnc_snapshot import SnapshotStore
+from cnc_tables import (SHARE_FORMATS, TRAFFIC_SHARE_FORMATS, category_tables, get_writers_df_real, kpi_items, order_other_last,
+                        share_change_table, top10_detail_table, top10_trend_tables, traffic_share_table, writer_pen_table, writer_real_table)
 
 # ----------------- 1. 페이지 설정 -----------------
 st.set_page_config(
@@ -140,8 +142,6 @@ def check_password():
 if not check_password():
     st.stop()
 
-PROPERTY_ID = "370663478" 
-
 # ----------------- GA4 및 데이터 처리 함수 -----------------
 @st.cache_resource
 def get_ga4_client():
@@ -153,283 +153,211 @@ def get_ga4_client():
         st.error(f"GA4 클라이언트 연결 실패: {e}")
         return None
 
-def clean_author_name(name):
-    if not name: return "미상"
-    name = name.replace('#', '').replace('기자', '')
-    return ' '.join(name.split())
+@st.cache_resource
+def get_article_store():
+    return ArticleStore()
+
+# 커넥션 풀을 유지하는 비동기 크롤러 (세션 간 공유)
+@st.cache_resource
+def get_article_crawler():
+    return ArticleCrawler(per_host_limit=20, timeout=2)
+
+# 사이트맵/RSS 목록 (전체 기사 색인을 크롤링 전에 채운다. 세션 간 공유, 10분마다 다시 받음)
+@st.cache_resource
+def get_feed_index():
+    return FeedIndex(get_article_crawler())
+
+# 사전 집계 스냅샷 (cnc_precompute 가 저장)
+@st.cache_resource
+def get_snapshot_store():
+    return SnapshotStore()
+
+# 레플리카/재시작 간 공유 캐시 (CNC_CACHE_URL: 기본 디스크, redis://... 가능)
+@st.cache_resource
+def get_data_cache():
+    return cache_from_url()
 
-def crawl_single_article(url_path):
-    full_url = f"http://www.cooknchefnews.com{url_path}"
-    try:
-        response = requests.get(full_url, timeout=2)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        author = "관리자"
-        author_tag = soup.select_one('.user-name') or soup.select_one('.writer') or soup.select_one('.byline')
-        if author_tag: author = author_tag.text.strip()
-        else:
-            for tag in soup.select('span, div, li'):
-                txt = tag.text.strip()
-                if '기자' in txt and len(txt) < 10:
-                    author = txt; break
-        author = clean_author_name(author)
-        likes = int(soup.select_one('.sns-like-count').text.replace(',', '')) if soup.select_one('.sns-like-count') else 0
-        comments = int(soup.select_one('.comment-count').text.replace(',', '')) if soup.select_one('.comment-count') else 0
-        cat, subcat = "뉴스", "이슈"
-        breadcrumbs = soup.select('.location a') or soup.select('.breadcrumb a') or soup.select('.path a')
-        if breadcrumbs:
-            if len(breadcrumbs) >= 2: cat = breadcrumbs[1].text.strip()
-            if len(breadcrumbs) >= 3: subcat = breadcrumbs[2].text.strip()
-        else:
-            meta_sec = soup.select_one('meta[property="article:section"]')
-            if meta_sec: cat = meta_sec.get('content')
-        return (author, likes, comments, cat, subcat)
-    except: 
-        return ("관리자", 0, 0, "뉴스", "이슈")
-
-def get_sunday_to_saturday_ranges(count=12):
-    ranges = {}
-    today = datetime.now()
-    days_since_sunday = (today.weekday() + 1) % 7
-    last_sunday = today - timedelta(days=days_since_sunday)
-    for i in range(count):
-        start_date = last_sunday - timedelta(weeks=i)
-        end_date = start_date + timedelta(days=6)
-        label = f"{start_date.isocalendar()[1]}주차"
-        ranges[label] = f"{start_date.strftime('%Y.%m.%d')} ~ {end_date.strftime('%Y.%m.%d')}"
-    return ranges
 WEEK_MAP = get_sunday_to_saturday_ranges()
 
-def run_ga4_report(start_date, end_date, dimensions, metrics, order_by_metric=None, limit=None):
-    client = get_ga4_client()
-    if not client: return pd.DataFrame()
-    order_bys = [OrderBy(metric=OrderBy.MetricOrderBy(metric_name=order_by_metric), desc=True)] if order_by_metric else []
-    request = RunReportRequest(
-        property=f"properties/{PROPERTY_ID}",
-        dimensions=[Dimension(name=d) for d in dimensions],
-        metrics=[Metric(name=m) for m in metrics],
-        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-        order_bys=order_bys,
-        limit=limit if limit else 10000
-    )
-    try:
-        response = client.run_report(request)
-        data = []
-        for row in response.rows:
-            row_dict = {dimensions[i]: row.dimension_values[i].value for i in range(len(dimensions))}
-            for i, met in enumerate(metrics):
-                val = row.metric_values[i].value
-                row_dict[met] = float(val) if '.' in val else int(val)
-            data.append(row_dict)
-        return pd.DataFrame(data)
-    except: return pd.DataFrame(columns=dimensions + metrics)
+# 주차 선택 상자(week_select)의 현재 값. 아직 선택 전이면 가장 최근 주차
+def current_week():
+    return st.session_state.get('week_select', list(WEEK_MAP.keys())[0])
 
 def create_donut_chart_with_val(df, names, values, color_map=None):
     if df.empty: return go.Figure()
-    if '구분' in df.columns:
-        df_normal = df[df['구분'] != '기타'].sort_values(by=values, ascending=False)
-        df_other = df[df['구분'] == '기타']
-        df_sorted = pd.concat([df_normal, df_other])
-    else: df_sorted = df
+    df_sorted = order_other_last(df, values)
     if color_map: fig = px.pie(df_sorted, names=names, values=values, hole=0.5, color=names, color_discrete_map=color_map)
     else: fig = px.pie(df_sorted, names=names, values=values, hole=0.5, color_discrete_sequence=CHART_PALETTE)
     fig.update_traces(textposition='outside', textinfo='label+percent', sort=False)
     fig.update_layout(showlegend=False, margin=dict(t=30, b=80, l=40, r=40), height=350)
     return fig
 
-# 데이터 로딩 함수
-@st.cache_data(ttl=3600, show_spinner="데이터 불러오는 중...")
-def load_all_dashboard_data(selected_week):
-    dr = WEEK_MAP[selected_week]
-    parts = dr.split(' ~ ')
-    s_dt, e_dt = parts[0].replace('.', '-'), parts[1].replace('.', '-')
-    ls_dt = (datetime.strptime(s_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
-    le_dt = (datetime.strptime(e_dt, '%Y-%m-%d')-timedelta(days=7)).strftime('%Y-%m-%d')
-
-    # 1. KPI
-    summary = run_ga4_report(s_dt, e_dt, [], ["activeUsers", "screenPageViews", "newUsers"])
-    if not summary.empty:
-        sel_uv = int(summary['activeUsers'].iloc[0])
-        sel_pv = int(summary['screenPageViews'].iloc[0])
-        sel_new = int(summary['newUsers'].iloc[0])
-    else: sel_uv, sel_pv, sel_new = 0, 0, 0
-    new_visitor_ratio = round((sel_new / sel_uv * 100), 1) if sel_uv > 0 else 0
-
-    # 2. 일별 데이터
-    df_daily = run_ga4_report(s_dt, e_dt, ["date"], ["activeUsers", "screenPageViews"])
-    if not df_daily.empty:
-        df_daily = df_daily.rename(columns={'date':'날짜', 'activeUsers':'UV', 'screenPageViews':'PV'})
-        df_daily['날짜'] = pd.to_datetime(df_daily['날짜']).dt.strftime('%m-%d')
-    
-    # 3. 3개월 추이
-    def fetch_week_data(week_label, date_str):
-        w_parts = date_str.split(' ~ ')
-        ws, we = w_parts[0].replace('.', '-'), w_parts[1].replace('.', '-')
-        res = run_ga4_report(ws, we, [], ["activeUsers", "screenPageViews"])
-        if not res.empty:
-            return {
-                '주차': week_label, 
-                'UV': int(res['activeUsers'][0]), 
-                'PV': int(res['screenPageViews'][0])
-            }
-        return None
+# 차트 캐시: 같은 주차·차트·데이터면 재실행(인쇄 모드 전환 등)이나 다른 세션에서도 만들어 둔 Figure 를 재사용
+# CNC_FIGURE_CACHE=off 면 끈다 (벤치마크 비교용)
+@st.cache_resource
+def get_figure_cache():
+    if os.environ.get("CNC_FIGURE_CACHE", "on") == "off": return None
+    return FigureCache(get_data_cache())
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(fetch_week_data, wl, dstr) for wl, dstr in list(WEEK_MAP.items())[:12]]
-        results = [f.result() for f in concurrent.futures.as_completed(futures) if f.result()]
-    
-    df_weekly = pd.DataFrame(results)
-    if not df_weekly.empty:
-        df_weekly['week_num'] = df_weekly['주차'].apply(lambda x: int(re.search(r'\d+', x).group()))
-        df_weekly = df_weekly.sort_values('week_num')
-    
-    # 활성 기사 수
-    df_pages_count = run_ga4_report(s_dt, e_dt, ["pagePath"], ["screenPageViews"], limit=10000)
-    if not df_pages_count.empty:
-        mask_article = df_pages_count['pagePath'].str.contains(r'article|news|view|story', case=False, regex=True, na=False)
-        active_article_count = df_pages_count[mask_article].shape[0]
-        if active_article_count == 0:
-             active_article_count = df_pages_count[df_pages_count['pagePath'].str.len() > 1].shape[0]
-    else:
-        active_article_count = 0
-
-    # 4. 유입경로
-    def map_source(s):
-        s = s.lower()
-        if 'naver' in s: return '네이버'
-        if 'daum' in s: return '다음'
-        if 'facebook' in s: return '페이스북'
-        if '(direct)' in s: return '직접'
-        if 'google' in s: return '구글'
-        return '기타'
-    df_t_raw = run_ga4_report(s_dt, e_dt, ["sessionSource"], ["screenPageViews"])
-    df_t_raw['유입경로'] = df_t_raw['sessionSource'].apply(map_source)
-    df_traffic_curr = df_t_raw.groupby('유입경로')['screenPageViews'].sum().reset_index().rename(columns={'screenPageViews':'조회수'})
-    
-    search_engines = ['네이버', '구글', '다음']
-    search_pv = df_traffic_curr[df_traffic_curr['유입경로'].isin(search_engines)]['조회수'].sum()
-    total_pv_traffic = df_traffic_curr['조회수'].sum()
-    search_inflow_ratio = round((search_pv / total_pv_traffic * 100), 1) if total_pv_traffic > 0 else 0
-    
-    df_tl_raw = run_ga4_report(ls_dt, le_dt, ["sessionSource"], ["screenPageViews"])
-    df_tl_raw['유입경로'] = df_tl_raw['sessionSource'].apply(map_source)
-    df_traffic_last = df_tl_raw.groupby('유입경로')['screenPageViews'].sum().reset_index().rename(columns={'screenPageViews':'조회수'})
+def cached_figure(chart_id, data, build):
+    cache = get_figure_cache()
+    if cache is None: return build()
+    return cache.get_or_build(WEEK_MAP[current_week()], chart_id, data, build)
 
-    # 5. 방문자 특성
-    def clean_and_group(df, col_name):
-        if df.empty: return pd.DataFrame(columns=['구분', 'activeUsers'])
-        df['구분'] = df[col_name].replace({'(not set)': '기타', '': '기타', 'unknown': '기타'}).fillna('기타')
-        return df.groupby('구분', as_index=False)['activeUsers'].sum()
+def cached_donut(chart_id, df, names, values, color_map=None):
+    return cached_figure(chart_id, [df, names, values, color_map], lambda: create_donut_chart_with_val(df, names, values, color_map))
 
-    region_map = {'Seoul':'서울','Gyeonggi-do':'경기','Incheon':'인천','Busan':'부산','Daegu':'대구','Gyeongsangnam-do':'경남','Gyeongsangbuk-do':'경북','Chungcheongnam-do':'충남','Chungcheongbuk-do':'충북','Jeollanam-do':'전남','Jeollabuk-do':'전북','Gangwon-do':'강원','Daejeon':'대전','Gwangju':'광주','Ulsan':'울산','Jeju-do':'제주','Sejong-si':'세종'}
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=6) as executor:
-        f_reg_c = executor.submit(run_ga4_report, s_dt, e_dt, ["region"], ["activeUsers"], "activeUsers", 50)
-        f_reg_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["region"], ["activeUsers"], "activeUsers", 50)
-        f_age_c = executor.submit(run_ga4_report, s_dt, e_dt, ["userAgeBracket"], ["activeUsers"], "activeUsers")
-        f_age_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["userAgeBracket"], ["activeUsers"], "activeUsers")
-        f_gen_c = executor.submit(run_ga4_report, s_dt, e_dt, ["userGender"], ["activeUsers"], "activeUsers")
-        f_gen_l = executor.submit(run_ga4_report, ls_dt, le_dt, ["userGender"], ["activeUsers"], "activeUsers")
-
-        d_rc, d_rl = f_reg_c.result(), f_reg_l.result()
-        if not d_rc.empty: d_rc['region_mapped'] = d_rc['region'].map(region_map).fillna('기타')
-        if not d_rl.empty: d_rl['region_mapped'] = d_rl['region'].map(region_map).fillna('기타')
-        df_region_curr = clean_and_group(d_rc, 'region_mapped')
-        df_region_last = clean_and_group(d_rl, 'region_mapped')
-
-        d_ac, d_al = f_age_c.result(), f_age_l.result()
-        for df in [d_ac, d_al]:
-            if not df.empty:
-                df['temp_age'] = df['userAgeBracket'].replace({'unknown': '기타', '(not set)': '기타'})
-                df['구분'] = df['temp_age'].apply(lambda x: x + '세' if x != '기타' else x)
-        df_age_curr = d_ac[d_ac['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_ac.empty else pd.DataFrame()
-        df_age_last = d_al[d_al['구분'] != '기타'].groupby('구분', as_index=False)['activeUsers'].sum() if not d_al.empty else pd.DataFrame()
-
-        d_gc, d_gl = f_gen_c.result(), f_gen_l.result()
-        gender_map = {'male': '남성', 'female': '여성'}
-        for df in [d_gc, d_gl]:
-            if not df.empty:
-                df['mapped'] = df['userGender'].map(gender_map)
-                df['구분'] = df['mapped']
-        df_gender_curr = d_gc.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gc.empty else pd.DataFrame()
-        df_gender_last = d_gl.dropna(subset=['mapped']).groupby('구분', as_index=False)['activeUsers'].sum() if not d_gl.empty else pd.DataFrame()
-
-    # 6. TOP 10 및 크롤링
-    df_raw_top = run_ga4_report(s_dt, e_dt, ["pageTitle", "pagePath"], ["screenPageViews", "activeUsers", "userEngagementDuration", "bounceRate"], "screenPageViews", limit=100)
-    
-    if not df_raw_top.empty:
-        paths = df_raw_top['pagePath'].tolist()
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            scraped_data = list(executor.map(crawl_single_article, paths))
-        
-        auths, lks, cmts, cats, subcats = zip(*scraped_data)
-        df_raw_top['작성자'] = auths; df_raw_top['좋아요'] = lks; df_raw_top['댓글'] = cmts
-        df_raw_top['카테고리'] = cats; df_raw_top['세부카테고리'] = subcats
-        
-        def is_excluded(row):
-            t = str(row['pageTitle']).lower().replace(' ', '')
-            a = str(row['작성자']).lower().replace(' ', '')
-            if 'cook&chef' in t or '쿡앤셰프' in t: return True
-            if 'cook&chef' in a or '쿡앤셰프' in a: return True
-            return False
-            
-        exclude_mask = df_raw_top.apply(is_excluded, axis=1)
-        df_raw_all = df_raw_top[~exclude_mask].copy()
-        
-        df_top10 = df_raw_all.sort_values('screenPageViews', ascending=False).head(10)
-        df_top10['순위'] = range(1, len(df_top10)+1)
-        df_top10 = df_top10.rename(columns={'pageTitle': '제목', 'pagePath': '경로', 'screenPageViews': '전체조회수', 'activeUsers': '전체방문자수', 'userEngagementDuration': '평균체류시간', 'bounceRate': '이탈률'})
-        
-        def format_duration(sec):
-            m, s = divmod(int(sec), 60)
-            return f"{m}분 {s}초"
-        df_top10['체류시간_fmt'] = df_top10['평균체류시간'].apply(format_duration)
-        df_top10['발행일시'] = s_dt
-        df_top10['신규방문자비율'] = f"{new_visitor_ratio}%"
-    else: 
-        df_top10 = pd.DataFrame()
-        df_raw_all = pd.DataFrame()
-
-    return (sel_uv, sel_pv, df_daily, df_weekly, df_traffic_curr, df_traffic_last, 
-            df_region_curr, df_region_last, df_age_curr, df_age_last, df_gender_curr, df_gender_last, 
-            df_top10, df_raw_all, new_visitor_ratio, search_inflow_ratio, active_article_count)
+# 이번주 vs 지난주 비교 표 (cnc_tables.compare_shares). 같은 주차 데이터면 재실행/다른 세션에서도 다시 계산하지 않는다
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_traffic_share_table(df_traffic_curr, df_traffic_last):
+    return traffic_share_table(df_traffic_curr, df_traffic_last)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_share_change_table(d_c, d_l):
+    return share_change_table(d_c, d_l)
+
+# 숫자 열은 셀마다 문자열로 바꾸지 않고 열 단위 형식으로 표시
+def number_columns(formats):
+    return {c: st.column_config.NumberColumn(format=f) for c, f in formats.items()}
+
+# 조회 실패한 섹션도, 마감 시간 안에 못 가져온 기사(백그라운드에서 크롤링 중)도,
+# 기사 사이트 장애로 크롤링을 건너뛴 기사(서킷 브레이커)도 없는 보고서만 캐시한다
+def report_complete(report):
+    return not report.get('errors') and not report.get('crawl_pending') and not report.get('crawl_degraded')
+
+# 데이터 로딩 함수
+# 사전 집계 작업(cnc_precompute)이 만든 스냅샷이 있으면 그대로 읽고, 없거나 오래됐으면 직접 집계
+# 직접 집계한 결과는 공유 캐시에 넣어 다른 세션/레플리카/재시작 후에도 재사용.
+# 같은 주차를 여러 세션이 동시에 열면 한 곳에서만 집계하고(single-flight) 나머지는 진행 상황을 보며 기다린다.
+# on_section(값 dict): 직접 집계하는 세션에서 섹션이 하나 끝날 때마다 호출 (점진 렌더링용)
+# bar: 진행 표시줄을 그릴 자리 (없으면 그 자리에 새로 만든다)
+# sections: 일부 섹션만 집계할 때 그 이름 목록 (탭별 지연 로딩). 섹션 묶음마다 따로 캐시된다.
+def build_dashboard_data(selected_week, on_section=None, bar=None, sections=None):
+    cache = get_data_cache()
+    bar = bar or st.empty()
+    def show_progress(frac, msg, waiting):
+        prefix = "⏳ 다른 사용자가 같은 주차를 집계하고 있습니다. 잠시만 기다려 주세요" if waiting else "⏳ 데이터 불러오는 중"
+        bar.progress(min(max(frac, 0.0), 1.0), text=f"{prefix} · {msg}" if msg else prefix)
+    def build(progress):
+        report = {}
+        for values in iter_weekly_report(get_ga4_client(), PROPERTY_ID, WEEK_MAP, selected_week, get_article_store(), get_article_crawler(), cache, progress, sections,
+                                         feeds=get_feed_index()):
+            report.update(values)
+            if on_section: on_section(values)
+        return report
+    try:
+        return cache.get_or_set(weekly_report_key(PROPERTY_ID, WEEK_MAP, selected_week, sections), build,
+                                ttl=3600, on_progress=show_progress, should_cache=report_complete)
+    finally:
+        bar.empty()
+
+# fragment 가 다시 실행될 때(탭 전환, 인쇄 미리보기 전환) 방금 읽은 보고서를 스냅샷/캐시에서 다시 읽어 디코딩하지 않도록
+# 현재 주차의 보고서를 세션에 잠시 둔다. 주차가 바뀌거나 SESSION_REPORT_TTL 초가 지나면 다시 읽는다.
+SESSION_REPORT_TTL = 300
+
+def session_reports(selected_week):
+    memo = st.session_state.get('loaded_reports')
+    if memo is None or memo['week'] != selected_week or time.time() - memo['at'] > SESSION_REPORT_TTL:
+        memo = st.session_state['loaded_reports'] = {'week': selected_week, 'at': time.time(), 'reports': {}}
+    return memo['reports']
+
+# 로드마다 단계별 시간(cnc_metrics trace)을 남긴다. 어디서 읽었는지(source: session/snapshot/cache/build)도 같이 남긴다
+def load_all_dashboard_data(selected_week, on_section=None, bar=None, sections=None):
+    with trace("load", week=selected_week, sections=sorted(sections) if sections is not None else None) as tr:
+        reports = session_reports(selected_week)
+        memo_key = None if sections is None else frozenset(sections)
+        report = reports.get(None, reports.get(memo_key))
+        count("cache_requests", namespace="session_report", result="miss" if report is None else "hit")
+        if report is not None:
+            tr['tags']['source'] = "session"
+            return report
+        with span("load.snapshot"): report = get_snapshot_store().load(PROPERTY_ID, WEEK_MAP[selected_week], WEEK_MAP)
+        tr['tags']['source'] = "snapshot"
+        # 일부 섹션만 필요해도 전체 보고서가 이미 캐시에 있으면 그대로 쓴다
+        if report is None and sections is not None:
+            with span("load.cache"): report = get_data_cache().get(weekly_report_key(PROPERTY_ID, WEEK_MAP, selected_week))
+            tr['tags']['source'] = "cache"
+        if report is None:
+            with span("load.build"): report = build_dashboard_data(selected_week, on_section, bar, sections)
+            tr['tags']['source'] = "build"
+        # 조회에 실패한 섹션이나 마감까지 못 가져온 기사가 있으면 다음 실행 때 다시 집계하도록 두지 않는다
+        if report_complete(report): reports[memo_key] = report
+        return report
+
+# ----------------- 점진 렌더링 -----------------
+# 섹션 자리(st.empty)를 먼저 깔아 두고, 데이터가 섹션 단위로 도착할 때마다 필요한 값이 다 모인 자리부터 채운다.
+# 캐시/스냅샷에서 한 번에 읽은 경우에는 update_view 한 번으로 전부 채워진다.
+LOADING_HTML = "<div class='update-time'>⏳ 집계 중...</div>"
+
+def new_report_view():
+    return {'report': {}, 'slots': []}
+
+# fields: 그리는 데 필요한 보고서 키, render(*값들)
+# partial=True 면 일부 값만 와도 먼저 그리고(없는 값은 None), 값이 올 때마다 다시 그린다
+def add_slot(view, fields, render, partial=False, loading=LOADING_HTML):
+    slot = st.empty()
+    if loading: slot.markdown(loading, unsafe_allow_html=True)
+    view['slots'].append((slot, fields, render, partial))
+
+def update_view(view, values):
+    report = view['report']
+    report.update(values)
+    for item in list(view['slots']):
+        slot, fields, render, partial = item
+        ready = all(f in report for f in fields)
+        if not ready and not (partial and any(f in values for f in fields)): continue
+        with slot.container(): render(*[report.get(f) for f in fields])
+        if ready: view['slots'].remove(item)
 
 # ----------------- 렌더링 함수들 -----------------
-def render_summary(df_weekly, cur_pv, cur_uv, new_ratio, search_ratio, df_daily, active_article_count):
+# 화면 조각별로 필요한 보고서 키
+KPI_FIELDS = ("cur_pv", "cur_uv", "new_ratio", "search_ratio", "active_article_count")
+TRAFFIC_FIELDS = ("df_traffic_curr", "df_traffic_last")
+REGION_FIELDS = ("df_region_curr", "df_region_last")
+AGE_GENDER_FIELDS = ("df_age_curr", "df_age_last", "df_gender_curr", "df_gender_last")
+TOP_FIELDS = ("df_top10", "top_degraded")
+ARTICLE_FIELDS = ("df_articles", "articles_pending", "articles_degraded")
+
+def layout_summary(view):
     st.markdown('<div class="section-header-container first-section"><div class="section-header">1. 주간 전체 성과 요약</div></div>', unsafe_allow_html=True)
-    pv_per_user = round(cur_pv/cur_uv, 1) if cur_uv > 0 else 0
-    # '지난 7일 간' 추가
-    kpis = [("활성 기사 수", active_article_count, "건"), ("지난 7일 간 주간 전체 조회수(PV)", cur_pv, "건"), ("지난 7일 간 주간 총 방문자수(UV)", cur_uv, "명"), 
-            ("방문자당 페이지뷰", pv_per_user, "건"), ("신규 방문자 비율", new_ratio, "%"), ("검색 유입 비율", search_ratio, "%")]
-    cols = st.columns(6)
-    for i, (l, v, u) in enumerate(kpis):
-        v_f = f"{v:,}" if isinstance(v, (int, np.integer, float)) and l not in ["방문자당 페이지뷰", "신규 방문자 비율", "검색 유입 비율"] else str(v)
-        cols[i].markdown(f'<div class="kpi-container"><div class="kpi-label">{l}</div><div class="kpi-value">{v_f}<span class="kpi-unit">{u}</span></div></div>', unsafe_allow_html=True)
+    add_slot(view, KPI_FIELDS, render_kpis, partial=True)
     c1, c2 = st.columns(2)
     with c1:
         st.markdown('<div class="sub-header">📊 주간 일별 방문 추이</div>', unsafe_allow_html=True)
-        if not df_daily.empty:
-            fig = px.bar(df_daily.melt(id_vars='날짜'), x='날짜', y='value', color='variable', barmode='group', color_discrete_map={'UV': COLOR_GREY, 'PV': COLOR_NAVY})
-            st.plotly_chart(fig, use_container_width=True, key="summary_daily_chart")
+        add_slot(view, ["df_daily"], render_daily_chart)
     with c2:
         st.markdown('<div class="sub-header">📈 최근 3달 간 추이 분석</div>', unsafe_allow_html=True)
-        if not df_weekly.empty:
+        add_slot(view, ["df_weekly"], render_weekly_chart)
+
+# 아직 집계 중인 값(None)은 ⏳ 로 표시
+def render_kpis(cur_pv, cur_uv, new_ratio, search_ratio, active_article_count):
+    cols = st.columns(6)
+    for i, (l, v_f, u) in enumerate(kpi_items(cur_pv, cur_uv, new_ratio, search_ratio, active_article_count)):
+        if v_f is None: v_f, u = "⏳", ""
+        cols[i].markdown(f'<div class="kpi-container"><div class="kpi-label">{l}</div><div class="kpi-value">{v_f}<span class="kpi-unit">{u}</span></div></div>', unsafe_allow_html=True)
+
+def render_daily_chart(df_daily):
+    if not df_daily.empty:
+        fig = cached_figure("summary_daily_chart", [df_daily], lambda: px.bar(df_daily.melt(id_vars='날짜'), x='날짜', y='value', color='variable', barmode='group', color_discrete_map={'UV': COLOR_GREY, 'PV': COLOR_NAVY}))
+        st.plotly_chart(fig, use_container_width=True, key="summary_daily_chart")
+
+def render_weekly_chart(df_weekly):
+    if not df_weekly.empty:
+        def build():
             fig2 = go.Figure()
             fig2.add_trace(go.Bar(x=df_weekly['주차'], y=df_weekly['UV'], name='UV', marker_color=COLOR_GREY))
             fig2.add_trace(go.Bar(x=df_weekly['주차'], y=df_weekly['PV'], name='PV', marker_color=COLOR_NAVY))
             fig2.update_layout(barmode='group', plot_bgcolor='white', margin=dict(t=0))
-            st.plotly_chart(fig2, use_container_width=True, key="summary_weekly_chart")
+            return fig2
+        st.plotly_chart(cached_figure("summary_weekly_chart", [df_weekly], build), use_container_width=True, key="summary_weekly_chart")
 
 def render_traffic(df_traffic_curr, df_traffic_last):
     st.markdown('<div class="section-header-container"><div class="section-header">2. 주간 접근 경로 분석</div></div>', unsafe_allow_html=True)
     c1, c2 = st.columns(2)
-    with c1: st.plotly_chart(px.pie(df_traffic_curr, names='유입경로', values='조회수', hole=0.5, color_discrete_sequence=CHART_PALETTE), use_container_width=True, key="traffic_curr_pie")
-    with c2: st.plotly_chart(px.pie(df_traffic_last, names='유입경로', values='조회수', hole=0.5, color_discrete_sequence=CHART_PALETTE), use_container_width=True, key="traffic_last_pie")
+    with c1: st.plotly_chart(cached_figure("traffic_curr_pie", [df_traffic_curr], lambda: px.pie(df_traffic_curr, names='유입경로', values='조회수', hole=0.5, color_discrete_sequence=CHART_PALETTE)), use_container_width=True, key="traffic_curr_pie")
+    with c2: st.plotly_chart(cached_figure("traffic_last_pie", [df_traffic_last], lambda: px.pie(df_traffic_last, names='유입경로', values='조회수', hole=0.5, color_discrete_sequence=CHART_PALETTE)), use_container_width=True, key="traffic_last_pie")
     st.markdown('<div class="sub-header">주요 유입경로 비중 변화</div>', unsafe_allow_html=True)
-    df_m = pd.merge(df_traffic_curr, df_traffic_last, on='유입경로', suffixes=('_이번', '_지난'))
-    df_m['이번주 비중'] = (df_m['조회수_이번'] / df_m['조회수_이번'].sum() * 100).round(1)
-    df_m['지난주 비중'] = (df_m['조회수_지난'] / df_m['조회수_지난'].sum() * 100).round(1)
-    df_m['비중 변화'] = (df_m['이번주 비중'] - df_m['지난주 비중']).round(1)
-    st.dataframe(df_m[['유입경로', '이번주 비중', '지난주 비중', '비중 변화']].copy().assign(**{'비중 변화': lambda x: x['비중 변화'].apply(lambda v: f"{v:+.1f}%p")}), use_container_width=True, hide_index=True)
+    st.dataframe(cached_traffic_share_table(df_traffic_curr, df_traffic_last), use_container_width=True, hide_index=True, column_config=number_columns(TRAFFIC_SHARE_FORMATS))
 
 def render_demo_region(df_region_curr, df_region_last):
     st.markdown('<div class="section-header-container"><div class="section-header">3. 주간 전체 방문자 특성 분석 (지역)</div></div>', unsafe_allow_html=True)
@@ -437,24 +365,12 @@ def render_demo_region(df_region_curr, df_region_last):
     c_curr, c_last = st.columns(2)
     with c_curr:
         st.markdown(f"**이번주**")
-        st.plotly_chart(create_donut_chart_with_val(df_region_curr, '구분', 'activeUsers', None), use_container_width=True, key="region_curr_pie")
+        st.plotly_chart(cached_donut("region_curr_pie", df_region_curr, '구분', 'activeUsers', None), use_container_width=True, key="region_curr_pie")
     with c_last:
         st.markdown(f"**지난주 (비교)**")
-        st.plotly_chart(create_donut_chart_with_val(df_region_last, '구분', 'activeUsers', None), use_container_width=True, key="region_last_pie")
-    if not df_region_curr.empty and not df_region_last.empty:
-        df_change = pd.merge(df_region_curr, df_region_last, on='구분', suffixes=('_이번', '_지난'), how='left').fillna(0)
-        total_c = df_change['activeUsers_이번'].sum()
-        total_l = df_change['activeUsers_지난'].sum()
-        df_change['비율_이번'] = (df_change['activeUsers_이번'] / total_c * 100).round(1) if total_c > 0 else 0
-        df_change['비율_지난'] = (df_change['activeUsers_지난'] / total_l * 100).round(1) if total_l > 0 else 0
-        df_change['변화(%p)'] = df_change['비율_이번'] - df_change['비율_지난']
-        df_norm = df_change[df_change['구분']!='기타'].sort_values('activeUsers_이번', ascending=False)
-        df_oth = df_change[df_change['구분']=='기타']
-        df_disp = pd.concat([df_norm, df_oth])
-        df_disp['이번주(%)'] = df_disp['비율_이번'].astype(str) + '%'
-        df_disp['지난주(%)'] = df_disp['비율_지난'].astype(str) + '%'
-        df_disp['변화(%p)'] = df_disp['변화(%p)'].apply(lambda x: f"{x:+.1f}%p")
-        st.dataframe(df_disp[['구분', '이번주(%)', '지난주(%)', '변화(%p)']], use_container_width=True, hide_index=True)
+        st.plotly_chart(cached_donut("region_last_pie", df_region_last, '구분', 'activeUsers', None), use_container_width=True, key="region_last_pie")
+    df_disp = cached_share_change_table(df_region_curr, df_region_last)
+    if df_disp is not None: st.dataframe(df_disp, use_container_width=True, hide_index=True, column_config=number_columns(SHARE_FORMATS))
 
 def render_demo_age_gender(df_age_curr, df_age_last, df_gender_curr, df_gender_last):
     st.markdown('<div class="section-header-container"><div class="section-header">3. 주간 전체 방문자 특성 분석 (연령/성별)</div></div>', unsafe_allow_html=True)
@@ -470,187 +386,246 @@ def render_demo_age_gender(df_age_curr, df_age_last, df_gender_curr, df_gender_l
         with c_curr:
             st.markdown(f"**이번주**")
             # Duplicate ID 방지를 위해 고유 Key 추가
-            st.plotly_chart(create_donut_chart_with_val(d_c, '구분', 'activeUsers', color_maps[i]), use_container_width=True, key=f"demo_curr_pie_{i}")
+            st.plotly_chart(cached_donut(f"demo_curr_pie_{i}", d_c, '구분', 'activeUsers', color_maps[i]), use_container_width=True, key=f"demo_curr_pie_{i}")
         with c_last:
             st.markdown(f"**지난주 (비교)**")
-            st.plotly_chart(create_donut_chart_with_val(d_l, '구분', 'activeUsers', color_maps[i]), use_container_width=True, key=f"demo_last_pie_{i}")
-        if not d_c.empty and not d_l.empty:
-            df_change = pd.merge(d_c, d_l, on='구분', suffixes=('_이번', '_지난'), how='left').fillna(0)
-            total_c = df_change['activeUsers_이번'].sum()
-            total_l = df_change['activeUsers_지난'].sum()
-            df_change['비율_이번'] = (df_change['activeUsers_이번'] / total_c * 100).round(1) if total_c > 0 else 0
-            df_change['비율_지난'] = (df_change['activeUsers_지난'] / total_l * 100).round(1) if total_l > 0 else 0
-            df_change['변화(%p)'] = df_change['비율_이번'] - df_change['비율_지난']
-            df_norm = df_change[df_change['구분']!='기타'].sort_values('activeUsers_이번', ascending=False)
-            df_oth = df_change[df_change['구분']=='기타']
-            df_disp = pd.concat([df_norm, df_oth])
-            df_disp['이번주(%)'] = df_disp['비율_이번'].astype(str) + '%'
-            df_disp['지난주(%)'] = df_disp['비율_지난'].astype(str) + '%'
-            df_disp['변화(%p)'] = df_disp['변화(%p)'].apply(lambda x: f"{x:+.1f}%p")
-            st.dataframe(df_disp[['구분', '이번주(%)', '지난주(%)', '변화(%p)']], use_container_width=True, hide_index=True)
+            st.plotly_chart(cached_donut(f"demo_last_pie_{i}", d_l, '구분', 'activeUsers', color_maps[i]), use_container_width=True, key=f"demo_last_pie_{i}")
+        df_disp = cached_share_change_table(d_c, d_l)
+        if df_disp is not None: st.dataframe(df_disp, use_container_width=True, hide_index=True, column_config=number_columns(SHARE_FORMATS))
         st.markdown("<hr>", unsafe_allow_html=True)
 
-def render_top10_detail(df_top10):
+# 기사 사이트가 응답하지 않아(서킷 브레이커) 크롤링을 건너뛴 기사로 집계한 섹션에 붙이는 안내
+def render_degraded_note(degraded, detail):
+    if degraded: st.warning(f"⚠️ 기사 사이트가 응답하지 않아 기사 {degraded:,}건은 {detail} 사이트가 복구되면 다음 집계에 반영됩니다.")
+
+def render_top10_detail(df_top10, top_degraded):
     st.markdown('<div class="section-header-container"><div class="section-header">4. 최근 7일 조회수 TOP 10 기사 상세</div></div>', unsafe_allow_html=True)
+    render_degraded_note(top_degraded, "저장된 예전 정보(없으면 작성자 '미상')로 표시했습니다.")
     if not df_top10.empty:
-        df_p4 = df_top10.copy()
-        df_p4['이탈률'] = df_p4['이탈률'].apply(lambda x: f"{float(x):.1f}%" if str(x).replace('.','').replace('-','').isdigit() else x)
-        for c in ['전체조회수','전체방문자수','좋아요','댓글']: 
-            df_p4[c] = df_p4[c].apply(lambda x: f"{int(x):,}" if str(x).replace('.','').isdigit() else x)
-        st.dataframe(df_p4[['순위','카테고리','세부카테고리','제목','작성자','발행일시','전체조회수','전체방문자수','좋아요','댓글','체류시간_fmt','신규방문자비율','이탈률']], use_container_width=True, hide_index=True)
+        st.dataframe(top10_detail_table(df_top10), use_container_width=True, hide_index=True)
 
-def render_top10_trends(df_top10):
+def render_top10_trends(df_top10, top_degraded):
     st.markdown('<div class="section-header-container"><div class="section-header">5. TOP 10 기사 시간대별 조회수 추이</div></div>', unsafe_allow_html=True)
+    render_degraded_note(top_degraded, "발행 시각을 확인하지 못해 추이가 정확하지 않을 수 있습니다.")
     if not df_top10.empty:
-        df_p5 = df_top10.copy()
-        time_cols = ['12시간', '24시간', '48시간']
-        if '12시간' not in df_p5.columns:
-            for idx, row in df_p5.iterrows():
-                total = row['전체조회수']
-                r12, r24, r48 = random.uniform(0.3, 0.45), random.uniform(0.5, 0.65), random.uniform(0.75, 0.85)
-                df_p5.at[idx, '12시간'] = int(total * r12)
-                df_p5.at[idx, '24시간'] = int(total * r24)
-                df_p5.at[idx, '48시간'] = int(total * r48)
-        display_cols = ['전체조회수'] + time_cols
-        for c in display_cols:
-            df_p5[c] = df_p5[c].apply(lambda x: f"{int(x):,}" if str(x).replace('.','').isdigit() else x)
-        st.dataframe(df_p5[['순위', '제목', '작성자', '발행일시'] + display_cols], use_container_width=True, hide_index=True)
-        df_chart = df_p5.head(5)
-        top5_data = []
-        for _, r in df_chart.iterrows():
-            ttl = (r['제목'][:12]+'..') if len(r['제목'])>12 else r['제목']
-            for t_col in time_cols:
-                try: val = int(str(r[t_col]).replace(',', ''))
-                except: val = 0
-                top5_data.append({'기사제목': ttl, '시간대': t_col, '조회수': val})
-        if top5_data:
-            st.plotly_chart(px.bar(pd.DataFrame(top5_data), y='기사제목', x='조회수', color='시간대', orientation='h', barmode='group', text_auto=',', color_discrete_sequence=CHART_PALETTE), use_container_width=True, key="p5_trend_chart")
-
-def render_category(df_top10):
+        st.caption("발행 시각부터 12/24/48시간 동안의 누적 조회수 (발행 시각을 알 수 없거나 조회 주 시작 2주 전보다 먼저 발행된 기사는 '-')")
+        df_table, df_chart = top10_trend_tables(df_top10)
+        st.dataframe(df_table, use_container_width=True, hide_index=True)
+        if not df_chart.empty:
+            fig = cached_figure("p5_trend_chart", [df_chart], lambda: px.bar(df_chart, y='기사제목', x='조회수', color='시간대', orientation='h', barmode='group', text_auto=',', color_discrete_sequence=CHART_PALETTE))
+            st.plotly_chart(fig, use_container_width=True, key="p5_trend_chart")
+
+# 카테고리/기자별 분석은 이번주 조회된 기사 전체(전체 기사 색인) 기준. 아직 색인하지 못한 기사가 있으면 안내
+def render_index_note(articles_pending, articles_degraded):
+    render_degraded_note(articles_degraded, "색인하지 못해 카테고리/기자별 집계에서 빠졌습니다.")
+    if articles_pending: st.caption(f"ℹ️ 아직 색인하지 못한 기사 {articles_pending:,}건은 제외되었습니다 (다음 집계 때 이어서 색인).")
+
+def render_category(df_articles, articles_pending, articles_degraded):
     st.markdown('<div class="section-header-container"><div class="section-header">6. 카테고리별 분석</div></div>', unsafe_allow_html=True)
-    if not df_top10.empty:
-        df_real = df_top10
-        cat_main = df_real.groupby('카테고리').agg(기사수=('제목','count'), 전체조회수=('전체조회수','sum')).reset_index()
-        cat_main['비중'] = (cat_main['기사수'] / cat_main['기사수'].sum() * 100).map('{:.1f}%'.format)
-        cat_main['기사1건당평균'] = (cat_main['전체조회수'] / cat_main['기사수']).astype(int).map('{:,}'.format)
-        cat_main['전체조회수'] = cat_main['전체조회수'].map('{:,}'.format)
+    render_index_note(articles_pending, articles_degraded)
+    if not df_articles.empty:
+        cat_main, cat_sub = category_tables(df_articles)
         st.markdown('<div class="chart-header">1. 메인 카테고리별 기사 수</div>', unsafe_allow_html=True)
-        st.plotly_chart(px.bar(cat_main, x='카테고리', y='기사수', text_auto=True, color='카테고리', color_discrete_sequence=CHART_PALETTE).update_layout(showlegend=False, plot_bgcolor='white'), use_container_width=True, key="cat_main_chart")
+        fig = cached_figure("cat_main_chart", [cat_main], lambda: px.bar(cat_main, x='카테고리', y='기사수', text_auto=True, color='카테고리', color_discrete_sequence=CHART_PALETTE).update_layout(showlegend=False, plot_bgcolor='white'))
+        st.plotly_chart(fig, use_container_width=True, key="cat_main_chart")
         st.dataframe(cat_main, use_container_width=True, hide_index=True)
         st.markdown('<div class="chart-header">2. 세부 카테고리별 기사 수</div>', unsafe_allow_html=True)
-        cat_sub = df_real.groupby(['카테고리', '세부카테고리']).agg(기사수=('제목','count'), 전체조회수=('전체조회수','sum')).reset_index()
-        cat_sub['비중'] = (cat_sub['기사수'] / cat_sub['기사수'].sum() * 100).map('{:.1f}%'.format)
-        cat_sub['기사1건당평균'] = (cat_sub['전체조회수'] / cat_sub['기사수']).astype(int).map('{:,}'.format)
-        cat_sub['전체조회수'] = cat_sub['전체조회수'].map('{:,}'.format)
-        st.plotly_chart(px.bar(cat_sub, x='세부카테고리', y='기사수', text_auto=True, color='카테고리', color_discrete_sequence=CHART_PALETTE).update_layout(plot_bgcolor='white'), use_container_width=True, key="cat_sub_chart")
+        fig = cached_figure("cat_sub_chart", [cat_sub], lambda: px.bar(cat_sub, x='세부카테고리', y='기사수', text_auto=True, color='카테고리', color_discrete_sequence=CHART_PALETTE).update_layout(plot_bgcolor='white'))
+        st.plotly_chart(fig, use_container_width=True, key="cat_sub_chart")
         st.dataframe(cat_sub, use_container_width=True, hide_index=True)
 
-def get_writers_df_real(df_raw_all):
-    pen_data = [{'필명':'맛객', '본명':'이경엽'}, {'필명':'Chef J', '본명':'조용수'}, {'필명':'푸드헌터', '본명':'김철호'}, {'필명':'Dr.Kim', '본명':'안정미'}]
-    real_to_pen_map = {item['본명']: item['필명'] for item in pen_data}
-    if df_raw_all.empty: return pd.DataFrame()
-    writers = df_raw_all.groupby('작성자').agg(기사수=('pageTitle','count'), 총조회수=('screenPageViews','sum'), 좋아요=('좋아요', 'sum'), 댓글=('댓글', 'sum')).reset_index().sort_values('총조회수', ascending=False)
-    writers['순위'] = range(1, len(writers)+1)
-    writers['필명'] = writers['작성자'].map(real_to_pen_map).fillna('')
-    writers['평균조회수'] = (writers['총조회수']/writers['기사수']).astype(int)
-    return writers
-
 def render_writer_real(writers_df):
     st.markdown('<div class="section-header-container"><div class="section-header">7. 이번주 기자별 분석 (본명 기준)</div></div>', unsafe_allow_html=True)
     if not writers_df.empty:
-        disp_w = writers_df.copy()
-        for c in ['총조회수','평균조회수','좋아요','댓글']: disp_w[c] = disp_w[c].apply(lambda x: f"{x:,}")
-        disp_w = disp_w[['순위', '작성자', '필명', '기사수', '총조회수', '평균조회수', '좋아요', '댓글']]
-        disp_w.columns = ['순위', '본명', '필명', '발행기사 수', '전체 조회 수', '기사 1건 당 평균 조회 수', '좋아요 개수', '댓글 개수']
-        st.dataframe(disp_w, use_container_width=True, hide_index=True)
+        st.dataframe(writer_real_table(writers_df), use_container_width=True, hide_index=True)
 
 def render_writer_pen(writers_df):
     st.markdown('<div class="section-header-container"><div class="section-header">8. 이번주 기자별 분석 (필명 기준)</div></div>', unsafe_allow_html=True)
     if not writers_df.empty:
-        df_pen = writers_df[writers_df['필명'] != ''].copy()
-        if not df_pen.empty:
-            df_pen['순위'] = df_pen['총조회수'].rank(ascending=False).astype(int)
-            df_pen = df_pen.sort_values('순위')
-            disp_w = df_pen.copy()
-            for c in ['총조회수','평균조회수','좋아요','댓글']: disp_w[c] = disp_w[c].apply(lambda x: f"{x:,}")
-            disp_w = disp_w[['순위', '필명', '작성자', '기사수', '총조회수', '평균조회수', '좋아요', '댓글']]
-            disp_w.columns = ['순위', '필명', '본명', '발행기사 수', '전체 조회 수', '기사 1건 당 평균 조회 수', '좋아요 개수', '댓글 개수']
-            st.dataframe(disp_w, use_container_width=True, hide_index=True)
+        df_pen = writer_pen_table(writers_df)
+        if df_pen is not None: st.dataframe(df_pen, use_container_width=True, hide_index=True)
         else: st.info("필명 기자 실적 없음")
 
-# ----------------- 메인 UI 및 모드 제어 -----------------
-
-if 'print_mode' not in st.session_state:
-    st.session_state['print_mode'] = False
-
-c1, c2 = st.columns([2, 1])
-with c1: st.markdown('<div class="report-title">📰 쿡앤셰프 주간 성과보고서</div>', unsafe_allow_html=True)
-
-with c2:
-    col_btn1, col_btn2 = st.columns(2)
-    if st.session_state['print_mode']:
-        if col_btn1.button("🔙 대시보드로 복귀", type="secondary"):
-            st.session_state['print_mode'] = False
-            st.rerun()
-        if col_btn2.button("🖨️ 인쇄 실행", type="primary"):
-            st.components.v1.html("<script>window.parent.print();</script>", height=0, width=0)
-    else:
-        if col_btn2.button("🖨️ 인쇄 미리보기", type="primary"):
-            st.session_state['print_mode'] = True
-            st.rerun()
-        
-    if not st.session_state['print_mode']:
-        selected_week = st.selectbox("📅 조회 주차", list(WEEK_MAP.keys()), key="week_select", label_visibility="collapsed")
-    else:
-        # 인쇄 미리보기에서도 현재 선택된 주차 유지
-        selected_week = st.session_state.get('week_select', list(WEEK_MAP.keys())[0])
-
-st.markdown(f'<div class="period-info">📅 조회 기간: {WEEK_MAP[selected_week]}</div>', unsafe_allow_html=True)
-st.markdown(f"<div class='update-time'>최종 집계: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>", unsafe_allow_html=True)
-
-(cur_uv, cur_pv, df_daily, df_weekly, df_traffic_curr, df_traffic_last, 
- df_region_curr, df_region_last, df_age_curr, df_age_last, df_gender_curr, df_gender_last, 
- df_top10, df_raw_all, new_ratio, search_ratio, active_article_count) = load_all_dashboard_data(selected_week)
-
-writers_df = get_writers_df_real(df_raw_all)
-
-# ----------------- 뷰 렌더링 -----------------
+# 기자별 표는 df_articles 가 도착하면 그 자리에서 집계해 그린다
+def render_writers_real(df_articles, articles_pending, articles_degraded):
+    render_writer_real(get_writers_df_real(df_articles))
+    render_index_note(articles_pending, articles_degraded)
+
+def render_writers_pen(df_articles, articles_pending, articles_degraded):
+    render_writer_pen(get_writers_df_real(df_articles))
+    render_index_note(articles_pending, articles_degraded)
+
+# GA4 조회에 실패한 섹션은 빈 값으로 두고 안내 (이 결과는 공유 캐시에 저장되지 않으므로 새로고침하면 다시 조회)
+def render_errors(errors):
+    if errors:
+        st.warning("⚠️ 일부 GA4 데이터를 불러오지 못해 아래 섹션이 비어 있을 수 있습니다. 잠시 후 새로고침해 주세요.\n\n"
+                   + "\n".join(f"- {sec}: {err}" for sec, err in errors.items()))
+
+# 크롤링 마감 시간 안에 못 가져온 기사는 작성자 '미상', 카테고리 '미분류' 로 집계되어 있다
+def render_crawl_pending(crawl_pending):
+    if crawl_pending:
+        st.info(f"⏳ 기사 {crawl_pending:,}건의 작성자/카테고리 정보를 아직 가져오는 중이라 일부는 '미상'으로 표시됩니다. 잠시 후 새로고침하면 반영됩니다.")
+
+def layout_demo(view):
+    add_slot(view, REGION_FIELDS, render_demo_region)
+    st.markdown("---")
+    add_slot(view, AGE_GENDER_FIELDS, render_demo_age_gender)
+
+# 일반 모드의 탭: 이름 -> (탭 안에 자리를 까는 함수, 필요한 보고서 섹션)
+# 열린 탭의 섹션만 집계하므로, 열어 보지 않은 탭의 GA4 조회/기사 크롤링은 하지 않는다
+REPORT_TABS = {
+    "1.성과요약": (layout_summary, ("summary", "daily", "week", "pages_count", "traffic")),
+    "2.접근경로": (lambda view: add_slot(view, TRAFFIC_FIELDS, render_traffic), ("traffic",)),
+    "3.방문자특성": (layout_demo, ("region", "age", "gender")),
+    "4.Top10상세": (lambda view: add_slot(view, TOP_FIELDS, render_top10_detail), ("top",)),
+    "5.Top10추이": (lambda view: add_slot(view, TOP_FIELDS, render_top10_trends), ("top",)),
+    "6.카테고리": (lambda view: add_slot(view, ARTICLE_FIELDS, render_category), ("articles",)),
+    "7.기자(본명)": (lambda view: add_slot(view, ARTICLE_FIELDS, render_writers_real), ("articles",)),
+    "8.기자(필명)": (lambda view: add_slot(view, ARTICLE_FIELDS, render_writers_pen), ("articles",)),
+}
 
-if st.session_state['print_mode']:
-    # [인쇄 모드] : 가로 인쇄 최적화 레이아웃
+# 서버에서 그린 PDF (cnc_export). matplotlib 은 누를 때만 불러온다
+def report_pdf_bytes(report, selected_week):
+    from cnc_export import render_report_pdf, setup_korean_font
+    setup_korean_font()
+    buf = io.BytesIO()
+    render_report_pdf(report, selected_week, WEEK_MAP[selected_week], buf)
+    return buf.getvalue()
+
+# ----------------- 보고서 본문 -----------------
+# layout(view): 보고서 자리를 깔고 집계할 섹션 이름들을 돌려준다 (None 이면 전체)
+def show_report(selected_week, layout):
+    view = new_report_view()
+    progress_slot = st.empty()
+    # 스냅샷이면 사전 집계 시각이 표시됨
+    add_slot(view, ["generated_at"], lambda t: st.markdown(f"<div class='update-time'>최종 집계: {t.strftime('%Y-%m-%d %H:%M:%S')}</div>", unsafe_allow_html=True), loading=None)
+    add_slot(view, ["errors"], render_errors, loading=None)
+    add_slot(view, ["crawl_pending"], render_crawl_pending, loading=None)
+    sections = layout(view)
+    # 직접 집계하면 섹션이 끝나는 대로 채워지고, 캐시/스냅샷이면 마지막 update_view 에서 한 번에 채워진다
+    report = load_all_dashboard_data(selected_week, lambda values: update_view(view, values), progress_slot, sections)
+    update_view(view, report)
+    return report
+
+# [인쇄 모드] : 가로 인쇄 최적화 레이아웃, 전체 섹션을 한 번에 집계
+def layout_print(view):
     st.info("💡 인쇄 미리보기: 가로(Landscape) 인쇄를 지원하며, 선택된 주차 데이터로 출력됩니다.")
-    render_summary(df_weekly, cur_pv, cur_uv, new_ratio, search_ratio, df_daily, active_article_count)
+    layout_summary(view)
     st.markdown("<br>", unsafe_allow_html=True)
-    render_traffic(df_traffic_curr, df_traffic_last)
+    add_slot(view, TRAFFIC_FIELDS, render_traffic)
     st.markdown('<div class="page-break"></div>', unsafe_allow_html=True)
-    render_demo_region(df_region_curr, df_region_last)
+    add_slot(view, REGION_FIELDS, render_demo_region)
     st.markdown('<div class="page-break"></div>', unsafe_allow_html=True)
-    render_demo_age_gender(df_age_curr, df_age_last, df_gender_curr, df_gender_last)
+    add_slot(view, AGE_GENDER_FIELDS, render_demo_age_gender)
     st.markdown('<div class="page-break"></div>', unsafe_allow_html=True)
-    render_top10_detail(df_top10)
+    add_slot(view, TOP_FIELDS, render_top10_detail)
     st.markdown("<br>", unsafe_allow_html=True)
-    render_top10_trends(df_top10)
+    add_slot(view, TOP_FIELDS, render_top10_trends)
     st.markdown('<div class="page-break"></div>', unsafe_allow_html=True)
-    render_category(df_top10)
+    add_slot(view, ARTICLE_FIELDS, render_category)
     st.markdown('<div class="page-break"></div>', unsafe_allow_html=True)
-    render_writer_real(writers_df)
+    add_slot(view, ARTICLE_FIELDS, render_writers_real)
     st.markdown("<br>", unsafe_allow_html=True)
-    render_writer_pen(writers_df)
+    add_slot(view, ARTICLE_FIELDS, render_writers_pen)
     st.markdown('<div class="print-footer" style="text-align:center; font-size:11px; color:#999; margin-top:20px;">Cook&Chef Weekly Report - Generated by AI System</div>', unsafe_allow_html=True)
+    return None
+
+# [일반 모드] : 탭 방식 유지. 열린 탭만 그린다 (처음 열 때 그 탭의 데이터를 집계해 캐시)
+def layout_tabs(view):
+    tabs = st.tabs(list(REPORT_TABS), key="report_tab", on_change="rerun")
+    sections = set()
+    for tab, (layout, tab_sections) in zip(tabs, REPORT_TABS.values()):
+        if not tab.open: continue
+        with tab: layout(view)
+        sections.update(tab_sections)
+    return sections
+
+# ----------------- 메인 UI 및 모드 제어 -----------------
+# 화면을 fragment 로 나눠 상호작용한 부분만 다시 실행한다.
+# 모듈 상단(페이지 설정, CSS, 로그인, 주차 계산)은 처음 열 때/새로고침 때만 실행되고
+# - 인쇄 미리보기 전환, 주차 변경: dashboard (제목/버튼/주차 선택 + 보고서 본문)
+# - 탭 전환: report_tabs (탭 본문만)
+# - 인쇄 실행: print_button (버튼만)
+
+if 'print_mode' not in st.session_state:
+    st.session_state['print_mode'] = False
+
+def set_print_mode(on):
+    st.session_state['print_mode'] = on
+
+@st.fragment(key="print_button")
+def print_button():
+    if st.button("🖨️ 인쇄 실행", type="primary"):
+        st.components.v1.html("<script>window.parent.print();</script>", height=0, width=0)
+
+@st.fragment(key="report_tabs")
+def report_tabs(selected_week):
+    show_report(selected_week, layout_tabs)
 
-else:
-    # [일반 모드] : 탭 방식 유지
-    tabs = st.tabs(["1.성과요약", "2.접근경로", "3.방문자특성", "4.Top10상세", "5.Top10추이", "6.카테고리", "7.기자(본명)", "8.기자(필명)"])
-    with tabs[0]: render_summary(df_weekly, cur_pv, cur_uv, new_ratio, search_ratio, df_daily, active_article_count)
-    with tabs[1]: render_traffic(df_traffic_curr, df_traffic_last)
-    with tabs[2]: 
-        render_demo_region(df_region_curr, df_region_last)
-        st.markdown("---")
-        render_demo_age_gender(df_age_curr, df_age_last, df_gender_curr, df_gender_last)
-    with tabs[3]: render_top10_detail(df_top10)
-    with tabs[4]: render_top10_trends(df_top10)
-    with tabs[5]: render_category(df_top10)
-    with tabs[6]: render_writer_real(writers_df)
-    with tabs[7]: render_writer_pen(writers_df)
-
-st.markdown('<div class="footer-note no-print">※ 쿡앤셰프(Cook&Chef) GA4 데이터 자동 집계 시스템</div>', unsafe_allow_html=True)
\ No newline at end of file
+@st.fragment(key="dashboard")
+def dashboard():
+    print_mode = st.session_state['print_mode']
+    c1, c2 = st.columns([2, 1])
+    with c1: st.markdown('<div class="report-title">📰 쿡앤셰프 주간 성과보고서</div>', unsafe_allow_html=True)
+
+    with c2:
+        col_btn1, col_btn2 = st.columns(2)
+        if print_mode:
+            col_btn1.button("🔙 대시보드로 복귀", type="secondary", on_click=set_print_mode, args=(False,))
+            with col_btn2: print_button()
+            # 데이터를 다 불러온 뒤 PDF 저장 버튼을 여기에 넣는다
+            pdf_slot = st.empty()
+            # 인쇄 미리보기에서도 현재 선택된 주차 유지
+            selected_week = current_week()
+        else:
+            col_btn2.button("🖨️ 인쇄 미리보기", type="primary", on_click=set_print_mode, args=(True,))
+            selected_week = st.selectbox("📅 조회 주차", list(WEEK_MAP.keys()), key="week_select", label_visibility="collapsed")
+
+    st.markdown(f'<div class="period-info">📅 조회 기간: {WEEK_MAP[selected_week]}</div>', unsafe_allow_html=True)
+
+    if print_mode:
+        report = show_report(selected_week, layout_print)
+        pdf_slot.download_button("📄 PDF 저장", data=lambda: report_pdf_bytes(report, selected_week), mime="application/pdf",
+                                 file_name=f"cncnews_weekly_{WEEK_MAP[selected_week].split(' ~ ')[0].replace('.', '-')}_{selected_week}.pdf")
+    else:
+        report_tabs(selected_week)
+
+# ----------------- 관리자 패널 (숨김) -----------------
+# 주소에 ?admin=1 을 붙이면 맨 아래에 보인다. 이 프로세스의 최근 로드별 단계 waterfall 과 Prometheus 지표 (cnc_metrics)
+ADMIN_TRACES = 10
+
+def span_label(i, s):
+    detail = s.get('report') or ','.join(s.get('dimensions') or []) or (f"{s['paths']}건" if 'paths' in s else "")
+    return f"{i:02d} {s['stage']}" + (f" ({detail})" if detail else "")
+
+def waterfall_figure(tr):
+    spans = sorted(tr['spans'], key=lambda s: s['start'])
+    labels = [span_label(i, s) for i, s in enumerate(spans)]
+    hover = ["<br>".join(f"{k}: {v}" for k, v in s.items() if k not in ('start', 'sec')) for s in spans]
+    fig = go.Figure(go.Bar(y=labels, x=[s['sec'] for s in spans], base=[s['start'] for s in spans], orientation='h',
+                           marker_color=[COLOR_RED if s['stage'].startswith(('ga4', 'crawl', 'feed')) else COLOR_NAVY for s in spans],
+                           hovertext=hover, hoverinfo="text+x"))
+    fig.update_layout(yaxis=dict(autorange="reversed"), xaxis_title="초 (로드 시작 기준)", height=max(250, 22 * len(spans)),
+                      margin=dict(t=20, b=40, l=10, r=10), plot_bgcolor='white')
+    return fig
+
+@st.fragment(key="admin_panel")
+def admin_panel():
+    with st.expander("⚙️ 최근 로드 기록 (관리자)"):
+        traces = recent_traces(ADMIN_TRACES)
+        if not traces: st.info("아직 기록된 로드가 없습니다.")
+        else:
+            rows = [{'시각': datetime.fromtimestamp(t['at']).strftime('%m-%d %H:%M:%S'), '주차': t['tags'].get('week'),
+                     '섹션': ', '.join(t['tags'].get('sections') or ["전체"]), '출처': t['tags'].get('source'),
+                     '소요(초)': round(t['sec'], 3), '단계 수': len(t['spans'])} for t in traces]
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+            pick = st.selectbox("waterfall", range(len(traces)), key="admin_trace",
+                                format_func=lambda i: f"{rows[i]['시각']} · {rows[i]['주차']} · {rows[i]['출처']} · {rows[i]['소요(초)']}초")
+            st.plotly_chart(waterfall_figure(traces[pick]), use_container_width=True, key="admin_waterfall")
+        metrics = render_prometheus()
+        st.download_button("📥 Prometheus 지표", metrics, file_name="cnc_metrics.prom", mime="text/plain")
+        st.code(metrics, language=None)
+
+dashboard()
+st.markdown('<div class="footer-note no-print">※ 쿡앤셰프(Cook&Chef) GA4 데이터 자동 집계 시스템</div>', unsafe_allow_html=True)
+if st.query_params.get("admin") == "1": admin_panel()
@@ -0,0 +1,29 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_article_store import ArticleStore
+
+WW5 = {'author': "김철호", 'category': "외식", 'subcategory': "트렌드", 'pub_date': "2026-10-05 09:30"}
+WW4 = {'author': "김철호 ", 'category': "외식", 'pub_date': "2026-10-05"}
+
+# 같은 DB 파일을 써도 WW4 가 저장한 행은 ww5 조회에 보이지 않는다
+def test_apps_keep_separate_tables(tmp_path):
+    db = str(tmp_path / "articles.sqlite3")
+    ww5, ww4 = ArticleStore(db), ArticleStore(db, table="articles_ww4")
+    ww5.save("/a", WW5)
+    ww4.save("/a", WW4)
+    ww4.save("/b", WW4)
+    records, to_fetch = ww5.lookup(["/a", "/b"], need_dynamic=False, static_ttl=float('inf'))
+    assert records == {"/a": WW5} and to_fetch == ["/b"]
+    assert ww4.lookup(["/a"], need_dynamic=False)[0] == {"/a": WW4}
+
+# 다른 저장 형식 버전으로 저장된 행은 값을 쓰지 않고, 다시 가져오면 현재 버전으로 바뀐다
+def test_other_meta_version_is_stale(tmp_path):
+    db = str(tmp_path / "articles.sqlite3")
+    ArticleStore(db, meta_version=0).save("/a", WW4)
+    store = ArticleStore(db)
+    assert store.lookup(["/a"], need_dynamic=False, static_ttl=float('inf')) == ({}, ["/a"])
+    meta = store.get_or_crawl(["/a"], lambda ps: {p: WW5 for p in ps}, need_dynamic=False, static_ttl=float('inf'))
+    assert meta == {"/a": WW5}
+    assert store.lookup(["/a"], need_dynamic=False, static_ttl=float('inf')) == ({"/a": WW5}, [])
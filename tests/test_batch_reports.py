@@ -0,0 +1,53 @@
+import os
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "bench"))
+from fake_ga4 import FakeGA4Client
+from cnc_article_store import ArticleStore
+from cnc_ga4 import BATCH_SIZE, run_batch_reports
+from cnc_report import build_weekly_report, get_sunday_to_saturday_ranges
+
+# batchRunReports 는 한 번에 5개까지만 받으므로 묶음마다 요청 수를 기록한다
+class RecordingClient(FakeGA4Client):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.batches = []
+
+    def batch_run_reports(self, request):
+        self.batches.append([tuple(d.name for d in r.dimensions) for r in request.requests])
+        return super().batch_run_reports(request)
+
+DIMS = ["date", "sessionSource", "region", "userAgeBracket", "userGender", "pagePath", "pageTitle", "dateHour"]
+
+def test_batches_hold_at_most_five_reports_and_map_back():
+    client = RecordingClient()
+    specs = {f"r{i}": dict(start_date="2026-10-04", end_date="2026-10-10", dimensions=[DIMS[i % len(DIMS)]], metrics=["activeUsers"])
+             for i in range(12)}
+    frames = run_batch_reports(client, "1", specs)
+    assert [len(b) for b in client.batches] == [5, 5, 2]
+    assert all(len(b) <= BATCH_SIZE for b in client.batches)
+    for name, spec in specs.items():
+        assert list(frames[name].columns) == spec['dimensions'] + spec['metrics']
+        assert not frames[name].empty
+
+# 대시보드 로딩(load_all_dashboard_data -> build_weekly_report)의 GA4 요청도 모두 5개 이하 묶음으로 나가고,
+# 각 섹션은 자기 리포트로 집계된다 (다른 리포트를 받으면 열이 맞지 않아 집계가 깨진다)
+def test_weekly_report_batches_and_sections():
+    client = RecordingClient()
+    week_map = get_sunday_to_saturday_ranges(today=datetime(2026, 10, 18))
+    week = list(week_map)[1]
+    report = build_weekly_report(client, "1", week_map, week, ArticleStore(":memory:"), None,
+                                 sections=['summary', 'daily', 'week', 'traffic', 'region', 'age', 'gender'])
+    assert client.batches and all(len(b) <= BATCH_SIZE for b in client.batches)
+    assert all(kind == 'batch' for kind, _ in client.calls)
+    sent = [d for b in client.batches for d in b]
+    assert sent.count(("date",)) == 1 and sent.count(("sessionSource",)) == 1
+    assert list(report['df_daily'].columns) == ['날짜', 'UV', 'PV'] and len(report['df_daily']) == 7
+    assert set(report['df_traffic_curr'].columns) == {'유입경로', '조회수'}
+    for key in ('df_region_curr', 'df_region_last', 'df_age_curr', 'df_age_last', 'df_gender_curr', 'df_gender_last'):
+        assert list(report[key].columns) == ['구분', 'activeUsers'] and not report[key].empty
+    assert len(report['df_weekly']) == 12
+    assert report['cur_uv'] > 0 and report['cur_pv'] > 0
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cnc_crawler
+from cnc_crawler import CircuitBreaker
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cnc_crawler.time, "monotonic", lambda: now[0])
+    return now
+
+def allow(breaker):
+    return asyncio.run(breaker.allow())
+
+# 연속 실패가 failures 번이면 열리고, 중간에 성공하면 다시 센다
+def test_opens_after_consecutive_failures(clock):
+    b = CircuitBreaker(failures=3, cooldown=30)
+    b.record_failure(); b.record_failure(); b.record_success()
+    b.record_failure(); b.record_failure()
+    assert b.state == "closed" and allow(b)
+    b.record_failure()
+    assert b.state == "open" and b.stats['opened'] == 1
+    assert not allow(b) and not allow(b)
+    assert b.snapshot()['skipped'] == 2
+
+# cooldown 이 지나면 시험 요청 하나만 보내고, 나머지는 결과를 기다린다. 성공하면 닫히고 모두 보낸다
+def test_half_open_probe_success_closes(clock):
+    b = CircuitBreaker(failures=1, cooldown=30)
+    b.record_failure()
+    clock[0] += 29
+    assert not allow(b)
+    clock[0] += 1
+    async def run():
+        probe = await b.allow()
+        assert b.state == "half_open"
+        waiters = [asyncio.create_task(b.allow()) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert not any(w.done() for w in waiters)
+        b.record_success()
+        return probe, await asyncio.gather(*waiters)
+    probe, rest = asyncio.run(run())
+    assert probe and rest == [True] * 3
+    assert b.state == "closed" and b.stats['probes'] == 1
+
+# 시험 요청이 실패하면 다시 열리고, 기다리던 요청은 보내지 않는다
+def test_half_open_probe_failure_reopens(clock):
+    b = CircuitBreaker(failures=1, cooldown=30)
+    b.record_failure()
+    clock[0] += 30
+    async def run():
+        assert await b.allow()
+        waiters = [asyncio.create_task(b.allow()) for _ in range(2)]
+        await asyncio.sleep(0)
+        b.record_failure()
+        return await asyncio.gather(*waiters)
+    assert asyncio.run(run()) == [False, False]
+    assert b.state == "open" and b.stats['opened'] == 2 and b.opened_at == clock[0]
+
+# 시험 요청이 결과 없이 끝나면(취소 등) 기다리던 요청 하나가 시험을 맡는다
+def test_abandoned_probe_hands_over(clock):
+    b = CircuitBreaker(failures=1, cooldown=30)
+    b.record_failure()
+    clock[0] += 30
+    async def run():
+        assert await b.allow()
+        waiter = asyncio.create_task(b.allow())
+        await asyncio.sleep(0)
+        b.end_probe()
+        return await waiter
+    assert asyncio.run(run())
+    assert b.state == "half_open" and b.stats['probes'] == 2
@@ -0,0 +1,48 @@
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import cnc_cache
+from cnc_cache import DiskCache, FakeRedis, RedisCache, make_key
+
+@pytest.fixture(params=["disk", "redis"])
+def cache(request, tmp_path):
+    return DiskCache(str(tmp_path / "data")) if request.param == "disk" else RedisCache(client=FakeRedis())
+
+# 보고서처럼 DataFrame(Parquet)과 일반 값(pickle)이 섞인 dict 를 그대로 돌려받는다
+def test_round_trip(cache):
+    df = pd.DataFrame({'region': pd.Categorical(["서울", "부산"]), 'activeUsers': [10, 3], 'bounceRate': [0.5, 0.25]})
+    df.attrs['row_count'] = 2
+    value = {'cur_uv': 13, 'new_ratio': 12.5, 'df_region_curr': df, 'weeks': [("42주차", df.head(1))], 'pending': None}
+    key = make_key("weekly_report", 1, "370663478", "2026.10.11 ~ 2026.10.17")
+    cache.set(key, value, ttl=60)
+    got = cache.get(key)
+    assert got['cur_uv'] == 13 and got['new_ratio'] == 12.5 and got['pending'] is None
+    pd.testing.assert_frame_equal(got['df_region_curr'], df)
+    assert got['df_region_curr'].attrs['row_count'] == 2
+    assert got['weeks'][0][0] == "42주차"
+    pd.testing.assert_frame_equal(got['weeks'][0][1], df.head(1))
+
+# TTL 이 지난 값은 없는 것으로 보고, 잠금(add_bytes)도 만료되면 다시 잡을 수 있다
+def test_ttl_expiry(cache, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(cnc_cache.time, "time", lambda: now[0])
+    key = make_key("ga4_report", "1", {'x': 1})
+    cache.set(key, {'v': 1}, ttl=10)
+    assert cache.add_bytes(f"{key}:lock", b"a", 10)
+    assert not cache.add_bytes(f"{key}:lock", b"b", 10)
+    now[0] += 5
+    assert cache.get(key) == {'v': 1}
+    now[0] += 6
+    assert cache.get(key) is None
+    assert cache.add_bytes(f"{key}:lock", b"b", 10)
+    assert cache.get_bytes(f"{key}:lock") == b"b"
+
+def test_unreadable_value_is_a_miss(cache):
+    key = make_key("ga4_report", "1", {'x': 2})
+    cache.set_bytes(key, b"not a pickle", 60)
+    assert cache.get(key) is None
@@ -0,0 +1,25 @@
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from cnc_extract import extract_article_fields
+from cnc_report import build_article_meta
+
+FIXTURES = sorted(glob.glob(os.path.join(ROOT, "bench", "fixtures", "articles", "*.html")))
+
+def read(name):
+    with open(os.path.join(ROOT, "bench", "fixtures", "articles", name), encoding="utf-8") as f: return f.read()
+
+# 조기 종료해도 끝까지 읽은 결과와 같은 메타데이터가 나와야 한다
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_early_stop_matches_full_parse(path):
+    with open(path, encoding="utf-8") as f: html = f.read()
+    assert build_article_meta(extract_article_fields(html)) == build_article_meta(extract_article_fields(html, chunk_size=len(html)))
+
+# 발행일이 브레드크럼/좋아요/댓글보다 뒤에 있어도 놓치지 않는다
+def test_pub_date_after_breadcrumb():
+    assert build_article_meta(extract_article_fields(read("date_after_breadcrumb.html")))['pub_date'] == "2026-10-05 09:30"
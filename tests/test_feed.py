@@ -0,0 +1,74 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from cnc_feed import FeedExtractor, FeedIndex, build_feed_meta, feed_path
+from cnc_report import INDEX_FIELDS
+
+FEED_DIR = os.path.join(ROOT, "bench", "fixtures", "feeds")
+RSS, SITEMAP = "/rss/allArticle.xml", "/sitemap.xml"
+FILES = {RSS: "allArticle.xml", SITEMAP: "sitemap.xml"}
+
+def read(path):
+    with open(os.path.join(FEED_DIR, FILES[path]), encoding="utf-8") as f: return f.read()
+
+# 크롤러처럼 목록을 작은 조각으로 나눠 넣는다
+def extract(text, chunk=97):
+    ex = FeedExtractor()
+    for i in range(0, len(text), chunk): ex.feed(text[i:i + chunk])
+    ex.close()
+    return ex.result()
+
+def metas(text):
+    return {feed_path(item['link']): build_feed_meta(item) for item in extract(text)}
+
+# ArticleCrawler.crawl_extract 대신 저장된 목록을 돌려준다
+class FixtureCrawler:
+    def __init__(self):
+        self.calls = 0
+
+    def crawl_extract(self, paths, make_extractor, build_fn, *args):
+        self.calls += 1
+        out = {}
+        for p in paths:
+            ex = make_extractor()
+            ex.feed(read(p))
+            ex.close()
+            out[p] = build_fn(ex.result())
+        return out
+
+def test_rss_items():
+    found = metas(read(RSS))
+    assert len(found) == 40
+    assert found["/news/articleView.html?idxno=1039"] == {'title': "기사 제목 3048", 'author': "3", 'category': "뉴스", 'subcategory': "외식 3",
+                                                          'pub_date': "2026-10-25 09:30"}
+
+def test_sitemap_items():
+    found = metas(read(SITEMAP))
+    assert len(found) == 30
+    assert found["/news/articleView.html?idxno=1059"] == {'title': "기사 제목 3050", 'pub_date': "2026-10-27 09:30"}
+
+# 카테고리가 하나면 '뉴스 > 외식' 을 나누고, UTC 시각은 한국 시각으로 바꾼다
+def test_single_category_path_and_utc_date():
+    xml = ("<rss><channel><item><link>http://www.cooknchefnews.com/news/articleView.html?idxno=7</link>"
+           "<dc:creator xmlns:dc='http://purl.org/dc/elements/1.1/'>김철호 기자</dc:creator><category>뉴스 &gt; 외식</category>"
+           "<pubDate>2026-10-05T00:30:00+00:00</pubDate></item></channel></rss>")
+    assert metas(xml) == {"/news/articleView.html?idxno=7": {'author': "김철호", 'category': "뉴스", 'subcategory': "외식",
+                                                             'pub_date': "2026-10-05 09:30"}}
+
+# 잘린 목록이면 그때까지 다 읽은 항목만 쓴다
+def test_truncated_feed_keeps_complete_items():
+    text = read(RSS)
+    cut = text.index("<item>", text.index("idxno=1036"))
+    assert len(extract(text[:cut + 30])) == 4
+
+# 두 목록에 모두 있는 기사는 앞 목록(RSS) 값을 쓰고, 작성자/카테고리가 없는 사이트맵 기사는 색인에 쓰지 않는다
+def test_index_merges_feeds_and_filters_fields():
+    crawler = FixtureCrawler()
+    index = FeedIndex(crawler, feed_paths=[RSS, SITEMAP], refresh=600)
+    both, sitemap_only = "/news/articleView.html?idxno=1039", "/news/articleView.html?idxno=1059"
+    found = index.lookup([both, sitemap_only, "/news/articleView.html?idxno=9999"], INDEX_FIELDS)
+    assert list(found) == [both] and found[both]['author'] == "3"
+    assert index.records()[sitemap_only] == {'title': "기사 제목 3050", 'pub_date': "2026-10-27 09:30"}
+    assert crawler.calls == 1
@@ -0,0 +1,38 @@
+import os
+import sys
+
+from google.analytics.data_v1beta.types import DimensionHeader, DimensionValue, MetricHeader, MetricType, MetricValue, Row, RunReportResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_ga4 import run_report, split_date_ranges
+
+# 이번주 조회가 지난주보다 모두 많으면 GA4 는 두 기간을 합쳐 정렬한 뒤 limit 을 적용하므로
+# 기간마다 limit 개를 받으려면 요청에 limit 을 그대로 걸면 안 된다
+RANGES = [("2026-10-11", "2026-10-17", "curr"), ("2026-10-04", "2026-10-10", "last")]
+
+class RankedClient:
+    def __init__(self, per_range=80):
+        self.per_range = per_range
+        self.requests = []
+
+    def run_report(self, request):
+        self.requests.append(request)
+        rows = [(f"r{i}", dr.name, (1000 if dr.name == "curr" else 0) + self.per_range - i)
+                for dr in request.date_ranges for i in range(self.per_range)]
+        rows.sort(key=lambda r: -r[2])
+        page = rows[request.offset:request.offset + request.limit]
+        return RunReportResponse(
+            dimension_headers=[DimensionHeader(name="region"), DimensionHeader(name="dateRange")],
+            metric_headers=[MetricHeader(name="activeUsers", type_=MetricType.TYPE_INTEGER)],
+            rows=[Row(dimension_values=[DimensionValue(value=r), DimensionValue(value=n)], metric_values=[MetricValue(value=str(v))])
+                  for r, n, v in page],
+            row_count=len(rows))
+
+def test_multi_range_limit_applies_per_period():
+    client = RankedClient()
+    df = run_report(client, "1", None, None, ["region"], ["activeUsers"], order_by_metric="activeUsers", limit=50, date_ranges=RANGES)
+    parts = split_date_ranges(df, ["curr", "last"])
+    assert len(parts["curr"]) == 50 and len(parts["last"]) == 50
+    assert parts["last"]["region"].tolist() == [f"r{i}" for i in range(50)]
+    assert client.requests[0].limit > 2 * client.per_range
+    assert df.attrs['row_count'] == 2 * client.per_range
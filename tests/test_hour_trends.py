@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_metrics import render_prometheus
+from cnc_report import hour_trend_windows, pub_timestamps
+from cnc_tables import TREND_COLS, top10_trend_tables
+
+# 발행일이 없거나 날짜만 있는 기사는 시간대별 조회수를 세지 않고 '-' 로 보여야 한다
+TIMED, UNDATED, DATE_ONLY = "/news/a", "/news/b", "/news/c"
+CRAWLED = {TIMED: "2026-10-05 09:30", UNDATED: None, DATE_ONLY: "2026-10-05"}
+
+def hours_report():
+    hours = pd.date_range("2026-10-05 00:00", periods=72, freq="h").strftime('%Y%m%d%H')
+    return pd.DataFrame([{'dateHour': h, 'pagePath': p, 'screenPageViews': 1} for p in CRAWLED for h in hours])
+
+def top10(trends):
+    df = pd.DataFrame({'순위': [1, 2, 3], '제목': ["가", "나", "다"], '작성자': "기자", '경로': list(CRAWLED),
+                       '발행일시': ["2026-10-05 09:30", "2026-10-04", "2026-10-05"], '전체조회수': 100})
+    return df.join(trends, on=df['경로'])
+
+def untimed_count():
+    line = next((l for l in render_prometheus().splitlines() if l.startswith("cnc_pub_date_untimed")), None)
+    return float(line.split()[-1]) if line else 0.0
+
+def test_pub_timestamps_keeps_only_crawled_times():
+    before = untimed_count()
+    pub_times = pub_timestamps(CRAWLED)
+    assert list(pub_times.index) == [TIMED]
+    assert pub_times[TIMED] == pd.Timestamp("2026-10-05 09:30")
+    # 날짜만 있는 값은 시각을 모르는 기사로 센다
+    assert untimed_count() == before + 1
+
+def test_windows_missing_for_undated_and_date_only_articles():
+    trends = hour_trend_windows(hours_report(), pub_timestamps(CRAWLED), "2026-10-04")
+    df = top10(trends)
+    assert df.set_index('경로').loc[TIMED, TREND_COLS].tolist() == [12, 24, 48]
+    assert df.set_index('경로').loc[[UNDATED, DATE_ONLY], TREND_COLS].isna().all().all()
+    table, _ = top10_trend_tables(df)
+    shown = table.set_index('제목')
+    assert shown.loc["가", TREND_COLS].tolist() == ["12", "24", "48"]
+    assert (shown.loc[["나", "다"], TREND_COLS] == '-').all().all()
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import pytest
+from google.api_core import exceptions as gexc
+from google.analytics.data_v1beta.types import PropertyQuota, QuotaStatus, RunReportResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_quota import QuotaExhausted, QuotaLimiter
+
+def response(hour_remaining=20000, day_remaining=200000, concurrent_remaining=10):
+    q = PropertyQuota(tokens_per_hour=QuotaStatus(consumed=25000 - hour_remaining, remaining=hour_remaining),
+                      tokens_per_day=QuotaStatus(consumed=250000 - day_remaining, remaining=day_remaining),
+                      concurrent_requests=QuotaStatus(consumed=10 - concurrent_remaining, remaining=concurrent_remaining),
+                      tokens_per_project_per_hour=QuotaStatus(consumed=10, remaining=7490))
+    return RunReportResponse(property_quota=q)
+
+# 실패를 정해진 횟수만큼 낸 뒤 응답을 돌려주는 GA4 호출
+class Flaky:
+    def __init__(self, errors, result=None):
+        self.errors = list(errors)
+        self.result = result if result is not None else response()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors: raise self.errors.pop(0)
+        return self.result
+
+def limiter(**kw):
+    return QuotaLimiter(**{'initial': 4, 'backoff': 0.001, 'max_backoff': 0.002, 'pace_delay': 0.001, **kw})
+
+# 429 는 동시 실행 수를 절반으로 줄이고 백오프 후 다시 보낸다
+def test_quota_errors_back_off_and_retry():
+    lim = limiter()
+    # 쿼터 정보가 없는 응답이라 성공한 뒤에도 한도는 그대로 (4 -> 2 -> 1)
+    fn = Flaky([gexc.TooManyRequests("429"), gexc.ResourceExhausted("quota")], RunReportResponse())
+    assert lim.call(fn) is fn.result
+    snap = lim.snapshot()
+    assert fn.calls == 3 and snap['retries'] == 2 and snap['calls'] == 1 and snap['in_flight'] == 0
+    assert snap['limit'] == 1
+
+# 여유 있는 응답이 이어지면 동시 실행 수가 다시 늘어나고 최대값을 넘지 않는다
+def test_limit_recovers_after_backoff():
+    lim = limiter(max_concurrency=6)
+    lim.call(Flaky([gexc.TooManyRequests("429")] * 2))
+    low = lim.limit
+    for _ in range(50): lim.call(Flaky([]))
+    assert lim.limit > low and lim.limit == pytest.approx(6)
+
+def test_retries_exhausted_raise_last_error():
+    lim = limiter(retries=2)
+    fn = Flaky([gexc.ServiceUnavailable("503")] * 3)
+    with pytest.raises(gexc.ServiceUnavailable): lim.call(fn)
+    assert fn.calls == 3 and lim.snapshot()['errors'] == 1
+
+def test_other_errors_are_not_retried():
+    lim = limiter()
+    fn = Flaky([gexc.InvalidArgument("bad dimension")])
+    with pytest.raises(gexc.InvalidArgument): lim.call(fn)
+    assert fn.calls == 1 and lim.snapshot()['retries'] == 0
+
+# 시간당 토큰이 바닥에 가까우면 하나씩 보내고, 동시 요청 한도에 가까우면 절반으로
+def test_low_tokens_and_concurrency_shrink_limit():
+    lim = limiter()
+    lim.call(Flaky([], response(hour_remaining=1000)))
+    assert lim.limit == lim.min_concurrency and lim.snapshot()['throttled'] == 1
+    lim = limiter()
+    lim.call(Flaky([], response(concurrent_remaining=1)))
+    assert lim.limit == 2
+
+# 토큰 소진이 보고되면 다음 호출은 보내지 않고 바로 실패
+def test_exhausted_tokens_fail_fast():
+    lim = limiter()
+    lim.call(Flaky([], response(hour_remaining=0)))
+    fn = Flaky([])
+    with pytest.raises(QuotaExhausted): lim.call(fn)
+    assert fn.calls == 0
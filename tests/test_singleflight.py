@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cnc_cache import DiskCache, FakeRedis, RedisCache, make_key
+
+# 같은 키를 동시에 요청하면 fn 은 한 번만 실행되고 모두 같은 값을 받는다
+def run_sessions(cache, key, fn, n=20, **kw):
+    start = threading.Barrier(n)
+    results, errors = [], []
+    def one():
+        start.wait()
+        try: results.append(cache.get_or_set(key, fn, **kw))
+        except Exception as e: errors.append(e)
+    threads = [threading.Thread(target=one) for _ in range(n)]
+    for th in threads: th.start()
+    for th in threads: th.join()
+    return results, errors
+
+@pytest.fixture(params=["disk", "redis"])
+def cache(request, tmp_path):
+    return DiskCache(str(tmp_path / "data")) if request.param == "disk" else RedisCache(client=FakeRedis())
+
+def test_concurrent_cold_loads_run_once(cache):
+    calls = []
+    def build(progress):
+        calls.append(1)
+        progress(0.5, "GA4 리포트 조회 중")
+        time.sleep(0.3)
+        return {'cur_uv': 1}
+    key = make_key("weekly_report", "sf", id(cache))
+    results, errors = run_sessions(cache, key, build)
+    assert not errors and len(calls) == 1
+    assert results == [{'cur_uv': 1}] * 20
+    assert cache.get(key) == {'cur_uv': 1}
+    # 잠금/진행 키는 남지 않는다
+    assert cache.get_bytes(f"{key}:lock") is None and cache.get_bytes(f"{key}:progress") is None
+
+def test_failed_build_reaches_every_waiter_and_is_not_cached(cache):
+    calls = []
+    def build(progress):
+        calls.append(1)
+        time.sleep(0.2)
+        raise RuntimeError("GA4 down")
+    key = make_key("weekly_report", "sf-fail", id(cache))
+    results, errors = run_sessions(cache, key, build, n=5)
+    assert not results and len(errors) == 5 and len(calls) == 1
+    assert cache.get(key) is None
+    assert cache.get_or_set(key, lambda progress: {'cur_uv': 2}) == {'cur_uv': 2}
+
+def test_should_cache_false_is_returned_but_not_stored(cache):
+    key = make_key("weekly_report", "sf-partial", id(cache))
+    assert cache.get_or_set(key, lambda progress: {'pending': 3}, should_cache=lambda r: not r['pending']) == {'pending': 3}
+    assert cache.get(key) is None
+
+# 프로세스(레플리카) 사이에서는 DiskCache 의 잠금 파일로 합친다
+def replica(root, key, out, start_at):
+    cache = DiskCache(root)
+    def build(progress):
+        with open(os.path.join(root, "calls"), "a") as f: f.write("1\n")
+        time.sleep(0.5)
+        return {'cur_uv': 3}
+    time.sleep(max(0.0, start_at - time.time()))
+    out.put(cache.get_or_set(key, build))
+
+def test_replicas_share_one_build(tmp_path):
+    root = str(tmp_path / "data")
+    DiskCache(root)
+    key = make_key("weekly_report", "sf-replicas")
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    start_at = time.time() + 0.5
+    procs = [ctx.Process(target=replica, args=(root, key, out, start_at)) for _ in range(3)]
+    for p in procs: p.start()
+    results = [out.get(timeout=30) for _ in procs]
+    for p in procs: p.join()
+    assert results == [{'cur_uv': 3}] * 3
+    with open(os.path.join(root, "calls")) as f: assert f.read().count("1") == 1